@@ -6,10 +6,54 @@ DEFAULT_SAMPLE_RATE = 48000  # 48kHz sample rate, standard for many services
 AUDIO_OUTPUT_BUFFER_SIZE = 2048  # Buffer size for audio output
 AUDIO_PROCESS_INTERVAL_SEC = 0.011  # 11ms processing interval
 AUDIO_PROCESS_INTERVAL_MS = 11  # 11ms interval for processing audio
+AUDIO_THREADED = True  # Run capture/mix/output on a dedicated high-priority thread
+AUDIO_COMMAND_QUEUE_SIZE = 256  # Pending play/stop/gain commands the GUI can queue for the audio thread
+AUDIO_STATS_REPORT_TICKS = 100  # Audio thread reports timing stats every N ticks
+AUDIO_STATS_COLLECT_INTERVAL_MS = 1000  # How often the GUI thread takes queued stats reports (and appends them to the log)
+LATENCY_HISTOGRAM_EDGES_MS = (0.25, 0.5, 1, 2, 3, 4, 6, 8, 10, 11, 12, 14, 16, 20, 25, 33, 50, 100)  # Bucket upper edges
+TRIGGER_LATENCY_EDGES_MS = (2, 5, 10, 15, 20, 25, 30, 40, 50, 75, 100, 150, 200, 300, 500, 1000, 2000)  # Click to first sample
+TRIGGER_PERCENTILES = (50, 90, 95, 99)  # Reported from the trigger latency histogram
+TRIGGER_TIMEOUT_SEC = 10  # A trigger that has not sounded by then (stopped, failed to decode) is counted as lost
+AUDIO_SCHEDULING = 'timer'  # 'timer' renders fixed 11ms blocks, 'pull' renders what the sink needs
+PULL_POLL_INTERVAL_MS = 2  # How often the pull scheduler checks sink/input levels
+PULL_TARGET_FILL_MS = 8  # Audio the pull scheduler keeps queued in the output sink
+PULL_MAX_BLOCK_MS = 20  # Largest block rendered in one pull tick
+PULL_MAX_INPUT_BACKLOG_MS = 30  # Mic audio allowed to pile up before it is skipped
+AUDIO_NATIVE_FORMAT = True  # Run at the output device's own rate/channels so the OS doesn't resample
+AUDIO_FLOAT_OUTPUT = True  # Send sinks float samples when they all accept them, skipping int16 quantization
+RESAMPLE_ZERO_CROSSINGS = 32  # Resampler filter half-length, in zero crossings of the lower rate
+RESAMPLE_KAISER_BETA = 9.0  # Kaiser window shape; ~90dB stopband rejection
+RESAMPLE_ROLLOFF = 0.94  # Resampler cutoff as a fraction of the lower Nyquist frequency
 MIC_GAIN = 1.0 # Default
 MUSIC_GAIN = 0.2
+LIMITER_THRESHOLD_DB = -3.0  # The master bus soft limiter starts bending peaks above this
+NOISE_GATE_THRESHOLD_DB = -50.0  # The optional mic gate mutes blocks quieter than this
+NOISE_GATE_HOLD_MS = 150  # ...once they have been quiet for this long
+NOISE_GATE_RELEASE_MS = 100  # ...fading out over this
+MAX_POLYPHONY = 16  # Max clips that can play on top of each other
+VOICE_STEAL_POLICY = 'oldest'  # 'oldest' or 'quietest' voice is replaced when the pool is full
+VOICE_RING_FRAMES = 24000  # Frames of each voice's clip staged for the mix; not a power of two, so voices don't alias in cache
+VOICE_REFILL_FRAMES = 8000  # Frames copied into a voice's ring per refill
 INT16_MAX = 32767
 INT16_SCALE = 32768.0
+CLIP_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB of decoded int16 clips kept in memory
+DISK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB of decoded clips kept on disk between runs
+PRELOAD_MAX_BYTES = 192 * 1024 * 1024  # Decoded clips the background preloader may add to the clip cache
+PRELOAD_POLL_INTERVAL_MS = 50  # How often the GUI collects finished preloads
+FFMPEG_BINARY = 'ffmpeg'  # Decoder used for streamed clips, looked up on PATH
+FFPROBE_BINARY = 'ffprobe'  # Reads duration/rate/channels for the library index
+DECODE_READ_BYTES = 1024 * 1024  # Chunk size for reading a whole decode from the ffmpeg pipe
+STREAM_BLOCK_FRAMES = 4096  # Frames per block read from the ffmpeg pipe
+STREAM_RING_SECONDS = 2  # Decoded audio buffered ahead of playback for a streamed clip
+STREAM_MIN_FILE_BYTES = 8 * 1024 * 1024  # Files at least this big are streamed instead of decoded up front
+MAPPED_RELEASE_SECONDS = 2  # A memory-mapped clip drops the pages it has played (and reads ahead) this often
+CLIP_LOUDNESS_TARGET_DB = -14.0  # Gated RMS level every analyzed clip is normalized to
+CLIP_MAX_BOOST_DB = 12.0  # Quiet clips are raised by at most this much
+CLIP_PEAK_CEILING_DB = -1.0  # Normalization never pushes a clip's peak above this
+CLIP_SILENCE_THRESHOLD_DB = -50.0  # Leading samples below this are trimmed as silence
+CLIP_START_PREROLL_MS = 10  # Kept before the first sound so its attack isn't cut
+SINK_QUEUE_MS = 50  # Mixed audio each output sink can fall behind by before its overflow policy drops some
+SINK_OVERFLOW_POLICY = 'drop_oldest'  # 'drop_oldest' catches a late sink up, 'drop_newest' keeps its queue gapless
 
 # Expose a clean public API for package imports
 __all__ = [
@@ -18,8 +62,52 @@ __all__ = [
 	'AUDIO_OUTPUT_BUFFER_SIZE',
 	'AUDIO_PROCESS_INTERVAL_SEC',
 	'AUDIO_PROCESS_INTERVAL_MS',
+	'AUDIO_THREADED',
+	'AUDIO_COMMAND_QUEUE_SIZE',
+	'AUDIO_STATS_REPORT_TICKS',
+	'AUDIO_STATS_COLLECT_INTERVAL_MS',
+	'LATENCY_HISTOGRAM_EDGES_MS',
+	'TRIGGER_LATENCY_EDGES_MS',
+	'TRIGGER_PERCENTILES',
+	'TRIGGER_TIMEOUT_SEC',
+	'AUDIO_SCHEDULING',
+	'PULL_POLL_INTERVAL_MS',
+	'PULL_TARGET_FILL_MS',
+	'PULL_MAX_BLOCK_MS',
+	'PULL_MAX_INPUT_BACKLOG_MS',
+	'AUDIO_NATIVE_FORMAT',
+	'AUDIO_FLOAT_OUTPUT',
+	'RESAMPLE_ZERO_CROSSINGS',
+	'RESAMPLE_KAISER_BETA',
+	'RESAMPLE_ROLLOFF',
 	'MIC_GAIN',
 	'MUSIC_GAIN',
+	'LIMITER_THRESHOLD_DB',
+	'NOISE_GATE_THRESHOLD_DB',
+	'NOISE_GATE_HOLD_MS',
+	'NOISE_GATE_RELEASE_MS',
+	'MAX_POLYPHONY',
+	'VOICE_STEAL_POLICY',
+	'VOICE_RING_FRAMES',
+	'VOICE_REFILL_FRAMES',
 	'INT16_MAX',
 	'INT16_SCALE',
+	'CLIP_CACHE_MAX_BYTES',
+	'DISK_CACHE_MAX_BYTES',
+	'PRELOAD_MAX_BYTES',
+	'PRELOAD_POLL_INTERVAL_MS',
+	'FFMPEG_BINARY',
+	'FFPROBE_BINARY',
+	'DECODE_READ_BYTES',
+	'STREAM_BLOCK_FRAMES',
+	'STREAM_RING_SECONDS',
+	'STREAM_MIN_FILE_BYTES',
+	'MAPPED_RELEASE_SECONDS',
+	'CLIP_LOUDNESS_TARGET_DB',
+	'CLIP_MAX_BOOST_DB',
+	'CLIP_PEAK_CEILING_DB',
+	'CLIP_SILENCE_THRESHOLD_DB',
+	'CLIP_START_PREROLL_MS',
+	'SINK_QUEUE_MS',
+	'SINK_OVERFLOW_POLICY',
 ]
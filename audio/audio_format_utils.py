@@ -1,8 +1,9 @@
 import os
-from pydub import AudioSegment
 import numpy as np
 from PyQt6.QtMultimedia import QAudioFormat
 
+from audio.resample import resample
+from audio.sample_formats import DECODERS, ENCODERS
 from . import DEFAULT_SAMPLE_RATE
 
 
@@ -11,6 +12,8 @@ def audio_matches_qt_format(audio_path, qt_format):
     """
     Check if an audio file (any format supported by pydub/ffmpeg) matches the given QAudioFormat.
     """
+    # pydub is only needed on these legacy paths, so it isn't imported at startup
+    from pydub import AudioSegment
     try:
         audio = AudioSegment.from_file(audio_path)
         channels = audio.channels
@@ -41,14 +44,15 @@ def decode_to_pcm(file_path, target_sample_rate=DEFAULT_SAMPLE_RATE, target_chan
         target_sample_width: Target sample width in bytes (default 2 for 16-bit)
     
     Returns:
-        numpy array of PCM data (int16)
+        numpy array of interleaved PCM data: int32 for a target_sample_width
+        of 4, int16 otherwise, whether or not the file had to be resampled
     """
+    from pydub import AudioSegment
     try:
         # Load audio file using pydub
         audio = AudioSegment.from_file(file_path)
         
-        # Convert to target format
-        audio = audio.set_frame_rate(target_sample_rate)
+        # Convert to target format (the rate is converted below, in float)
         audio = audio.set_channels(target_channels)
         audio = audio.set_sample_width(target_sample_width)
         
@@ -63,6 +67,17 @@ def decode_to_pcm(file_path, target_sample_rate=DEFAULT_SAMPLE_RATE, target_chan
         else:
             # Fallback to int16
             pcm_array = np.frombuffer(pcm_data, dtype=np.int16)
+
+        if audio.frame_rate != target_sample_rate:
+            # One polyphase resample at load time instead of pydub's audioop ratecv, in float and
+            # quantized back to the same integer width
+            sample_format = 'int16' if pcm_array.dtype == np.int16 else 'int32'
+            frames = np.empty((len(pcm_array) // target_channels, target_channels), dtype=np.float32)
+            DECODERS[sample_format](pcm_array.reshape(frames.shape), frames)
+            resampled = resample(frames, audio.frame_rate, target_sample_rate).reshape(-1)
+            np.clip(resampled, -1.0, 1.0, out=resampled)
+            pcm_array = np.empty(resampled.shape, dtype=pcm_array.dtype)
+            ENCODERS[sample_format](resampled, pcm_array)
         
         print(f"Decoded {file_path}: {len(pcm_array)} samples, {target_sample_rate}Hz, {target_channels} channels")
         return pcm_array
@@ -111,6 +126,7 @@ def validate_audio_file(file_path):
     Returns:
         dict with file info or None if invalid
     """
+    from pydub import AudioSegment
     try:
         audio = AudioSegment.from_file(file_path)
         return {
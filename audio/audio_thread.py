@@ -0,0 +1,46 @@
+import threading
+
+from PyQt6.QtCore import QThread
+
+
+class AudioThread(QThread):
+    """High-priority thread that owns the mixer's streams and mix timer.
+
+    run() opens the QAudioSource/QAudioSink objects and the precise mix
+    timer inside this thread, so mix_audio never waits on the GUI event
+    loop. The GUI only talks to the mixer through its SPSC queues.
+    """
+
+    def __init__(self, mixer):
+        super().__init__()
+        self.mixer = mixer
+        self.started_event = threading.Event()
+        self.startup_error = None
+
+    def run(self):
+        try:
+            self.mixer.init_audio_streams()
+        except Exception as e:
+            self.startup_error = e
+            self.started_event.set()
+            return
+        self.started_event.set()
+
+        self.exec()
+
+        # Streams and timer belong to this thread, so they are torn down here too
+        self.mixer.timer.stop()
+        self.mixer.cleanup()
+
+    def start_async(self):
+        """Start the thread and return at once; startup_error is set if opening the streams fails."""
+        self.start(QThread.Priority.TimeCriticalPriority)
+
+    def start_and_wait(self, timeout=5.0):
+        """Start the thread and block until the streams are open (raising if that failed)."""
+        self.start(QThread.Priority.TimeCriticalPriority)
+        if not self.started_event.wait(timeout):
+            raise RuntimeError("Audio thread did not start in time")
+        if self.startup_error is not None:
+            self.wait()
+            raise self.startup_error
@@ -0,0 +1,120 @@
+import math
+
+import numpy as np
+
+from audio.stream_decoder import ffmpeg_blocks
+from . import CLIP_LOUDNESS_TARGET_DB, CLIP_MAX_BOOST_DB, CLIP_PEAK_CEILING_DB, CLIP_SILENCE_THRESHOLD_DB
+from . import CLIP_START_PREROLL_MS, DEFAULT_SAMPLE_RATE
+
+LOUDNESS_WINDOW_SEC = 0.4
+ABSOLUTE_GATE_DB = -70.0
+RELATIVE_GATE_DB = -10.0
+
+
+class ClipAnalyzer:
+    """Loudness, peak and leading silence of one clip, fed block by block.
+
+    Loudness is LUFS-style gated RMS without the K-weighting filter: the
+    mean square over 400ms windows, dropping windows below -70 dBFS and
+    then those more than 10 dB under the mean of the rest, so pauses and
+    fade-outs don't drag a clip's level down. Channels are averaged, so
+    a mono clip and its stereo copy measure the same. The start is the
+    first frame with a sample above CLIP_SILENCE_THRESHOLD_DB, and the
+    windows begin there, since playback skips what comes before it.
+
+    Each block costs a few vectorized reductions and memory is one float
+    per window, so a file of any length can be analyzed straight off an
+    ffmpeg pipe.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.frames = 0
+        self.peak = 0.0
+        self.first_sound = None  # frame index, once found
+        self._window = max(int(sample_rate * LOUDNESS_WINDOW_SEC), 1)
+        self._threshold = np.float32(10.0 ** (CLIP_SILENCE_THRESHOLD_DB / 20.0))
+        self._window_sums = []
+        self._partial_sum = 0.0
+        self._partial_frames = 0
+
+    def feed(self, block):
+        """Add the next float32 (frames, channels) block."""
+        count = len(block)
+        if count == 0:
+            return
+        self.peak = max(self.peak, float(block.max()), -float(block.min()))
+        if self.first_sound is None:
+            loud = np.flatnonzero(((block > self._threshold) | (block < -self._threshold)).any(axis=1))
+            if not loud.size:
+                self.frames += count
+                return
+            self.first_sound = self.frames + int(loud[0])
+            # Playback skips the leading silence, so the loudness windows start where it ends
+            self.frames += int(loud[0])
+            block = block[int(loud[0]):]
+            count = len(block)
+
+        power = np.einsum('ij,ij->i', block, block, dtype=np.float64) / block.shape[1]
+        take = min(self._window - self._partial_frames, count)
+        self._partial_sum += float(power[:take].sum())
+        self._partial_frames += take
+        if self._partial_frames == self._window:
+            self._window_sums.append(self._partial_sum)
+            whole = (count - take) // self._window
+            end = take + whole * self._window
+            self._window_sums.extend(power[take:end].reshape(whole, self._window).sum(axis=1).tolist())
+            self._partial_sum = float(power[end:].sum())
+            self._partial_frames = count - end
+        self.frames += count
+
+    def loudness_db(self):
+        """Gated loudness in dBFS, or None for a silent clip."""
+        means = np.array(self._window_sums) / self._window
+        if self._partial_frames and (not self._window_sums or self._partial_frames * 4 >= self._window):
+            # A short clip is one partial window; a tail counts once it is a quarter window long
+            means = np.append(means, self._partial_sum / self._partial_frames)
+        means = means[means > 10.0 ** (ABSOLUTE_GATE_DB / 10.0)]
+        if means.size == 0:
+            return None
+        means = means[means > means.mean() * 10.0 ** (RELATIVE_GATE_DB / 10.0)]
+        return 10.0 * math.log10(means.mean())
+
+    def start_offset(self):
+        """Seconds of leading silence to skip (keeping CLIP_START_PREROLL_MS), 0 for a silent clip."""
+        if self.first_sound is None:
+            return 0.0
+        return max(self.first_sound / self.sample_rate - CLIP_START_PREROLL_MS / 1000.0, 0.0)
+
+    def result(self):
+        """(loudness_db, peak, start_offset_sec)"""
+        return self.loudness_db(), self.peak, self.start_offset()
+
+
+def analyze_file(file_path, sample_rate=None, channels=None):
+    """Decode file_path with ffmpeg and analyze it; returns (loudness_db, peak, start_offset_sec) or None.
+
+    Decoding at the file's own rate and channel count (as probed) spares
+    ffmpeg a resample.
+    """
+    sample_rate = sample_rate or DEFAULT_SAMPLE_RATE
+    analyzer = ClipAnalyzer(sample_rate)
+    try:
+        for block in ffmpeg_blocks(file_path, sample_rate, channels or 2):
+            analyzer.feed(block)
+    except OSError as e:
+        print(f"Could not analyze {file_path}: {e}")
+        return None
+    if analyzer.frames == 0:
+        return None
+    return analyzer.result()
+
+
+def normalization_gain(loudness_db, peak):
+    """Voice gain that brings a clip to CLIP_LOUDNESS_TARGET_DB without boosting it too far or past the peak ceiling."""
+    if loudness_db is None:
+        return 1.0
+    gain_db = min(CLIP_LOUDNESS_TARGET_DB - loudness_db, CLIP_MAX_BOOST_DB)
+    if peak:
+        gain_db = min(gain_db, CLIP_PEAK_CEILING_DB - 20.0 * math.log10(peak))
+    return 10.0 ** (gain_db / 20.0)
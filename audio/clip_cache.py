@@ -0,0 +1,102 @@
+import os
+from collections import OrderedDict
+
+from . import CLIP_CACHE_MAX_BYTES
+
+
+class ClipCache:
+    """In-memory LRU cache of decoded, device-ready clips.
+
+    Entries are compact int16 (frames, 1 or channels) clips (see
+    compact_clip) keyed on the source path, its modification time and the
+    target sample rate/channel count, so a clip that was edited on disk or
+    requested for another format is decoded again instead of being served
+    stale.
+    """
+
+    def __init__(self, max_bytes=CLIP_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(file_path, sample_rate, channels):
+        """Build the cache key for a clip in the given target format."""
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, sample_rate, channels)
+
+    def get(self, key):
+        """Return the cached clip for key (marking it most recently used) or None."""
+        clip = self._entries.get(key)
+        if clip is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return clip
+
+    def put(self, key, clip):
+        """Store a clip, evicting least recently used entries to stay within budget."""
+        if clip is None or len(clip) == 0:
+            return
+        if clip.nbytes > self.max_bytes:
+            print(f"Clip {key[0]} ({clip.nbytes} bytes) exceeds cache budget, not caching")
+            return
+
+        self._discard(key)
+        self._drop_stale(key)
+        # Cached arrays are shared with the mixer; make sure nobody mutates them
+        clip.setflags(write=False)
+        self._entries[key] = clip
+        self.current_bytes += clip.nbytes
+
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def get_or_load(self, file_path, sample_rate, channels, loader):
+        """Return the clip for file_path, calling loader() to decode it on a miss."""
+        key = self.make_key(file_path, sample_rate, channels)
+        clip = self.get(key)
+        if clip is None:
+            clip = loader()
+            self.put(key, clip)
+        return clip
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        """Return cache counters as a dict (for logging/diagnostics)."""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _discard(self, key):
+        clip = self._entries.pop(key, None)
+        if clip is not None:
+            self.current_bytes -= clip.nbytes
+
+    def _drop_stale(self, key):
+        # Forget older decodes of the same file (same path and format but a
+        # different mtime); they can never be hit again.
+        path, _, sample_rate, channels = key
+        stale = [k for k in self._entries if k[0] == path and k[2:] == (sample_rate, channels)]
+        for k in stale:
+            self._discard(k)
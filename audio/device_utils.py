@@ -1,29 +1,88 @@
+from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtMultimedia import QMediaDevices
 
+VB_CABLE_MARKERS = ("vb-audio", "vb-cable", "cable")
+
+
+def is_vbcable(device):
+    """True when device looks like the VB-Cable virtual cable (by its description)."""
+    try:
+        description = device.description().lower()
+    except Exception:
+        return False
+    return any(marker in description for marker in VB_CABLE_MARKERS)
+
+
+class DeviceRegistry(QObject):
+    """The system's audio devices, listed once and again only when they change.
+
+    Every QMediaDevices.audioInputs()/audioOutputs() call asks the backend
+    for a fresh list, so the mixer used to enumerate the devices several
+    times while it started. The registry keeps the lists, the defaults and
+    the VB-Cable lookup, refreshes them when QMediaDevices reports that an
+    input or output came or went, and then emits `changed`.
+
+    Create it (through get_device_registry) on the GUI thread, whose event
+    loop delivers the change notifications. A refresh replaces each
+    attribute whole, so the audio thread can read them.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._media_devices = QMediaDevices(self)
+        self._media_devices.audioInputsChanged.connect(self._devices_changed)
+        self._media_devices.audioOutputsChanged.connect(self._devices_changed)
+        self.refresh()
+
+    def refresh(self):
+        """Re-list the devices and look for VB-Cable again."""
+        self.inputs = QMediaDevices.audioInputs()
+        self.outputs = QMediaDevices.audioOutputs()
+        self.default_input = QMediaDevices.defaultAudioInput()
+        self.default_output = QMediaDevices.defaultAudioOutput()
+        self.vb_cable = self._find_vbcable()
+
+    def _find_vbcable(self):
+        # Prefer audio outputs (devices you can write to). If nothing is found
+        # there, try audio inputs as a fallback (some systems expose the
+        # virtual cable in a way that is more appropriate to the capture side).
+        for devices in (self.outputs, self.inputs):
+            for device in devices:
+                if is_vbcable(device):
+                    print(f"Found VB-Cable device: {device.description()}")
+                    return device
+        return None
+
+    def _devices_changed(self):
+        self.refresh()
+        print(f"Audio devices changed: {len(self.inputs)} inputs, {len(self.outputs)} outputs")
+        self.changed.emit()
+
+
+_registry = None
+
+
+def get_device_registry():
+    """The shared DeviceRegistry, created on first use."""
+    global _registry
+    if _registry is None:
+        _registry = DeviceRegistry()
+    return _registry
+
+
 def list_audio_devices():
+    registry = get_device_registry()
     print("\n=== Available Audio Input Devices ===")
-    for i, device in enumerate(QMediaDevices.audioInputs()):
+    for i, device in enumerate(registry.inputs):
         print(f"{i}: {device.description()}")
 
     print("\n=== Available Audio Output Devices ===")
-    for i, device in enumerate(QMediaDevices.audioOutputs()):
+    for i, device in enumerate(registry.outputs):
         print(f"{i}: {device.description()}")
 
+
 def get_vbcable_output_device():
-    """Find VB-Cable output device."""
-    # Prefer searching audio outputs (devices you can write to). If nothing
-    # is found there, try audio inputs as a fallback (some systems expose the
-    # virtual cable in a way that is more appropriate to the capture side).
-    for devices_getter in (QMediaDevices.audioOutputs, QMediaDevices.audioInputs):
-        try:
-            devices = devices_getter()
-        except Exception:
-            devices = []
-
-        for device in devices:
-            description = device.description().lower()
-            if "vb-audio" in description or "vb-cable" in description or "cable" in description:
-                print(f"Found VB-Cable device: {device.description()}")
-                return device
-
-    return None
\ No newline at end of file
+    """Find VB-Cable output device (cached by the device registry)."""
+    return get_device_registry().vb_cable
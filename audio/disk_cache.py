@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from . import DISK_CACHE_MAX_BYTES
+
+INDEX_FILE = "index.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+# In entry names, so decodes stored in an older layout (float32 stereo) are never loaded, just evicted in time
+ENTRY_FORMAT = "int16"
+
+
+def source_stamp(file_path):
+    """(size, mtime_ns, content hash) of a source file; reads the whole file, so keep it off the GUI thread."""
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def entry_name(content_hash, sample_rate, channels):
+    return f"{content_hash}_{sample_rate}_{channels}_{ENTRY_FORMAT}.npy"
+
+
+def write_entry(entry_path, write, max_bytes):
+    """Have write(path) produce an entry's .npy and move it into place; True when it was.
+
+    Touches only the entry's own files, so worker threads and processes
+    can write entries while the owning DiskClipCache keeps serving; hand
+    the result to its add_entry() afterwards. Nothing is kept when write
+    returns a false value or raises, or the file exceeds max_bytes.
+    """
+    tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+    stored = False
+    try:
+        if write(tmp_path):
+            size = os.path.getsize(tmp_path)
+            if size > max_bytes:
+                print(f"Decode for {entry_path} ({size} bytes) exceeds the disk cache, not caching")
+            else:
+                os.replace(tmp_path, entry_path)
+                stored = True
+    except Exception as e:
+        print(f"Error writing disk cache entry {entry_path}: {e}")
+    finally:
+        if not stored and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return stored
+
+
+def save_clip(path, clip):
+    """A write for write_entry that saves an in-memory clip."""
+    with open(path, "wb") as f:
+        np.save(f, np.ascontiguousarray(clip))
+    return True
+
+
+class DiskClipCache:
+    """Persistent cache of decoded clips stored as .npy files.
+
+    Each entry holds a clip already in the voice pool's compact int16
+    layout (see compact_clip) and is named after a hash of the source
+    file's contents plus the target sample rate and channel count. Entries are
+    loaded back with np.load(mmap_mode='r'), so a hit costs page faults
+    rather than an ffmpeg decode.
+
+    index.json remembers the size/mtime each source had when it was hashed.
+    load() only looks a source up by those, so it never reads the source
+    file: one that was never hashed, or changed since, is a miss until
+    something hashes it again (see source_stamp, record). Hashing and
+    writing entries can then happen on worker threads or processes, and
+    the owner records the results here. Index changes are kept in memory
+    until flush(). The entries' sizes are listed once, when the cache is
+    opened, and tracked from then on, so enforcing the size limit never
+    rescans the directory.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DISK_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        self._index = self._load_index()
+        self._index_dirty = False
+        self._entries, self._total = self._list_entries()  # entry path -> size, least recently used first
+
+    def lookup(self, file_path, sample_rate, channels):
+        """Path of the stored decode of file_path, or None when there is none or the file changed since it was hashed."""
+        entry_path = self.lookup_path(file_path, sample_rate, channels)
+        return entry_path if entry_path in self._entries else None
+
+    def load(self, file_path, sample_rate, channels):
+        """Return a read-only memmap of the cached clip, or None on a miss."""
+        entry_path = None
+        try:
+            entry_path = self.lookup(file_path, sample_rate, channels)
+            if entry_path is None:
+                return None
+            clip = np.load(entry_path, mmap_mode='r')
+            # Bump the mtime so size-limit eviction in later sessions drops least recently used entries first
+            os.utime(entry_path)
+            self._entries.move_to_end(entry_path)
+            return clip
+        except FileNotFoundError:
+            if entry_path is not None:
+                self._forget(entry_path)  # deleted behind the cache's back
+            return None
+        except Exception as e:
+            print(f"Error reading disk cache for {file_path}: {e}")
+            return None
+
+    def store(self, file_path, sample_rate, channels, clip):
+        """Write a decoded clip to the cache (hashing the file if needed) and enforce the size limit."""
+        if clip is None or len(clip) == 0 or clip.nbytes > self.max_bytes:
+            return
+        try:
+            entry_path = self.entry_path(file_path, sample_rate, channels)
+        except OSError as e:
+            print(f"Error writing disk cache for {file_path}: {e}")
+            return
+        self.store_file(entry_path, lambda path: save_clip(path, clip))
+
+    def store_file(self, entry_path, write):
+        """Have write(path) produce the .npy for entry_path (see write_entry) and enforce the size limit.
+
+        For decodes too long to hold in memory, which write can stream
+        straight to disk (e.g. decode_to_npy). Returns True when the entry
+        was stored.
+        """
+        stored = write_entry(entry_path, write, self.max_bytes)
+        if stored:
+            self.add_entry(entry_path)
+        return stored
+
+    def add_entry(self, entry_path):
+        """Take on an entry written by write_entry (e.g. in a worker) and enforce the size limit."""
+        try:
+            size = os.path.getsize(entry_path)
+        except OSError:
+            return
+        self._total += size - self._entries.pop(entry_path, 0)
+        self._entries[entry_path] = size
+        self.enforce_limit()
+
+    def record(self, file_path, size, mtime_ns, content_hash):
+        """Remember a source's hash (see source_stamp) so load() finds its entries; saved by flush()."""
+        path = os.path.abspath(file_path)
+        cached = self._index.get(path)
+        if cached and cached["hash"] != content_hash:
+            # Source was edited; its previous decodes are stale
+            self._remove_entries(cached["hash"])
+        self._index[path] = {"size": size, "mtime_ns": mtime_ns, "hash": content_hash}
+        self._index_dirty = True
+
+    def flush(self):
+        """Write index.json if anything was recorded since the last flush."""
+        if self._index_dirty:
+            self._save_index()
+            self._index_dirty = False
+
+    def enforce_limit(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        while self._total > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not evict disk cache entry {path}: {e}")
+            self._total -= size
+
+    def total_bytes(self):
+        return self._total
+
+    def entry_for(self, content_hash, sample_rate, channels):
+        return os.path.join(self.cache_dir, entry_name(content_hash, sample_rate, channels))
+
+    def entry_path(self, file_path, sample_rate, channels):
+        """Where the decode of file_path for this format lives (hashing the file if it changed)."""
+        entry_path = self.lookup_path(file_path, sample_rate, channels)
+        if entry_path is None:
+            stamp = source_stamp(os.path.abspath(file_path))
+            self.record(file_path, *stamp)
+            entry_path = self.entry_for(stamp[2], sample_rate, channels)
+        return entry_path
+
+    def lookup_path(self, file_path, sample_rate, channels):
+        """Where the decode of file_path lives if its recorded hash is still current, stored or not (None if not)."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        cached = self._index.get(path)
+        if not cached or cached["size"] != stat.st_size or cached["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        return self.entry_for(cached["hash"], sample_rate, channels)
+
+    def _forget(self, entry_path):
+        self._total -= self._entries.pop(entry_path, 0)
+
+    def _remove_entries(self, content_hash):
+        # Called before the edited file's index entry is replaced, so a count
+        # above one means another path still points at identical content
+        if sum(1 for v in self._index.values() if v["hash"] == content_hash) > 1:
+            return
+        prefix = os.path.join(self.cache_dir, content_hash + "_")
+        for path in [path for path in self._entries if path.startswith(prefix)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Could not remove stale cache entry {path}: {e}")
+            self._forget(path)
+
+    def _list_entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        entries.sort()
+        return OrderedDict((path, size) for _, path, size in entries), sum(size for _, _, size in entries)
+
+    def _load_index(self):
+        if os.path.exists(self._index_path):
+            try:
+                with open(self._index_path, "r") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print("Warning: disk cache index is corrupted. Starting with an empty index.")
+        return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            print(f"Could not save disk cache index: {e}")
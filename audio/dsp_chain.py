@@ -0,0 +1,228 @@
+import time
+
+import numpy as np
+
+from . import LIMITER_THRESHOLD_DB, NOISE_GATE_THRESHOLD_DB, NOISE_GATE_HOLD_MS, NOISE_GATE_RELEASE_MS
+
+
+def db_to_gain(db):
+    return 10.0 ** (db / 20.0)
+
+
+class DspNode:
+    """One block-processing step of a DspChain.
+
+    prepare() is called once, with the stream format, before the first
+    block, and is where a node allocates its scratch; process() then
+    works in place on a float32 (frames, channels) block of up to
+    max_frames and must not allocate. The chain times every call, so each
+    node's cost per block shows up in the stats.
+    """
+
+    name = 'node'
+
+    def __init__(self):
+        self.blocks = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.total_blocks = 0
+
+    def prepare(self, sample_rate, channels, max_frames):
+        pass
+
+    def process(self, block):
+        raise NotImplementedError
+
+    def cost(self, reset=False):
+        """Mean and worst time per block (microseconds) since the last reset."""
+        cost = {
+            'node': self.name,
+            'blocks': self.blocks,
+            'total_blocks': self.total_blocks,
+            'mean_us': self.seconds / max(self.blocks, 1) * 1e6,
+            'max_us': self.max_seconds * 1e6,
+        }
+        if reset:
+            self.blocks = 0
+            self.seconds = 0.0
+            self.max_seconds = 0.0
+        return cost
+
+
+class GainRamp:
+    """Scratch for applying a gain that moves linearly from one value to another across a block."""
+
+    def __init__(self, max_frames, channels):
+        # Full width rather than one column: broadcasting a (frames, 1) ramp makes numpy allocate a buffer
+        steps = np.arange(1, max_frames + 1, dtype=np.float32).reshape(-1, 1)
+        self._steps = np.repeat(steps, channels, axis=1)
+        self._ramp = np.zeros((max_frames, channels), dtype=np.float32)
+
+    def apply(self, block, start, end):
+        if start == end:
+            if end == 0.0:
+                block.fill(0.0)
+            elif end != 1.0:
+                np.multiply(block, end, out=block)
+            return
+        frames = block.shape[0]
+        # The last frame lands exactly on the new gain, so consecutive blocks join without a step
+        ramp = self._ramp[:frames]
+        np.multiply(self._steps[:frames], (end - start) / frames, out=ramp)
+        np.add(ramp, start, out=ramp)
+        np.multiply(block, ramp, out=block)
+
+
+class Gain(DspNode):
+    """Bus volume. A new gain is ramped to across the next block instead of stepping, so moving a dial doesn't click."""
+
+    name = 'gain'
+
+    def __init__(self, gain=1.0):
+        super().__init__()
+        self.gain = float(gain)
+        self.target = float(gain)
+        self._ramp = None
+
+    def prepare(self, sample_rate, channels, max_frames):
+        self._ramp = GainRamp(max_frames, channels)
+
+    def set_gain(self, gain):
+        self.target = float(gain)
+
+    def process(self, block):
+        self._ramp.apply(block, self.gain, self.target)
+        self.gain = self.target
+
+
+class SoftLimiter(DspNode):
+    """Waveshaping limiter: transparent below threshold_db, then bends peaks smoothly toward full scale.
+
+    Samples above the threshold t become t + (1 - t) * tanh((|x| - t) / (1 - t)),
+    which meets the straight line with the same slope and never passes 1.0,
+    so stacked clips round off instead of hard clipping. A block whose peak
+    is under the threshold costs one abs and one max.
+    """
+
+    name = 'limiter'
+
+    def __init__(self, threshold_db=LIMITER_THRESHOLD_DB):
+        super().__init__()
+        self.threshold = np.float32(db_to_gain(threshold_db))
+        self._knee = np.float32(1.0 - self.threshold)
+        self._inv_knee = np.float32(1.0 / self._knee)
+        self.limited_blocks = 0
+        self._excess = None
+        self._shaped = None
+
+    def prepare(self, sample_rate, channels, max_frames):
+        self._excess = np.zeros((max_frames, channels), dtype=np.float32)
+        self._shaped = np.zeros((max_frames, channels), dtype=np.float32)
+
+    def process(self, block):
+        frames = block.shape[0]
+        excess = self._excess[:frames]
+        np.abs(block, out=excess)
+        if excess.max() <= self.threshold:
+            return
+        self.limited_blocks += 1
+        shaped = self._shaped[:frames]
+        np.subtract(excess, self.threshold, out=excess)
+        np.maximum(excess, 0.0, out=excess)
+        np.multiply(excess, self._inv_knee, out=shaped)
+        np.tanh(shaped, out=shaped)
+        np.multiply(shaped, self._knee, out=shaped)
+        # Pull each sample in by (excess - shaped excess), on its own side of zero
+        np.subtract(excess, shaped, out=excess)
+        np.copysign(excess, block, out=excess)
+        np.subtract(block, excess, out=block)
+
+
+class NoiseGate(DspNode):
+    """Mutes a bus while its level stays below threshold_db, e.g. mic hiss between words.
+
+    The level is the block's RMS over all channels. The gate opens within
+    one block, stays open for hold_ms after the level last crossed the
+    threshold, then closes over release_ms; every gain change is ramped
+    across the block like Gain's.
+    """
+
+    name = 'noise_gate'
+
+    def __init__(self, threshold_db=NOISE_GATE_THRESHOLD_DB, hold_ms=NOISE_GATE_HOLD_MS,
+                 release_ms=NOISE_GATE_RELEASE_MS):
+        super().__init__()
+        self.threshold_db = threshold_db
+        self.hold_ms = hold_ms
+        self.release_ms = release_ms
+        self.gain = 0.0
+        self.is_open = False
+        self._mean_square = db_to_gain(threshold_db) ** 2
+        self._hold_left = 0
+        self._hold_frames = 0
+        self._release_frames = 1
+        self._ramp = None
+
+    def prepare(self, sample_rate, channels, max_frames):
+        self._hold_frames = int(sample_rate * self.hold_ms / 1000)
+        self._release_frames = max(int(sample_rate * self.release_ms / 1000), 1)
+        self._ramp = GainRamp(max_frames, channels)
+
+    def process(self, block):
+        frames = block.shape[0]
+        samples = block.reshape(-1)
+        if float(np.dot(samples, samples)) / max(samples.size, 1) > self._mean_square:
+            self._hold_left = self._hold_frames
+        else:
+            self._hold_left = max(self._hold_left - frames, 0)
+        self.is_open = self._hold_left > 0
+        if self.is_open:
+            gain = 1.0
+        else:
+            gain = max(self.gain - frames / self._release_frames, 0.0)
+        self._ramp.apply(block, self.gain, gain)
+        self.gain = gain
+
+
+class DspChain:
+    """An ordered list of DspNodes run in place on one bus's blocks.
+
+    Nodes are prepared for the stream format when the chain is built, and
+    each one is timed on every block (two perf_counter calls), so cost()
+    shows what a chain spends per block before it is enabled on a slower
+    machine. Build chains before the audio thread starts; afterwards only
+    set_gain() (through MixEngine's 'bus_gain' command) changes them.
+    """
+
+    def __init__(self, nodes, sample_rate, channels, max_frames):
+        self.nodes = list(nodes)
+        for node in self.nodes:
+            node.prepare(sample_rate, channels, max_frames)
+
+    def process(self, block):
+        for node in self.nodes:
+            started = time.perf_counter()
+            node.process(block)
+            elapsed = time.perf_counter() - started
+            node.blocks += 1
+            node.total_blocks += 1
+            node.seconds += elapsed
+            if elapsed > node.max_seconds:
+                node.max_seconds = elapsed
+
+    def node(self, name):
+        """The first node called name, or None."""
+        for node in self.nodes:
+            if node.name == name:
+                return node
+        return None
+
+    def set_gain(self, gain):
+        """Move the chain's Gain node to gain (ramped over the next block)."""
+        node = self.node('gain')
+        if node is None:
+            raise ValueError("This chain has no gain node")
+        node.set_gain(gain)
+
+    def cost(self, reset=False):
+        return [node.cost(reset) for node in self.nodes]
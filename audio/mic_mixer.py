@@ -1,39 +1,101 @@
-from PyQt6.QtMultimedia import QAudioSource, QAudioSink, QMediaDevices, QAudioFormat
-from PyQt6.QtCore import QTimer
+from PyQt6.QtMultimedia import QAudioSource, QAudioSink, QAudioFormat
+from PyQt6.QtCore import QTimer, Qt
+import json
+import time
 import numpy as np
-from audio.audio_format_utils import decode_to_pcm, duplicate_mono_to_stereo, ensure_channel_count
-from audio.device_utils import list_audio_devices, get_vbcable_output_device
-from . import DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, AUDIO_OUTPUT_BUFFER_SIZE, AUDIO_PROCESS_INTERVAL_SEC, AUDIO_PROCESS_INTERVAL_MS, MIC_GAIN, MUSIC_GAIN, INT16_MAX, INT16_SCALE
+from audio.device_utils import get_device_registry, is_vbcable
+from audio.dsp_chain import Gain, NoiseGate
+from audio.mix_engine import MixEngine
+from audio.stream_decoder import MappedClip, StreamingClip, decode_clip
+from audio.pull_scheduler import PullScheduler
+from audio.spsc_queue import SpscQueue
+from audio.audio_thread import AudioThread
+from audio.mix_stats import MixStats, TriggerStats
+from audio.sink_queue import SinkQueue
+from . import DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, AUDIO_OUTPUT_BUFFER_SIZE, AUDIO_PROCESS_INTERVAL_SEC, AUDIO_PROCESS_INTERVAL_MS, MAX_POLYPHONY, VOICE_STEAL_POLICY
+from . import AUDIO_NATIVE_FORMAT, AUDIO_THREADED, AUDIO_COMMAND_QUEUE_SIZE, AUDIO_STATS_REPORT_TICKS, AUDIO_STATS_COLLECT_INTERVAL_MS
+from . import SINK_QUEUE_MS, SINK_OVERFLOW_POLICY, AUDIO_FLOAT_OUTPUT, MIC_GAIN, MUSIC_GAIN
+from . import AUDIO_SCHEDULING, PULL_POLL_INTERVAL_MS, PULL_TARGET_FILL_MS, PULL_MAX_BLOCK_MS, PULL_MAX_INPUT_BACKLOG_MS
+
+SCHEDULING_MODES = ('timer', 'pull')
+QT_SAMPLE_FORMATS = {
+    QAudioFormat.SampleFormat.UInt8: 'uint8',
+    QAudioFormat.SampleFormat.Int16: 'int16',
+    QAudioFormat.SampleFormat.Int32: 'int32',
+    QAudioFormat.SampleFormat.Float: 'float32',
+}
 
 class MicMixer:
-    def __init__(self, audio_device=None, output_devices=None, route_to_vbcable_only=False):
-        """Create a MicMixer.
+    """Qt adapter around MixEngine: opens the capture/playback streams and feeds the engine blocks."""
 
-        route_to_vbcable_only: when True, prefer routing playback only to the
-        VB-Cable device (if present) and also keep the microphone input device
-        unchanged. This helps prevent changing the system default mic/device
-        when playing sounds.
+    def __init__(self, audio_device=None, output_devices=None, route_to_vbcable_only=False,
+                 max_voices=MAX_POLYPHONY, steal_policy=VOICE_STEAL_POLICY, scheduling=AUDIO_SCHEDULING,
+                 threaded=AUDIO_THREADED, stats_log=None, native_format=AUDIO_NATIVE_FORMAT,
+                 wait_for_streams=True, sink_overflow=SINK_OVERFLOW_POLICY, mic_gain=MIC_GAIN,
+                 music_gain=MUSIC_GAIN, mic_noise_gate=False):
+        """Create a MicMixer; options default to the settings in audio/__init__.py.
+
+        route_to_vbcable_only plays only to VB-Cable (when present) and leaves the system mic untouched.
         """
+        if scheduling not in SCHEDULING_MODES:
+            raise ValueError(f"Unknown scheduling mode: {scheduling}")
         self.route_to_vbcable_only = route_to_vbcable_only
+        self.scheduling = scheduling
+        self.max_voices = max_voices
+        self.steal_policy = steal_policy
+        self.native_format = native_format
+        self.sink_overflow = sink_overflow
+        self.mic_gain = mic_gain
+        self.music_gain = music_gain
+        self.mic_noise_gate = mic_noise_gate
+        self.sink_queues = []
+        self.scheduler = None
+        self.audio_thread = None
+
+        # GUI -> audio thread commands and audio thread -> GUI stats
+        self.commands = SpscQueue(AUDIO_COMMAND_QUEUE_SIZE)
+        self.stats_queue = SpscQueue(64)
+        self.latest_stats = {}  # owned by the GUI thread, see collect_stats
+        self._next_handle = 0
+        self.first_sound_latency = None  # seconds from the first timed trigger to its first mixed sample
+        self.triggers = TriggerStats()  # updated on the audio thread, reported with the stats
+        self.stats_log = None
+        if stats_log:
+            self._open_stats_log(stats_log)
+        self._stats_timer = QTimer()
+        self._stats_timer.timeout.connect(self.collect_stats)
+        self._stats_timer.start(AUDIO_STATS_COLLECT_INTERVAL_MS)
 
         # Do NOT change the system microphone/device. Use provided audio_device
         # or the system default audio input for capture only.
+        self.devices = get_device_registry()
         self.audio_device = self._select_audio_device(audio_device)
+        self._input_follows_default = audio_device is None
+        self._default_output_slot = None  # index of the output that follows the system default
         self.output_devices = self._setup_output_devices(output_devices)
         self._print_output_devices()
+        self.devices.changed.connect(self._devices_changed)
 
         self.input_stream = None
         self.output_streams = []
-        self.sound_buffer = np.array([], dtype=np.float32)
-        self.sound_position = 0
         self.is_active = False
 
-        # Set up audio format
+        # Set up audio format (and the mix engine for it)
         self.setup_audio_format()
 
+        interval_ms = PULL_POLL_INTERVAL_MS if scheduling == 'pull' else AUDIO_PROCESS_INTERVAL_MS
+        self.stats = MixStats(interval_ms, self.format.sampleRate())
+
         # Init mic check
         try:
-            self.init_audio_streams()
+            if threaded:
+                self.audio_thread = AudioThread(self)
+                if wait_for_streams:
+                    self.audio_thread.start_and_wait()
+                else:
+                    self.audio_thread.start_async()
+            else:
+                self.init_audio_streams()
             print("Microphone initialized successfully.")
         except Exception as e:
             print(f"Microphone initialization failed: {e}")
@@ -45,23 +107,18 @@ class MicMixer:
         # capture device. Instead fall back to the system default audio input
         # so the real microphone remains active. The VB-Cable device will be
         # used for output routing instead.
-        vb_cable = get_vbcable_output_device()
+        vb_cable = self.devices.vb_cable
 
         # If audio_device looks like the VB-Cable device, ignore it for input
         if audio_device is not None:
-            try:
-                desc = audio_device.description().lower()
-            except Exception:
-                desc = ""
-
-            if vb_cable is not None and (audio_device == vb_cable or "vb-audio" in desc or "vb-cable" in desc or "cable" in desc):
-                fallback = QMediaDevices.defaultAudioInput()
+            if vb_cable is not None and (audio_device == vb_cable or is_vbcable(audio_device)):
+                fallback = self.devices.default_input
                 print(f"Provided device '{audio_device.description()}' appears to be a virtual cable/output device. Using system default input '{fallback.description()}' for capture instead.")
                 device = fallback
             else:
                 device = audio_device
         else:
-            device = QMediaDevices.defaultAudioInput()
+            device = self.devices.default_input
 
         if not device:
             print("No microphone device found during registration.")
@@ -73,8 +130,8 @@ class MicMixer:
     def _setup_output_devices(self, output_devices):
         if output_devices is not None:
             return output_devices
-        vb_cable = get_vbcable_output_device()
-        default_output = QMediaDevices.defaultAudioOutput()
+        vb_cable = self.devices.vb_cable
+        default_output = self.devices.default_output
 
         # If route_to_vbcable_only is True, prefer returning only the virtual
         # cable device so playback goes to the cable and doesn't affect the
@@ -84,6 +141,7 @@ class MicMixer:
 
         devices = [vb_cable] if vb_cable else []
         if default_output and (not vb_cable or default_output != vb_cable):
+            self._default_output_slot = len(devices)
             devices.append(default_output)
         return devices
 
@@ -94,40 +152,124 @@ class MicMixer:
 
     def setup_audio_format(self):
         """Set up audio format based on what devices actually support"""
-        # Start with the input device's preferred format
-        # Use the microphone's preferred format for capture but force the
-        # output format to a compatible common format for playback so we don't
-        # try to reconfigure the input device when opening sinks.
-        mic_pref = self.audio_device.preferredFormat()
-        self.format = mic_pref
-        # Force output to Int16 for compatibility with VB-Cable/Discord.
-        # Keep sample rate and channels at app defaults to avoid resampling
-        # the capture device; sinks will accept the format we provide.
-        self.format.setSampleFormat(QAudioFormat.SampleFormat.Int16)
-        self.format.setChannelCount(DEFAULT_CHANNELS)
-        self.format.setSampleRate(DEFAULT_SAMPLE_RATE)
-
-        print(f"Forced output format: {self.format.sampleRate()}Hz, {self.format.channelCount()} channels, {self.format.sampleFormat()}")
+        # The rate and channel count follow the devices when they agree on
+        # one, otherwise the app defaults. Every device takes that as Int16,
+        # which VB-Cable/Discord always accept; sinks get Float instead when
+        # all of them support it, so the mix is never quantized to 16 bits.
+        self.format = self._negotiate_format() if self.native_format else None
+        if self.format is None:
+            self.format = self._int16_format(DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)
+        if AUDIO_FLOAT_OUTPUT:
+            float_format = QAudioFormat(self.format)
+            float_format.setSampleFormat(QAudioFormat.SampleFormat.Float)
+            if self.output_devices and all(dev.isFormatSupported(float_format) for dev in self.output_devices):
+                self.format = float_format
+        self.input_format = self._capture_format(self.audio_device)
+
+        print(f"Mix format: {self.format.sampleRate()}Hz, {self.format.channelCount()} channels, {self.format.sampleFormat()}")
+        print(f"Capture format: {self.input_format.channelCount()} channels, {self.input_format.sampleFormat()}")
+        self.setup_engine()
+
+    def _capture_format(self, device):
+        """The mic's own sample format and channel count at the mix rate when it supports that, else Int16 like the mix"""
+        preferred = device.preferredFormat()
+        if preferred.sampleFormat() in QT_SAMPLE_FORMATS and preferred.channelCount() > 0:
+            fmt = QAudioFormat()
+            fmt.setSampleFormat(preferred.sampleFormat())
+            fmt.setSampleRate(self.format.sampleRate())
+            fmt.setChannelCount(preferred.channelCount())
+            if device.isFormatSupported(fmt):
+                return fmt
+        return self._int16_format(self.format.sampleRate(), self.format.channelCount())
+
+    def _negotiate_format(self):
+        """Return the first device-preferred Int16 format every device supports, or None"""
+        candidates = [dev.preferredFormat() for dev in self.output_devices[:1]]
+        candidates.append(self.audio_device.preferredFormat())
+        devices = [self.audio_device] + list(self.output_devices)
+        for preferred in candidates:
+            # Clips are at most stereo; wider devices get the default layout
+            channels = preferred.channelCount()
+            if channels not in (1, 2):
+                channels = DEFAULT_CHANNELS
+            fmt = self._int16_format(preferred.sampleRate(), channels)
+            if all(dev.isFormatSupported(fmt) for dev in devices):
+                return fmt
+        return None
+
+    @staticmethod
+    def _int16_format(sample_rate, channels):
+        fmt = QAudioFormat()
+        fmt.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+        fmt.setSampleRate(sample_rate)
+        fmt.setChannelCount(channels)
+        return fmt
+
+    def setup_engine(self):
+        """Build the mix engine (voice pool and per-block scratch) for the current format"""
+        sample_rate = self.format.sampleRate()
+        self.frames_per_tick = int(sample_rate * AUDIO_PROCESS_INTERVAL_SEC)  # 11ms of audio
+        max_frames = self.frames_per_tick
+        if self.scheduling == 'pull':
+            max_frames = max(max_frames, sample_rate * PULL_MAX_BLOCK_MS // 1000)
+        # Clips play on voices from a fixed pool so triggers layer instead of cutting each other off
+        # Sample conversion and channel mapping for capture and sinks are chosen here, once
+        self.engine = MixEngine(sample_rate, self.format.channelCount(), max_frames,
+                                input_format=QT_SAMPLE_FORMATS.get(self.input_format.sampleFormat()),
+                                input_channels=self.input_format.channelCount(),
+                                output_format=QT_SAMPLE_FORMATS[self.format.sampleFormat()],
+                                max_voices=self.max_voices, steal_policy=self.steal_policy,
+                                music_gain=self.music_gain, mic_chain=self._mic_chain())
+        self.engine.warm_up()
+
+    def _mic_chain(self):
+        if self.mic_noise_gate:
+            return [NoiseGate(), Gain(self.mic_gain)]
+        return [Gain(self.mic_gain)]
+
+    @property
+    def startup_failed(self):
+        """True when an audio thread started with wait_for_streams=False could not open the devices"""
+        return self.audio_thread is not None and self.audio_thread.startup_error is not None
+
+    def trigger(self, clicked_at=None):
+        """Start timing a trigger from clicked_at (time.perf_counter(), default now) and return its handle.
+
+        Pass the handle to load_sound/stream_sound/play_mapped; the audio
+        thread records the time from clicked_at to the block that mixes the
+        sound's first samples (see TriggerStats).
+        """
+        handle = self._new_handle()
+        self._send(('trigger', handle, time.perf_counter() if clicked_at is None else clicked_at))
+        return handle
+
+    @property
+    def voices(self):
+        return self.engine.voices
 
     def init_audio_streams(self):
         try:
             # Create audio source and sink with the format
-            self.audio_input = QAudioSource(self.audio_device, self.format)
+            self.audio_input = QAudioSource(self.audio_device, self.input_format)
             self.input_stream = self.audio_input.start()
             self.audio_output_objs = []
             self.output_streams = []
             # If requested, ensure VB-Cable is included in outputs before starting
             if self.route_to_vbcable_only:
-                vb = get_vbcable_output_device()
+                vb = self.devices.vb_cable
                 if vb and vb not in self.output_devices:
                     self.output_devices.insert(0, vb)
+                    if self._default_output_slot is not None:
+                        self._default_output_slot += 1
             for dev in self.output_devices:
                 ao = QAudioSink(dev, self.format)
-                ao.setBufferSize(AUDIO_OUTPUT_BUFFER_SIZE)
+                ao.setBufferSize(self._output_buffer_bytes())
                 stream = ao.start()
                 self.audio_output_objs.append(ao)
                 self.output_streams.append(stream)
                 print(f"Started output stream for device: {dev.description()}")
+            self.sink_queues = [self._new_sink_queue(index) for index in range(len(self.output_devices))]
+            self.stats.set_sinks([dev.description() for dev in self.output_devices])
 
             if self.input_stream is None:
                 print("Input stream does not contain microphone data.")
@@ -136,139 +278,368 @@ class MicMixer:
                 print("Input stream contains microphone data.")
 
             print(f"Audio streams initialized successfully")
-            print(f"Input format: {self.format.sampleRate()}Hz, {self.format.channelCount()} channels, {self.format.sampleFormat()}")
+            print(f"Input format: {self.input_format.sampleRate()}Hz, {self.input_format.channelCount()} channels, {self.input_format.sampleFormat()}")
 
             self.is_active = True
 
-            # Set up timer for audio processing (11ms for lower latency)
             self.timer = QTimer()
+            self.timer.setTimerType(Qt.TimerType.PreciseTimer)
             self.timer.timeout.connect(self.mix_audio)
-            self.timer.start(AUDIO_PROCESS_INTERVAL_MS)  # Process every 11ms
+            if self.scheduling == 'pull':
+                self._setup_pull_scheduler()
+                # Poll often; each poll renders only what the sink is missing
+                self.timer.start(PULL_POLL_INTERVAL_MS)
+            else:
+                # Set up timer for audio processing (11ms for lower latency)
+                self.timer.start(AUDIO_PROCESS_INTERVAL_MS)  # Process every 11ms
 
         except Exception as e:
             print(f"Error initializing audio streams: {e}")
             self.cleanup()
             raise
 
-    def pcm_to_float32(self, pcm_array):
-        """Convert PCM numpy array to float32 in range [-1.0, 1.0]."""
-        if pcm_array.dtype == np.int16:
-            return pcm_array.astype(np.float32) / INT16_SCALE
-        else:
-            return pcm_array.astype(np.float32)
-
-    def prepare_sound_buffer(self, sound_data):
-        """Decode and prepare sound data as a float32 numpy array for mixing."""
+    def _output_buffer_bytes(self):
+        # AUDIO_OUTPUT_BUFFER_SIZE is in int16 bytes; wider samples get the same duration
+        return AUDIO_OUTPUT_BUFFER_SIZE // 2 * self.format.bytesPerSample()
+
+    def _new_sink_queue(self, index):
+        policy = self.sink_overflow
+        if not isinstance(policy, str):
+            policy = policy[index] if index < len(policy) else SINK_OVERFLOW_POLICY
+        capacity = self.format.sampleRate() * SINK_QUEUE_MS // 1000 * self.engine.output_frame_bytes
+        return SinkQueue(capacity, self.engine.output_frame_bytes, policy)
+
+    def set_input_device(self, device):
+        """Capture from device instead (None: the system default), without touching the outputs or voices"""
+        self._input_follows_default = device is None
+        device = self._select_audio_device(device)
+        if device != self.audio_device:
+            self._send(('input', device))
+
+    def set_output_device(self, index, device):
+        """Play output index on device instead; the other outputs and the playing voices carry on"""
+        if index == self._default_output_slot:
+            self._default_output_slot = None  # chosen by hand now, so it stops following the default
+        self._send(('output', index, device))
+
+    def _devices_changed(self):
+        """Follow the system defaults, and move off devices that were unplugged"""
+        devices = self.devices
+        if self._input_follows_default or self.audio_device not in devices.inputs:
+            default = devices.default_input
+            if default and default != self.audio_device and not is_vbcable(default):
+                print(f"Microphone changed to {default.description()}")
+                self._send(('input', default))
+
+        for index, device in enumerate(self.output_devices):
+            if index == self._default_output_slot:
+                replacement = devices.default_output
+                if replacement == devices.vb_cable or replacement in self.output_devices:
+                    continue  # already playing there
+            elif device not in devices.outputs:
+                replacement = devices.vb_cable  # the cable came back under a new id
+            else:
+                continue
+            if replacement and replacement != device:
+                print(f"Output {index} changed to {replacement.description()}")
+                self._send(('output', index, replacement))
+
+    def _swap_input(self, device):
+        """Reopen capture on device between two blocks (audio thread)"""
+        fmt = self._capture_format(device)
+        if not device.isFormatSupported(fmt):
+            print(f"Keeping {self.audio_device.description()}: {device.description()} doesn't support the mix format")
+            return
+        source = QAudioSource(device, fmt)
+        stream = source.start()
+        if stream is None:
+            print(f"Could not open microphone {device.description()}")
+            source.stop()
+            return
+        old_source = self.audio_input
+        self.audio_input, self.input_stream, self.audio_device, self.input_format = source, stream, device, fmt
+        self.engine.set_input_format(QT_SAMPLE_FORMATS.get(fmt.sampleFormat()), fmt.channelCount())
+        old_source.stop()
+        print(f"Switched microphone to {device.description()}")
+
+    def _swap_output(self, index, device):
+        """Reopen output index on device between two blocks (audio thread)"""
+        if index >= len(self.output_streams):
+            print(f"No output {index} to switch to {device.description()}")
+            return
+        if not device.isFormatSupported(self.format):
+            print(f"Keeping {self.output_devices[index].description()}: {device.description()} doesn't support the mix format")
+            return
+        sink = QAudioSink(device, self.format)
+        sink.setBufferSize(self._output_buffer_bytes())
+        stream = sink.start()
+        if stream is None:
+            print(f"Could not open output {device.description()}")
+            sink.stop()
+            return
+        old_sink = self.audio_output_objs[index]
+        self.audio_output_objs[index] = sink
+        self.output_streams[index] = stream
+        self.sink_queues[index].clear()  # audio queued for the old device would only add latency
+        # Replaced whole, so the GUI thread never sees a half-updated list
+        self.output_devices = self.output_devices[:index] + [device] + self.output_devices[index + 1:]
+        old_sink.stop()
+        self.stats.replace_sink(index, device.description())
+        print(f"Switched output {index} to {device.description()}")
+
+    def _setup_pull_scheduler(self):
+        # The first sink (VB-Cable when present) is the clock the mix follows
         sample_rate = self.format.sampleRate()
-        channels = self.format.channelCount()
-        bytes_per_sample = self.format.bytesPerSample()
+        buffer_frames = self.audio_output_objs[0].bufferSize() // self.engine.output_frame_bytes
+        target_fill = min(sample_rate * PULL_TARGET_FILL_MS // 1000, buffer_frames * 3 // 4)
+        self.scheduler = PullScheduler(
+            sample_rate,
+            target_fill_frames=target_fill,
+            max_block_frames=self.engine.max_block_frames,
+            max_input_backlog_frames=sample_rate * PULL_MAX_INPUT_BACKLOG_MS // 1000,
+        )
+        print(f"Pull scheduling: target sink fill {target_fill} frames of {buffer_frames}")
+
+    def _plan_pull_block(self):
+        """Ask the scheduler how many frames to render now, skipping excess mic backlog"""
+        master = self.audio_output_objs[0]
+        engine = self.engine
+        # Audio still waiting in the master's queue is as good as in the sink
+        queued = (master.bufferSize() - master.bytesFree() + self.sink_queues[0].queued) // engine.output_frame_bytes
+        available = self.audio_input.bytesAvailable() // engine.input_frame_bytes
+        frames, skip = self.scheduler.plan(queued, available)
+        if skip:
+            self.input_stream.skip(skip * engine.input_frame_bytes)
+        return frames
+
+    def scheduler_stats(self):
+        """Return buffer fill / drift correction stats for the active scheduling mode"""
+        stats = {'mode': self.scheduling}
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats())
+        return stats
 
+    def prepare_sound_buffer(self, sound_data):
+        """Prepare sound data (a PCM array or a file path) as a compact int16 clip for mixing."""
         # Only decode if not already a numpy array
         if isinstance(sound_data, np.ndarray):
             pcm_array = sound_data
         else:
-            pcm_array = decode_to_pcm(sound_data, sample_rate, channels, bytes_per_sample)
-
-        if pcm_array is None or len(pcm_array) == 0:
-            return np.array([], dtype=np.float32)
-
-        # Convert to float32 for mixing
-        sound_float = self.pcm_to_float32(pcm_array)
-
-        # Duplicate mono channel to stereo if needed
-        sound_float = duplicate_mono_to_stereo(sound_float, channels)
-
-        # Ensure buffer is always (frames, channels)
-        sound_float = ensure_channel_count(sound_float, channels)
-
-        return sound_float
+            # Already at the mix rate and compact, so prepare_clip won't copy it
+            pcm_array = decode_clip(sound_data, self.format.sampleRate(), self.format.channelCount())
+        return self.engine.prepare_clip(pcm_array)
 
-    def load_sound(self, sound_data):
-        """Load sound data for mixing - convert to match current audio format"""
+    def load_sound(self, sound_data, gain=1.0, start_sec=0.0, handle=None):
+        """Queue sound data to play on a free voice (from start_sec on) and return its handle (None on failure)"""
         try:
             sound_float = self.prepare_sound_buffer(sound_data)
             if sound_float is None or len(sound_float) == 0:
                 print("Failed to decode or convert sound file")
-                self.sound_buffer = np.array([], dtype=np.float32)
-                return
-
-            self.sound_buffer = sound_float
-            self.sound_position = 0
-            print(f"Loaded sound buffer with {self.sound_buffer.shape} (frames, channels)")
+                return None
+
+            if handle is None:
+                handle = self._new_handle()
+            offset = int(start_sec * self.format.sampleRate())
+            if not self._send(('play', handle, sound_float, gain, offset)):
+                return None
+            print(f"Queued sound buffer with {sound_float.shape} (frames, channels) as handle {handle}")
+            return handle
         except Exception as e:
             print(f"Error loading sound: {e}")
-            self.sound_buffer = np.array([], dtype=np.float32)
+            return None
 
-    def ensure_mic_array_shape(self, mic_array, expected_samples, frames_per_tick, channels):
-        """Ensure mic_array is the correct size and shape for mixing."""
-        if mic_array.size != expected_samples:
-            mic_array = np.zeros(expected_samples, dtype=np.float32)
-        return mic_array.reshape(frames_per_tick, channels)
+    def stream_sound(self, file_path, gain=1.0, start_sec=0.0, handle=None):
+        """Play a (long) file while ffmpeg decodes it, in bounded memory; returns its handle (None on failure)"""
+        try:
+            stream = StreamingClip.from_file(file_path, self.format.sampleRate(), self.format.channelCount(),
+                                             start_sec=start_sec)
+        except Exception as e:
+            print(f"Error starting stream for {file_path}: {e}")
+            return None
+
+        if handle is None:
+            handle = self._new_handle()
+        if not self._send(('stream', handle, stream, gain)):
+            stream.close()
+            return None
+        print(f"Streaming {file_path} as handle {handle}")
+        return handle
+
+    def play_mapped(self, clip, gain=1.0, start_sec=0.0, handle=None):
+        """Play a memory-mapped decode (e.g. from the disk cache) page by page; returns its handle (None on failure)"""
+        sample_rate = self.format.sampleRate()
+        try:
+            mapped = MappedClip(clip, self.format.channelCount(), sample_rate, offset=int(start_sec * sample_rate))
+        except ValueError as e:
+            print(f"Error mapping clip: {e}")
+            return None
+
+        if handle is None:
+            handle = self._new_handle()
+        if not self._send(('stream', handle, mapped, gain)):
+            return None
+        print(f"Playing mapped clip of shape {clip.shape} as handle {handle}")
+        return handle
+
+    def _new_handle(self):
+        handle = self._next_handle
+        self._next_handle += 1
+        return handle
+
+    def stop_sounds(self, handle=None):
+        """Stop one playing sound by handle, or all of them when handle is None"""
+        self._send(('stop', handle))
+
+    def set_voice_gain(self, handle, gain):
+        self._send(('gain', handle, gain))
+
+    def set_bus_gain(self, bus, gain):
+        """Set the 'mic', 'clips' or 'master' bus volume while running (it ramps there over one block)"""
+        if bus not in self.engine.buses:
+            raise ValueError(f"Unknown bus: {bus}")
+        if bus == 'mic':
+            self.mic_gain = gain
+        elif bus == 'clips':
+            self.music_gain = gain
+        self._send(('bus_gain', bus, gain))
+
+    def _send(self, command):
+        """Hand a command to the audio thread (or apply it directly when unthreaded)"""
+        if self.audio_thread is None:
+            self._apply_command(command)
+            return True
+        if not self.commands.push(command):
+            print(f"Audio command queue full, dropping {command[0]}")
+            return False
+        return True
+
+    def _drain_commands(self):
+        command = self.commands.pop()
+        while command is not None:
+            self._apply_command(command)
+            command = self.commands.pop()
+
+    def _apply_command(self, command):
+        if command[0] == 'input':
+            self._swap_input(command[1])
+        elif command[0] == 'output':
+            self._swap_output(command[1], command[2])
+        elif command[0] == 'trigger':
+            self.triggers.trigger(command[1], command[2])
+        else:
+            self.engine.apply_command(command)
+
+    def audio_stats(self):
+        """Return the most recent stats report from the audio thread (see MixStats.snapshot)"""
+        self.collect_stats()
+        return self.latest_stats
+
+    def _report_stats(self):
+        report = self.stats.snapshot()
+        if self.scheduler is not None:
+            report['scheduler'] = self.scheduler.stats()
+        report['dsp'] = self.engine.dsp_cost(reset=True)
+        report['triggers'] = self.triggers.to_dict()
+        # The report is handed over whole; a full queue drops it rather than block the audio thread
+        self.stats_queue.push(report)
+
+    def _open_stats_log(self, path):
+        """Append stats reports to path as JSON lines, written from the GUI thread"""
+        self.stats_log = open(path, 'a')
+        print(f"Logging audio stats to {path}")
+
+    def collect_stats(self):
+        """Take every queued stats report on the GUI thread: keep the latest and append each to the log"""
+        report = self.stats_queue.pop()
+        while report is not None:
+            self.latest_stats = report
+            if self.stats_log is not None:
+                self.stats_log.write(json.dumps(report) + "\n")
+            report = self.stats_queue.pop()
+        if self.stats_log is not None:
+            self.stats_log.flush()
+
+    def _close_stats_log(self):
+        self.collect_stats()
+        if self.stats_log is None:
+            return
+        self.stats_log.close()
+        self.stats_log = None
 
     def mix_audio(self):
         if not self.is_active or self.input_stream is None or not self.output_streams:
             return
 
+        started = time.perf_counter()
+        self.stats.tick_started(started)
         try:
-            frames_per_tick = int(self.format.sampleRate() * AUDIO_PROCESS_INTERVAL_SEC)  # 11ms of audio
-            channels = self.format.channelCount()
-            bytes_per_sample = self.format.bytesPerSample()
-            bytes_per_frame = channels * bytes_per_sample
-            total_bytes = frames_per_tick * bytes_per_frame
-
-            mic_data = self.input_stream.read(total_bytes)
-            input_format = self.audio_device.preferredFormat().sampleFormat()
-            expected_samples = frames_per_tick * channels
-
-            if mic_data and len(mic_data) == total_bytes:
-                if input_format == QAudioFormat.SampleFormat.Int16:
-                    mic_array = np.frombuffer(mic_data, dtype=np.int16).astype(np.float32) / INT16_SCALE
-                elif input_format == QAudioFormat.SampleFormat.Float:
-                    mic_array = np.frombuffer(mic_data, dtype=np.float32)
-                else:
-                    mic_array = np.zeros(expected_samples, dtype=np.float32)
-            else:
-                mic_array = np.zeros(expected_samples, dtype=np.float32)
-
-            mic_array = self.ensure_mic_array_shape(mic_array, expected_samples, frames_per_tick, channels)
-
-            # Prepare sound_chunk (music) for mixing
-            if self.sound_buffer is not None and len(self.sound_buffer) > 0 and self.sound_position < len(self.sound_buffer):
-                sound_chunk = self.sound_buffer[self.sound_position:self.sound_position + frames_per_tick]
-                sound_chunk = self.pad_sound_chunk(sound_chunk, frames_per_tick, channels)
-                self.sound_position += frames_per_tick
-                if self.sound_position >= len(self.sound_buffer):
-                    self.sound_buffer = np.array([], dtype=np.float32)
-                    print("Sound finished playing")
-            else:
-                sound_chunk = np.zeros((frames_per_tick, channels), dtype=np.float32)
-
-            mic_gain = MIC_GAIN   # Full volume for mic
-            music_gain = MUSIC_GAIN # Lower volume for music
-
-            mixed_array = (mic_array * mic_gain) + (sound_chunk * music_gain)
-            mixed_array = np.clip(mixed_array, -1.0, 1.0)
+            self._drain_commands()
 
-            mixed_int16 = (mixed_array * INT16_MAX).astype(np.int16)
-            mixed_data = mixed_int16.flatten(order='C').tobytes()
-
-            for stream in self.output_streams:
-                bytes_written = stream.write(mixed_data)
+            if self.scheduler is not None:
+                frames = self._plan_pull_block()
+                if frames == 0:
+                    return
+            else:
+                frames = self.frames_per_tick
+
+            requested = frames * self.engine.input_frame_bytes
+            mic_data = self.input_stream.read(requested)
+            self.stats.input_read(requested, len(mic_data))
+            mixed_data = self.engine.process(mic_data, frames)
+            if self.engine.sounded:
+                self._record_triggers(self.engine.sounded)
+
+            output_frame_bytes = self.engine.output_frame_bytes
+            for index, stream in enumerate(self.output_streams):
+                sink = self.audio_output_objs[index]
+                queue = self.sink_queues[index]
+                self.stats.sink_fill(index, (sink.bufferSize() - sink.bytesFree()) // output_frame_bytes)
+                # Each sink drains its own queue, so one that is slow or stalled only falls behind itself
+                dropped = queue.push(mixed_data)
+                pending = queue.queued
+                bytes_written = queue.drain(stream)
+                self.stats.sink_write(index, pending, bytes_written)
+                self.stats.sink_queue(index, queue.queued // output_frame_bytes, dropped)
                 if bytes_written < 0:
                     print("Error writing to output stream")
         except Exception as e:
             print(f"Error in mix_audio: {e}")
+        finally:
+            self.stats.tick_finished(started)
+            if self.stats.ticks >= AUDIO_STATS_REPORT_TICKS:
+                self._report_stats()
+
+    def _record_triggers(self, handles):
+        latency = self.triggers.sounded(handles, time.perf_counter())
+        if latency is not None and self.first_sound_latency is None:
+            self.first_sound_latency = latency
+            print(f"First sound: {latency * 1000:.1f} ms from click to first mixed sample")
 
     def stop_capture(self):
         """Stop audio capture and mixing"""
         self.is_active = False
-        
-        if hasattr(self, 'timer'):
-            self.timer.stop()
-        
-        self.cleanup()
+        try:
+            self.devices.changed.disconnect(self._devices_changed)
+        except TypeError:
+            pass  # already disconnected
+
+        if not self._stop_audio_thread():
+            if hasattr(self, 'timer'):
+                self.timer.stop()
+            self.cleanup()
+
+        self._close_stats_log()
         print("Audio capture stopped")
 
+    def _stop_audio_thread(self):
+        """Quit the audio thread (which closes its own streams); False if there is none"""
+        thread = getattr(self, 'audio_thread', None)
+        if thread is None or not thread.isRunning():
+            return False
+        thread.quit()
+        thread.wait()
+        return True
+
     def cleanup(self):
         """Clean up audio resources"""
         try:
@@ -287,11 +658,5 @@ class MicMixer:
 
     def __del__(self):
         """Destructor to ensure cleanup"""
-        self.cleanup()
-
-    def pad_sound_chunk(self, sound_chunk, target_frames, channels):
-        """Pad sound_chunk with zeros to reach target_frames length."""
-        if sound_chunk.shape[0] < target_frames:
-            pad_shape = (target_frames - sound_chunk.shape[0], channels)
-            sound_chunk = np.vstack([sound_chunk, np.zeros(pad_shape, dtype=np.float32)])
-        return sound_chunk
\ No newline at end of file
+        if not self._stop_audio_thread():
+            self.cleanup()
@@ -0,0 +1,210 @@
+import numpy as np
+
+from audio.dsp_chain import DspChain, Gain, SoftLimiter
+from audio.sample_formats import InputConverter, OutputConverter, compact_clip
+from audio.voice_pool import VoicePool
+from . import MIC_GAIN, MUSIC_GAIN, MAX_POLYPHONY, VOICE_STEAL_POLICY
+
+
+class MixEngine:
+    """Qt-free mixing core: mic input blocks and playing clips in, output sample blocks out.
+
+    Build one per stream format; a steady-state process() allocates no numpy memory.
+    """
+
+    def __init__(self, sample_rate, channels, max_block_frames, input_format='int16', input_channels=None,
+                 output_format='int16', output_channels=None, max_voices=MAX_POLYPHONY,
+                 steal_policy=VOICE_STEAL_POLICY, mic_gain=MIC_GAIN, music_gain=MUSIC_GAIN,
+                 mic_chain=None, clip_chain=None, master_chain=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_block_frames = max_block_frames
+        self.set_input_format(input_format, input_channels)
+        self._output = OutputConverter(output_format, channels, output_channels or channels, max_block_frames)
+        self.output_frame_bytes = self._output.frame_bytes
+        if mic_chain is None:
+            mic_chain = [Gain(mic_gain)]
+        if clip_chain is None:
+            clip_chain = [Gain(music_gain)]
+        if master_chain is None:
+            master_chain = [Gain(1.0), SoftLimiter()]
+        self.buses = {
+            'mic': DspChain(mic_chain, sample_rate, channels, max_block_frames),
+            'clips': DspChain(clip_chain, sample_rate, channels, max_block_frames),
+            'master': DspChain(master_chain, sample_rate, channels, max_block_frames),
+        }
+        # A limiter already keeps the mix within [-1, 1]
+        self._clip_output = not any(isinstance(node, SoftLimiter) for node in self.buses['master'].nodes)
+
+        self.voices = VoicePool(channels, max_voices=max_voices, steal_policy=steal_policy)
+        self.streams = []  # [handle, StreamingClip, gain]
+        self.sounded = []  # handles whose first samples the last process() mixed
+        self._starting = []  # handles played since the last process()
+        self._waiting_streams = set()  # handles of streams that have not produced a block yet
+
+        self._mic = np.zeros((max_block_frames, channels), dtype=np.float32)
+        self._sound = np.zeros((max_block_frames, channels), dtype=np.float32)
+        self._mix = np.zeros((max_block_frames, channels), dtype=np.float32)
+        self._stream_block = np.zeros((max_block_frames, channels), dtype=np.float32)
+
+    def set_input_format(self, sample_format, channels=None):
+        """Convert capture blocks from sample_format (None: unsupported, mixed as silence) and channels from now on."""
+        if sample_format is None:
+            self._input = None
+            self.input_frame_bytes = (channels or self.channels) * 2
+        else:
+            self._input = InputConverter(sample_format, channels or self.channels, self.channels, self.max_block_frames)
+            self.input_frame_bytes = self._input.frame_bytes
+
+    # Clips ##################################################################
+
+    def prepare_clip(self, pcm_array):
+        """Convert decoded PCM (int16 or float, mono or multi-channel) to a compact int16 clip (see compact_clip).
+
+        Clips stay int16 and mono ones stay mono; the voice pool converts to
+        float32 and spreads mono across the channels one block at a time.
+        Clips that are compact already (e.g. from the clip cache) pass
+        through without a copy.
+        """
+        return compact_clip(pcm_array, self.channels)
+
+    def play(self, clip, gain=1.0, handle=-1, offset=0):
+        """Start a prepared clip on a voice (offset frames in) and return the voice id."""
+        voice = self.voices.play(clip, gain, handle=handle, offset=offset)
+        if voice is not None and handle >= 0:
+            self._starting.append(handle)
+        return voice
+
+    def play_stream(self, stream, gain=1.0, handle=-1):
+        """Start mixing a StreamingClip; it plays from its first decoded block."""
+        self.streams.append([handle, stream, gain])
+        if handle >= 0:
+            self._waiting_streams.add(handle)
+
+    def stop(self, handle=None):
+        """Stop the voice or stream playing handle, or everything when handle is None."""
+        if handle is None:
+            self.voices.stop()
+            self._stop_streams(self.streams)
+            return
+        voice = self.voices.voice_for(handle)
+        if voice is not None:
+            self.voices.stop(voice)
+        self._stop_streams([entry for entry in self.streams if entry[0] == handle])
+
+    def set_gain(self, handle, gain):
+        voice = self.voices.voice_for(handle)
+        if voice is not None:
+            self.voices.set_gain(voice, gain)
+        for entry in self.streams:
+            if entry[0] == handle:
+                entry[2] = gain
+
+    def set_bus_gain(self, bus, gain):
+        """Set the 'mic', 'clips' or 'master' bus volume; it ramps there over the next block."""
+        self.buses[bus].set_gain(gain)
+
+    def dsp_cost(self, reset=False):
+        """Per-node time per block for every bus (see DspNode.cost)."""
+        return {bus: chain.cost(reset) for bus, chain in self.buses.items()}
+
+    def _stop_streams(self, entries):
+        for entry in entries:
+            entry[1].close()
+            self._waiting_streams.discard(entry[0])
+        self.streams = [entry for entry in self.streams if entry not in entries]
+
+    def apply_command(self, command):
+        """Apply a ('play', handle, clip, gain, offset) / ('stream', handle, clip, gain) / ('stop', handle) /
+        ('gain', handle, gain) / ('bus_gain', bus, gain) command.
+
+        A malformed command (unknown bus, wrong arity, ...) is reported and
+        skipped; it must not cost the audio thread the block it is mixing.
+        """
+        op = command[0]
+        try:
+            if op == 'play':
+                _, handle, clip, gain, offset = command
+                self.play(clip, gain, handle, offset)
+            elif op == 'stream':
+                _, handle, stream, gain = command
+                self.play_stream(stream, gain, handle)
+            elif op == 'stop':
+                self.stop(command[1])
+            elif op == 'gain':
+                _, handle, gain = command
+                self.set_gain(handle, gain)
+            elif op == 'bus_gain':
+                _, bus, gain = command
+                self.set_bus_gain(bus, gain)
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"Skipping bad audio command {op!r}: {e}")
+
+    def warm_up(self):
+        """Run a silent trigger through the engine so the first real one doesn't pay for first use.
+
+        The first mix of a voice otherwise sizes and faults in its scratch
+        on the audio thread. Call before the streams start.
+        """
+        silence = np.zeros((self.max_block_frames, self.channels), dtype=np.float32)
+        self.play(self.prepare_clip(silence), gain=0.0)
+        self.process(None, self.max_block_frames)
+        self.stop()
+
+    # Processing #############################################################
+
+    def read_mic(self, mic_data, frames):
+        """Convert raw mic samples (bytes or array) into the first frames of the float32 mic block.
+
+        Returns how many frames came from the mic; anything the read fell
+        short of (or an unsupported capture format) is filled with silence.
+        """
+        mic = self._mic[:frames]
+        if self._input is None or mic_data is None or len(mic_data) == 0:
+            mic.fill(0.0)
+            return 0
+
+        got = self._input.convert(mic_data, mic)
+        if got < frames:
+            mic[got:].fill(0.0)
+        return got
+
+    def process(self, mic_data, frames=None):
+        """Mix one block of mic input with the playing voices and return the output samples as a memoryview."""
+        if frames is None:
+            frames = self.max_block_frames
+        mic = self._mic[:frames]
+        sound = self._sound[:frames]
+        mixed = self._mix[:frames]
+
+        if self.sounded:
+            self.sounded.clear()
+        self.read_mic(mic_data, frames)
+        self.voices.mix(sound)
+        if self._starting:
+            self.sounded.extend(self._starting)
+            self._starting.clear()
+        if self.streams:
+            self._mix_streams(sound)
+
+        self.buses['mic'].process(mic)
+        self.buses['clips'].process(sound)
+        np.add(mic, sound, out=mixed)
+        self.buses['master'].process(mixed)
+        if self._clip_output:
+            np.clip(mixed, -1.0, 1.0, out=mixed)
+        return self._output.convert(mixed)
+
+    def _mix_streams(self, sound):
+        block = self._stream_block[:sound.shape[0]]
+        finished = False
+        for handle, stream, gain in self.streams:
+            if stream.read_into(block):
+                np.multiply(block, gain, out=block)
+                np.add(sound, block, out=sound)
+                if handle in self._waiting_streams:
+                    self._waiting_streams.discard(handle)
+                    self.sounded.append(handle)
+            finished = finished or stream.finished
+        if finished:
+            self.streams = [entry for entry in self.streams if not entry[1].finished]
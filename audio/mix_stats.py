@@ -0,0 +1,255 @@
+import time
+from bisect import bisect_left
+
+from . import LATENCY_HISTOGRAM_EDGES_MS, TRIGGER_LATENCY_EDGES_MS, TRIGGER_PERCENTILES, TRIGGER_TIMEOUT_SEC
+
+
+class Histogram:
+    """Fixed-bucket histogram; add() is one bisect and one increment.
+
+    counts[i] holds values up to edges[i]; the last bucket holds everything
+    above the last edge.
+    """
+
+    def __init__(self, edges=LATENCY_HISTOGRAM_EDGES_MS):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.total = 0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(self.edges, value)] += 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile (capped at the largest value seen)."""
+        if self.total == 0:
+            return 0.0
+        rank = p / 100.0 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.edges[i], self.max) if i < len(self.edges) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'edges': list(self.edges),
+            'counts': list(self.counts),
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class SinkStats:
+    """Write, fill-level and queue counters for one output sink."""
+
+    def __init__(self, name):
+        self.name = name
+        self.writes = 0
+        self.partial_writes = 0
+        self.write_errors = 0
+        self.bytes_carried = 0
+        self.overflows = 0
+        self.bytes_dropped = 0
+        self.fill = Histogram()
+        self.fill_last_ms = 0.0
+        self.fill_min_ms = None
+        self.queue = Histogram()
+        self.queue_last_ms = 0.0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'writes': self.writes,
+            'partial_writes': self.partial_writes,
+            'write_errors': self.write_errors,
+            'bytes_carried': self.bytes_carried,
+            'overflows': self.overflows,
+            'bytes_dropped': self.bytes_dropped,
+            'fill_last_ms': self.fill_last_ms,
+            'fill_min_ms': self.fill_min_ms or 0.0,
+            'fill_ms': self.fill.to_dict(),
+            'queue_last_ms': self.queue_last_ms,
+            'queue_ms': self.queue.to_dict(),
+        }
+
+
+class TriggerStats:
+    """Click-to-first-sample latency of every trigger, as a histogram with percentiles.
+
+    trigger() registers a handle with the time.perf_counter() of the click
+    that queued it; sounded() is called after each block with the handles
+    whose first samples it mixed (see MixEngine.sounded). A trigger that
+    has not sounded after TRIGGER_TIMEOUT_SEC (stopped first, failed to
+    decode) is dropped and counted as lost. Cumulative, like MixStats'
+    histograms.
+    """
+
+    def __init__(self, edges=TRIGGER_LATENCY_EDGES_MS):
+        self.latency = Histogram(edges)
+        self.triggers = 0
+        self.lost = 0
+        self.last_ms = 0.0
+        self._pending = {}  # handle -> click time
+
+    def trigger(self, handle, clicked_at):
+        self.triggers += 1
+        stale = [h for h, t in self._pending.items() if clicked_at - t > TRIGGER_TIMEOUT_SEC]
+        for h in stale:
+            del self._pending[h]
+        self.lost += len(stale)
+        self._pending[handle] = clicked_at
+
+    def sounded(self, handles, now):
+        """Record the handles that just produced their first samples; returns the first latency (seconds) or None."""
+        first = None
+        for handle in handles:
+            clicked_at = self._pending.pop(handle, None)
+            if clicked_at is None:
+                continue  # not a timed trigger
+            latency = now - clicked_at
+            self.last_ms = latency * 1000.0
+            self.latency.add(self.last_ms)
+            if first is None:
+                first = latency
+        return first
+
+    def to_dict(self):
+        return {
+            'triggers': self.triggers,
+            'sounded': self.latency.total,
+            'pending': len(self._pending),
+            'lost': self.lost,
+            'last_ms': self.last_ms,
+            'percentiles_ms': {f"p{p}": self.latency.percentile(p) for p in TRIGGER_PERCENTILES},
+            'latency_ms': self.latency.to_dict(),
+        }
+
+
+class MixStats:
+    """Always-on counters for the audio thread: tick timing, mic reads and sink writes.
+
+    Everything is a plain counter or a fixed histogram, cheap enough to
+    update on every tick. Interval and compute means/maxima cover the
+    window since the last snapshot(); counters and histograms are
+    cumulative, so underruns that happened between reports still show up.
+    """
+
+    def __init__(self, nominal_interval_ms, sample_rate):
+        self.nominal_interval_ms = nominal_interval_ms
+        self.sample_rate = sample_rate
+        self.total_ticks = 0
+        self.total_late_ticks = 0
+        self.interval_hist = Histogram()
+        self.compute_hist = Histogram()
+        self.reads = 0
+        self.short_reads = 0
+        self.empty_reads = 0
+        self.input_bytes_missing = 0
+        self.sinks = []
+        self._last_tick = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self.ticks = 0
+        self.interval_sum = 0.0
+        self.interval_max = 0.0
+        self.compute_sum = 0.0
+        self.compute_max = 0.0
+        self.late_ticks = 0
+
+    def set_sinks(self, names):
+        """Start per-sink counters for the streams just opened."""
+        self.sinks = [SinkStats(name) for name in names]
+
+    def replace_sink(self, index, name):
+        """Restart one sink's counters after its stream was reopened on another device."""
+        self.sinks[index] = SinkStats(name)
+
+    def tick_started(self, now):
+        if self._last_tick is not None:
+            interval = (now - self._last_tick) * 1000.0
+            self.interval_sum += interval
+            self.interval_max = max(self.interval_max, interval)
+            self.interval_hist.add(interval)
+            # A tick arriving more than 1.5 intervals late is where glitches start
+            if interval > self.nominal_interval_ms * 1.5:
+                self.late_ticks += 1
+                self.total_late_ticks += 1
+        self._last_tick = now
+
+    def tick_finished(self, started):
+        compute = (time.perf_counter() - started) * 1000.0
+        self.compute_sum += compute
+        self.compute_max = max(self.compute_max, compute)
+        self.compute_hist.add(compute)
+        self.ticks += 1
+        self.total_ticks += 1
+
+    def input_read(self, requested_bytes, got_bytes):
+        """Count a mic read; whatever it fell short by is mixed as silence."""
+        self.reads += 1
+        if got_bytes < requested_bytes:
+            self.short_reads += 1
+            self.input_bytes_missing += requested_bytes - got_bytes
+            if got_bytes == 0:
+                self.empty_reads += 1
+
+    def sink_fill(self, index, queued_frames):
+        sink = self.sinks[index]
+        fill_ms = queued_frames * 1000.0 / self.sample_rate
+        sink.fill.add(fill_ms)
+        sink.fill_last_ms = fill_ms
+        if sink.fill_min_ms is None or fill_ms < sink.fill_min_ms:
+            sink.fill_min_ms = fill_ms
+
+    def sink_write(self, index, requested_bytes, written_bytes):
+        """Count a sink write; bytes the sink did not accept stay in its queue for the next tick."""
+        sink = self.sinks[index]
+        sink.writes += 1
+        if written_bytes < 0:
+            sink.write_errors += 1
+        elif written_bytes < requested_bytes:
+            sink.partial_writes += 1
+            sink.bytes_carried += requested_bytes - written_bytes
+
+    def sink_queue(self, index, queued_frames, dropped_bytes):
+        """Record what is left in a sink's queue after a write, and what its overflow policy dropped."""
+        sink = self.sinks[index]
+        queue_ms = queued_frames * 1000.0 / self.sample_rate
+        sink.queue.add(queue_ms)
+        sink.queue_last_ms = queue_ms
+        if dropped_bytes:
+            sink.overflows += 1
+            sink.bytes_dropped += dropped_bytes
+
+    def snapshot(self):
+        """Return the stats (window and cumulative) and start a new window."""
+        ticks = max(self.ticks, 1)
+        stats = {
+            'timestamp': time.time(),
+            'total_ticks': self.total_ticks,
+            'ticks': self.ticks,
+            'interval_mean_ms': self.interval_sum / ticks,
+            'interval_max_ms': self.interval_max,
+            'compute_mean_ms': self.compute_sum / ticks,
+            'compute_max_ms': self.compute_max,
+            'late_ticks': self.late_ticks,
+            'total_late_ticks': self.total_late_ticks,
+            'interval_ms': self.interval_hist.to_dict(),
+            'compute_ms': self.compute_hist.to_dict(),
+            'input': {
+                'reads': self.reads,
+                'short_reads': self.short_reads,
+                'empty_reads': self.empty_reads,
+                'bytes_missing': self.input_bytes_missing,
+            },
+            'sinks': [sink.to_dict() for sink in self.sinks],
+        }
+        self._reset_window()
+        return stats
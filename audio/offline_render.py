@@ -0,0 +1,140 @@
+"""Render a mic recording plus timed clip triggers to a WAV file, without audio hardware.
+
+Drives MixEngine in a plain loop, so it runs as fast as the CPU allows.
+Triggers land on their exact sample: a block is cut short wherever a
+trigger falls inside it.
+
+Run with: python -m audio.offline_render mic.wav out.wav --trigger 1.5:clip.wav[:gain] ...
+"""
+import argparse
+import time
+import wave
+
+import numpy as np
+
+from audio.mix_engine import MixEngine
+from audio.resample import resample
+from audio.stream_decoder import decode_clip
+from . import DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, AUDIO_PROCESS_INTERVAL_SEC, MAX_POLYPHONY, INT16_SCALE
+
+
+def read_wav(path):
+    """Read a 16-bit PCM WAV file; returns (int16 array of shape (frames, channels), sample_rate)."""
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        data = wav.readframes(wav.getnframes())
+    return np.frombuffer(data, dtype=np.int16).reshape(-1, channels), sample_rate
+
+
+def write_wav(path, samples, sample_rate):
+    """Write an int16 (frames, channels) array as a PCM WAV file."""
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples).tobytes())
+
+
+def load_clip(engine, clip):
+    """Turn a trigger's clip (path or PCM array) into an engine-ready (compact int16) clip."""
+    if isinstance(clip, np.ndarray):
+        return engine.prepare_clip(clip)
+    if clip.lower().endswith('.wav'):
+        pcm, sample_rate = read_wav(clip)
+        if sample_rate != engine.sample_rate:
+            pcm = resample(pcm / np.float32(INT16_SCALE), sample_rate, engine.sample_rate)
+        return engine.prepare_clip(pcm)
+    return decode_clip(clip, engine.sample_rate, engine.channels)
+
+
+def match_channels(mic, channels):
+    """Duplicate a mono mic recording to every channel, or drop extra channels."""
+    if mic.shape[1] == channels:
+        return mic
+    if mic.shape[1] == 1:
+        return np.repeat(mic, channels, axis=1)
+    return mic[:, :channels]
+
+
+def render_offline(mic, triggers, sample_rate=DEFAULT_SAMPLE_RATE, channels=DEFAULT_CHANNELS,
+                   block_frames=None, max_voices=MAX_POLYPHONY):
+    """Mix an int16 mic recording with triggered clips and return the int16 (frames, channels) result.
+
+    triggers: iterable of (time_sec, clip, gain) where clip is a file path or
+    a PCM array. Rendering continues past the end of the mic until every
+    triggered clip has finished.
+    """
+    if block_frames is None:
+        block_frames = int(sample_rate * AUDIO_PROCESS_INTERVAL_SEC)
+    engine = MixEngine(sample_rate, channels, block_frames, max_voices=max_voices)
+    mic = match_channels(mic, channels)
+
+    # Decode everything up front so rendering measures mixing, not decoding
+    pending = [(int(round(t * sample_rate)), load_clip(engine, clip), gain) for t, clip, gain in triggers]
+    pending.sort(key=lambda trigger: trigger[0], reverse=True)  # pop() from the end in time order
+
+    blocks = []
+    frame = 0
+    mic_frames = len(mic)
+    while frame < mic_frames or pending or engine.voices.active.any() or engine.streams:
+        while pending and pending[-1][0] <= frame:
+            _, clip, gain = pending.pop()
+            engine.play(clip, gain)
+
+        frames = block_frames
+        if pending:
+            frames = min(frames, pending[-1][0] - frame)
+        if frame < mic_frames:
+            frames = min(frames, mic_frames - frame)
+
+        mixed = engine.process(mic[frame:frame + frames], frames)
+        blocks.append(np.frombuffer(mixed, dtype=np.int16).copy())
+        frame += frames
+
+    if not blocks:
+        return np.zeros((0, channels), dtype=np.int16)
+    return np.concatenate(blocks).reshape(-1, channels)
+
+
+def parse_trigger(spec):
+    """Parse 'time:path[:gain]' into (time_sec, path, gain)."""
+    time_part, _, rest = spec.partition(':')
+    path, gain = rest, 1.0
+    head, sep, tail = rest.rpartition(':')
+    if sep:
+        try:
+            gain = float(tail)
+            path = head
+        except ValueError:
+            pass  # the colon belongs to the path (e.g. a Windows drive letter)
+    return float(time_part), path, gain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a mic WAV plus clip triggers to a WAV file offline.")
+    parser.add_argument('mic', help="16-bit PCM WAV recording of the microphone")
+    parser.add_argument('output', help="WAV file to write")
+    parser.add_argument('--trigger', action='append', default=[], metavar='TIME:CLIP[:GAIN]',
+                        help="play CLIP at TIME seconds (repeatable)")
+    parser.add_argument('--block-ms', type=float, default=AUDIO_PROCESS_INTERVAL_SEC * 1000)
+    parser.add_argument('--max-voices', type=int, default=MAX_POLYPHONY)
+    args = parser.parse_args()
+
+    mic, sample_rate = read_wav(args.mic)
+    triggers = [parse_trigger(spec) for spec in args.trigger]
+
+    started = time.perf_counter()
+    out = render_offline(mic, triggers, sample_rate=sample_rate,
+                         block_frames=max(1, int(sample_rate * args.block_ms / 1000)), max_voices=args.max_voices)
+    elapsed = time.perf_counter() - started
+    write_wav(args.output, out, sample_rate)
+
+    duration = len(out) / sample_rate
+    print(f"Rendered {duration:.2f}s of audio in {elapsed:.3f}s ({duration / max(elapsed, 1e-9):.0f}x realtime) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
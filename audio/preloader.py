@@ -0,0 +1,214 @@
+import os
+
+from audio.disk_cache import entry_name, save_clip, source_stamp, write_entry
+from audio.stream_decoder import decode_clip
+from . import PRELOAD_MAX_BYTES
+
+
+def default_workers():
+    """Leave a core each for the GUI and the audio thread."""
+    return max(1, (os.cpu_count() or 2) - 2)
+
+
+def decode_into_cache(file_path, sample_rate, channels, cache_dir, max_bytes):
+    """Worker job: hash file_path, then decode it into its disk cache entry unless that exists already.
+
+    Returns (source stamp, entry path or None, clip); the clip is None when
+    the entry was there already, and the entry None when it was not stored.
+    """
+    stamp = source_stamp(file_path)
+    entry_path = os.path.join(cache_dir, entry_name(stamp[2], sample_rate, channels))
+    if os.path.exists(entry_path):
+        return stamp, entry_path, None
+    clip = decode_clip(file_path, sample_rate, channels)
+    if len(clip) == 0 or not write_entry(entry_path, lambda path: save_clip(path, clip), max_bytes):
+        entry_path = None
+    return stamp, entry_path, clip
+
+
+class ClipPreloader:
+    """Decodes a folder's clips into the clip caches on a pool of worker processes.
+
+    Workers hash each file, decode it (ffmpeg plus the numpy wrap) and
+    write its DiskClipCache entry in their own processes (see
+    decode_into_cache), so neither the GUI nor the audio thread competes
+    with them for the GIL or waits on that I/O. Only a couple of jobs per
+    worker are in flight at a time; the rest wait in priority order, which
+    is what makes cancel() cheap and lets the memory budget stop the run
+    early. Clips arrive already in the mixer's format; poll() only records
+    the workers' hashes and entries with the disk cache, writing its index
+    once per poll, and puts the clips in the in-memory ClipCache.
+
+    request() puts a single clip ahead of the queue and outside the
+    budget, for a clip that was just triggered before it was decoded.
+
+    Qt-free: the owner calls poll() from its event loop (MainWindow does
+    so on a timer) to collect finished decodes and submit more.
+    progress(done, total, loaded_bytes) is called from poll().
+    """
+
+    IN_FLIGHT_PER_WORKER = 2
+
+    def __init__(self, clip_cache, disk_cache, workers=None, max_bytes=PRELOAD_MAX_BYTES, progress=None):
+        self.clip_cache = clip_cache
+        self.disk_cache = disk_cache
+        self.workers = workers or default_workers()
+        # Preloading past the LRU cache's size would only evict what was just loaded
+        self.max_bytes = min(max_bytes, clip_cache.max_bytes)
+        self.progress = progress
+        self._executor = None
+        self._queue = []
+        self._requests = []  # decoded before the queue, whatever the budget
+        self._requested = set()  # requests in flight, left out of the progress counts
+        self._in_flight = {}  # future -> file path
+        self._format = None
+        self.total = 0
+        self.done = 0
+        self.loaded_bytes = 0
+
+    @property
+    def active(self):
+        return bool(self._queue or self._requests or self._in_flight)
+
+    def start(self, file_paths, sample_rate, channels):
+        """Cancel any current run and preload file_paths (already in priority order)."""
+        self.cancel()
+        self._format = (sample_rate, channels)
+        self._queue = list(reversed(file_paths))  # pop() from the end in priority order
+        self.total = len(file_paths)
+        self.done = 0
+        self.loaded_bytes = 0
+        self._fill()
+        self._report()
+
+    def request(self, file_path, sample_rate, channels):
+        """Decode one clip into the caches ahead of any queued preloads."""
+        if self._format != (sample_rate, channels):
+            # Anything queued was for the previous mix format
+            self.cancel()
+            self._format = (sample_rate, channels)
+        if file_path not in self._requests and file_path not in self._in_flight.values():
+            self._requests.append(file_path)
+            self._fill()
+
+    def cancel(self):
+        """Drop queued clips and ignore decodes still running (e.g. the user switched folders)."""
+        self._queue = []
+        self._requests = []
+        self._requested = set()
+        for future in self._in_flight:
+            future.cancel()
+        self._in_flight = {}
+
+    def shutdown(self):
+        self.cancel()
+        self.disk_cache.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def poll(self):
+        """Store finished decodes, submit more, and report progress; returns True while still running."""
+        finished = [future for future in self._in_flight if future.done()]
+        for future in finished:
+            file_path = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Preload failed for {file_path}: {e}")
+                result = None
+            self._store(file_path, result)
+            if file_path in self._requested:
+                self._requested.discard(file_path)
+            else:
+                self.done += 1
+
+        if finished:
+            self._fill()
+            self.disk_cache.flush()
+            self._report()
+        return self.active
+
+    def _fill(self):
+        limit = self.workers * self.IN_FLIGHT_PER_WORKER
+        while self._requests and len(self._in_flight) < limit:
+            file_path = self._requests.pop(0)
+            if not self._already_loaded(file_path) and self._submit(file_path):
+                self._requested.add(file_path)
+        while self._queue and len(self._in_flight) < limit:
+            if self.loaded_bytes >= self.max_bytes:
+                print(f"Preload stopped at its {self.max_bytes // (1024 * 1024)}MB budget")
+                self.done += len(self._queue)
+                self._queue = []
+                return
+            file_path = self._queue.pop()
+            if self._already_loaded(file_path):
+                self.done += 1
+                continue
+            if not self._submit(file_path):
+                return
+
+    def _submit(self, file_path):
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            future = self._pool().submit(decode_into_cache, file_path, *self._format,
+                                         self.disk_cache.cache_dir, self.disk_cache.max_bytes)
+        except BrokenProcessPool as e:
+            # A worker died; give up on this run, the next start() gets a fresh pool
+            print(f"Preload pool failed: {e}")
+            self._executor = None
+            self.cancel()
+            return False
+        self._in_flight[future] = file_path
+        return True
+
+    def _already_loaded(self, file_path):
+        """True when the clip is in memory already, or could be put there from the disk cache."""
+        sample_rate, channels = self._format
+        try:
+            key = self.clip_cache.make_key(file_path, sample_rate, channels)
+        except OSError:
+            return True  # gone since the folder was listed; nothing to preload
+        if key in self.clip_cache:
+            return True
+        clip = self.disk_cache.load(file_path, sample_rate, channels)
+        if clip is None:
+            return False
+        self.clip_cache.put(key, clip)
+        self.loaded_bytes += clip.nbytes
+        return True
+
+    def _store(self, file_path, result):
+        if result is None:
+            return
+        stamp, entry_path, clip = result
+        sample_rate, channels = self._format
+        self.disk_cache.record(file_path, *stamp)
+        if entry_path is not None:
+            self.disk_cache.add_entry(entry_path)
+        if clip is None:
+            clip = self.disk_cache.load(file_path, sample_rate, channels)
+        if clip is None or len(clip) == 0:
+            return
+        try:
+            key = self.clip_cache.make_key(file_path, sample_rate, channels)
+        except OSError:
+            return
+        self.clip_cache.put(key, clip)
+        self.loaded_bytes += clip.nbytes
+
+    def _pool(self):
+        if self._executor is None:
+            # Imported with the first preload rather than at startup
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn, not fork: the GUI process has Qt and audio threads running
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _report(self):
+        if self.progress is not None and self.total:
+            self.progress(self.done, self.total, self.loaded_bytes)
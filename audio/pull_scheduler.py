@@ -0,0 +1,90 @@
+import time
+
+
+class PullScheduler:
+    """Decides how many frames to render from the sink's fill level.
+
+    Instead of rendering a fixed block per timer tick (which turns timer
+    jitter and device clock drift into underruns or a growing sink
+    backlog), each poll renders exactly what is needed to bring the sink
+    back up to target_fill_frames. The mic side is kept bounded too: when
+    more than max_input_backlog_frames of capture pile up beyond what this
+    block consumes, the excess is skipped down to half that limit, and
+    frames the mic could not supply are counted as padded. Together those
+    two counters are the drift correction applied between the capture and
+    playback clocks.
+
+    Qt-free: callers pass in the levels they read from their streams.
+    """
+
+    def __init__(self, sample_rate, target_fill_frames, max_block_frames, max_input_backlog_frames):
+        self.sample_rate = sample_rate
+        self.target_fill_frames = target_fill_frames
+        self.max_block_frames = max_block_frames
+        self.max_input_backlog_frames = max_input_backlog_frames
+        self.reset()
+
+    def reset(self):
+        self.polls = 0
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self.frames_padded = 0
+        self.sink_fill_frames = 0
+        self.sink_fill_min = None
+        self.sink_fill_max = 0
+        self.input_backlog_frames = 0
+        self._start_time = None
+
+    def plan(self, sink_queued_frames, input_available_frames, now=None):
+        """Return (frames_to_render, input_frames_to_skip) for this poll."""
+        if now is None:
+            now = time.perf_counter()
+        if self._start_time is None:
+            self._start_time = now
+
+        self.polls += 1
+        self.sink_fill_frames = sink_queued_frames
+        self.sink_fill_max = max(self.sink_fill_max, sink_queued_frames)
+        if self.sink_fill_min is None or sink_queued_frames < self.sink_fill_min:
+            self.sink_fill_min = sink_queued_frames
+
+        frames = max(0, min(self.target_fill_frames - sink_queued_frames, self.max_block_frames))
+
+        skip = 0
+        backlog = input_available_frames - frames
+        if backlog > self.max_input_backlog_frames:
+            skip = backlog - self.max_input_backlog_frames // 2
+            self.frames_skipped += skip
+        elif backlog < 0:
+            self.frames_padded += -backlog
+        self.input_backlog_frames = max(0, backlog - skip)
+
+        self.frames_rendered += frames
+        return frames, skip
+
+    def drift_ppm(self, now=None):
+        """Frames rendered vs. what the wall clock says should have played, in parts per million."""
+        if self._start_time is None:
+            return 0.0
+        if now is None:
+            now = time.perf_counter()
+        expected = (now - self._start_time) * self.sample_rate
+        if expected < self.sample_rate:  # need at least a second of history
+            return 0.0
+        # The first target fill is a one-off prefill, not drift
+        played = self.frames_rendered - self.target_fill_frames
+        return (played - expected) / expected * 1e6
+
+    def stats(self):
+        return {
+            'polls': self.polls,
+            'frames_rendered': self.frames_rendered,
+            'sink_fill_frames': self.sink_fill_frames,
+            'sink_fill_min': self.sink_fill_min or 0,
+            'sink_fill_max': self.sink_fill_max,
+            'target_fill_frames': self.target_fill_frames,
+            'input_backlog_frames': self.input_backlog_frames,
+            'input_frames_skipped': self.frames_skipped,
+            'input_frames_padded': self.frames_padded,
+            'drift_ppm': self.drift_ppm(),
+        }
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from . import RESAMPLE_ZERO_CROSSINGS, RESAMPLE_KAISER_BETA, RESAMPLE_ROLLOFF
+
+
+@lru_cache(maxsize=16)
+def polyphase_filter(up, down, zero_crossings=RESAMPLE_ZERO_CROSSINGS, beta=RESAMPLE_KAISER_BETA,
+                     rolloff=RESAMPLE_ROLLOFF):
+    """Kaiser-windowed sinc low-pass for an up/down ratio, split into its `up` phases.
+
+    Returns (phases, center): phases[p, k] is tap p + k*up of the filter
+    at the upsampled rate, and center is the tap the filter is aligned on.
+    """
+    factor = max(up, down)
+    length = 2 * zero_crossings * factor + 1
+    center = length // 2
+    n = np.arange(length) - center
+    # Just below the lower of the two Nyquist rates (relative to the upsampled one), so the
+    # transition band ends before anything can alias
+    cutoff = rolloff / factor
+    taps = cutoff * np.sinc(cutoff * n) * np.kaiser(length, beta) * up
+
+    per_phase = -(-length // up)
+    padded = np.zeros(per_phase * up)
+    padded[:length] = taps
+    return padded.reshape(per_phase, up).T.astype(np.float32), center
+
+
+def resample(samples, src_rate, dst_rate):
+    """Resample float (frames,) or (frames, channels) audio from src_rate to dst_rate.
+
+    Polyphase: output frame m sits at m * down / up input frames and is the
+    dot product of the input frames just before that point with the filter
+    phase for its fractional part. Outputs m, m + up, m + 2*up, ... share a
+    phase and start `down` input frames apart, so each of those `up` groups
+    is one matrix-vector product over a strided window view of the input,
+    with no per-sample Python and no gathered copy of the windows. Returns
+    float32 in the input's shape with ceil(frames * dst_rate / src_rate) frames.
+    """
+    if src_rate == dst_rate:
+        return samples.astype(np.float32, copy=False)
+
+    divisor = gcd(int(src_rate), int(dst_rate))
+    up, down = int(dst_rate) // divisor, int(src_rate) // divisor
+    phases, center = polyphase_filter(up, down)
+    taps = phases.shape[1]
+    # Windows run oldest to newest frame, the filter phases newest to oldest
+    reversed_phases = np.ascontiguousarray(phases[:, ::-1])
+
+    mono = samples.ndim == 1
+    frames_in = samples.reshape(len(samples), -1)
+    channels = frames_in.shape[1]
+    # taps frames of silence on both sides so every window stays in range
+    padded = np.zeros((len(frames_in) + 2 * taps, channels), dtype=np.float32)
+    padded[taps:taps + len(frames_in)] = frames_in
+    windows = sliding_window_view(padded, taps, axis=0)  # (frames, channels, taps), no copy
+
+    frames_out = -(-len(frames_in) * up // down)
+    out = np.empty((frames_out, channels), dtype=np.float32)
+    for first in range(min(up, frames_out)):
+        newest, phase = divmod(first * down + center, up)
+        count = len(range(first, frames_out, up))
+        # Window row newest + 1 ends at padded frame newest + taps, i.e. input frame newest
+        rows = windows[newest + 1:newest + 2 + (count - 1) * down:down]
+        out[first::up] = rows @ reversed_phases[phase]
+
+    return out[:, 0] if mono else out
@@ -0,0 +1,217 @@
+import numpy as np
+
+from . import INT16_MAX, INT16_SCALE
+
+SAMPLE_FORMATS = ('uint8', 'int16', 'int32', 'float32')
+SAMPLE_DTYPES = {
+    'uint8': np.dtype(np.uint8),
+    'int16': np.dtype(np.int16),
+    'int32': np.dtype(np.int32),
+    'float32': np.dtype(np.float32),
+}
+
+_UINT8_OFFSET = np.float32(128.0)
+_UINT8_TO_FLOAT = np.float32(1.0 / 128.0)
+_UINT8_MAX = np.float32(127.0)
+_INT16_TO_FLOAT = np.float32(1.0 / INT16_SCALE)
+_INT16_MAX = np.float32(INT16_MAX)
+_INT32_TO_FLOAT = np.float32(1.0 / 2.0 ** 31)
+_INT32_MAX = np.float32(2147483520.0)  # largest float32 below 2**31; float32 has 24 bits of precision anyway
+
+
+# Sample kernels ############################################################
+# Each runs in place on preallocated arrays: decoders turn raw samples into
+# float32 in [-1, 1), encoders turn a clipped float32 block (which they use as
+# scratch) into raw samples. Casts go first and scaling follows in place,
+# since a mixed-dtype ufunc would allocate a cast buffer.
+
+def _decode_uint8(samples, out):
+    np.copyto(out, samples, casting='unsafe')
+    np.subtract(out, _UINT8_OFFSET, out=out)
+    np.multiply(out, _UINT8_TO_FLOAT, out=out)
+
+
+def _decode_int16(samples, out):
+    np.copyto(out, samples, casting='unsafe')
+    np.multiply(out, _INT16_TO_FLOAT, out=out)
+
+
+def _decode_int32(samples, out):
+    np.copyto(out, samples, casting='unsafe')
+    np.multiply(out, _INT32_TO_FLOAT, out=out)
+
+
+def _decode_float32(samples, out):
+    np.copyto(out, samples)
+
+
+def _encode_uint8(block, out):
+    np.multiply(block, _UINT8_MAX, out=block)
+    np.add(block, _UINT8_OFFSET, out=block)
+    np.copyto(out, block, casting='unsafe')
+
+
+def _encode_int16(block, out):
+    np.multiply(block, _INT16_MAX, out=block)
+    np.copyto(out, block, casting='unsafe')
+
+
+def _encode_int32(block, out):
+    np.multiply(block, _INT32_MAX, out=block)
+    np.copyto(out, block, casting='unsafe')
+
+
+def _encode_float32(block, out):
+    # No quantization: the mix goes to the sink exactly as it was computed
+    np.copyto(out, block)
+
+
+DECODERS = {
+    'uint8': _decode_uint8,
+    'int16': _decode_int16,
+    'int32': _decode_int32,
+    'float32': _decode_float32,
+}
+ENCODERS = {
+    'uint8': _encode_uint8,
+    'int16': _encode_int16,
+    'int32': _encode_int32,
+    'float32': _encode_float32,
+}
+
+
+# Channel maps ##############################################################
+
+def _copy_channels(src, out):
+    np.copyto(out, src)
+
+
+def _spread_mono(src, out):
+    np.copyto(out, src[:, :1])
+
+
+def _average_to_mono(src, out):
+    # One add per channel; a strided np.sum over axis 1 is several times slower
+    column = out[:, 0]
+    np.copyto(column, src[:, 0])
+    for channel in range(1, src.shape[1]):
+        np.add(column, src[:, channel], out=column)
+    np.multiply(column, np.float32(1.0 / src.shape[1]), out=column)
+
+
+def _first_channels(src, out):
+    # Wider to narrower (beyond mono) keeps the leading channels, narrower to wider leaves the rest silent
+    shared = min(src.shape[1], out.shape[1])
+    np.copyto(out[:, :shared], src[:, :shared])
+    out[:, shared:].fill(0.0)
+
+
+def channel_map(from_channels, to_channels):
+    """The in-place kernel that maps float32 (frames, from_channels) onto (frames, to_channels)."""
+    if from_channels == to_channels:
+        return _copy_channels
+    if from_channels == 1:
+        return _spread_mono
+    if to_channels == 1:
+        return _average_to_mono
+    return _first_channels
+
+
+class InputConverter:
+    """Raw capture samples in one format and channel count to float32 frames for the mix.
+
+    The sample kernel and channel map are picked once, when the capture
+    stream is opened; convert() then only runs them, in place, on scratch
+    sized for max_frames, so it allocates nothing per block.
+    """
+
+    def __init__(self, sample_format, channels, mix_channels, max_frames):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        self.sample_format = sample_format
+        self.channels = channels
+        self.dtype = SAMPLE_DTYPES[sample_format]
+        self.frame_bytes = channels * self.dtype.itemsize
+        self._decode = DECODERS[sample_format]
+        self._map = None if channels == mix_channels else channel_map(channels, mix_channels)
+        self._wide = np.zeros((max_frames, channels), dtype=np.float32) if self._map else None
+
+    def convert(self, samples, out):
+        """Decode the whole frames in samples (bytes or array) into the first rows of out; returns how many."""
+        if isinstance(samples, np.ndarray):
+            flat = samples.reshape(-1)
+        else:
+            flat = np.frombuffer(samples, dtype=self.dtype, count=len(samples) // self.dtype.itemsize)
+        frames = min(flat.size // self.channels, out.shape[0])
+        if self._map is None:
+            self._decode(flat[:frames * self.channels], out[:frames].reshape(-1))
+        else:
+            wide = self._wide[:frames]
+            self._decode(flat[:frames * self.channels], wide.reshape(-1))
+            self._map(wide, out[:frames])
+        return frames
+
+
+class OutputConverter:
+    """Clipped float32 mix frames to raw sink samples in one format and channel count.
+
+    Like InputConverter, the kernels are chosen once. The samples land in
+    the reusable bytearray `buffer`, and convert() returns a memoryview
+    of the part it wrote.
+    """
+
+    def __init__(self, sample_format, mix_channels, channels, max_frames):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        self.sample_format = sample_format
+        self.channels = channels
+        dtype = SAMPLE_DTYPES[sample_format]
+        self.frame_bytes = channels * dtype.itemsize
+        self._encode = ENCODERS[sample_format]
+        self._map = None if channels == mix_channels else channel_map(mix_channels, channels)
+        self._wide = np.zeros((max_frames, channels), dtype=np.float32) if self._map else None
+
+        self.buffer = bytearray(max_frames * self.frame_bytes)
+        self._view = memoryview(self.buffer)
+        self._samples = np.frombuffer(self.buffer, dtype=dtype).reshape(max_frames, channels)
+
+    def convert(self, block):
+        """Encode block (float32 (frames, mix channels) in [-1, 1], overwritten) and return the sink bytes."""
+        frames = block.shape[0]
+        if self._map is not None:
+            self._map(block, self._wide[:frames])
+            block = self._wide[:frames]
+        self._encode(block, self._samples[:frames])
+        return self._view[:frames * self.frame_bytes]
+
+
+# Clip storage ##############################################################
+
+def compact_clip(pcm, channels):
+    """Store decoded PCM (int16 or float in [-1, 1], mono or multi-channel) as compactly as voices can play it.
+
+    Returns a C-contiguous int16 (frames, 1) array when the clip is mono or
+    every channel is identical (a mono file decoded to stereo), otherwise
+    int16 (frames, channels): extra channels are dropped, missing ones
+    left silent. Float input is quantized like the int16 sink encoder.
+    Half the bytes of float32 at the same width, and a quarter for mono.
+    """
+    if pcm is None or len(pcm) == 0:
+        return np.zeros((0, 1), dtype=np.int16)
+    if pcm.ndim == 1:
+        pcm = pcm.reshape(-1, 1)
+    if pcm.dtype != np.int16:
+        scratch = np.clip(pcm, -1.0, 1.0).astype(np.float32, copy=False)
+        samples = np.empty(scratch.shape, dtype=np.int16)
+        _encode_int16(scratch, samples)
+        pcm = samples
+
+    if pcm.shape[1] > 1 and all(np.array_equal(pcm[:, 0], pcm[:, c]) for c in range(1, pcm.shape[1])):
+        pcm = pcm[:, :1]
+    elif pcm.shape[1] > channels:
+        pcm = pcm[:, :channels]
+    elif 1 < pcm.shape[1] < channels:
+        wide = np.zeros((len(pcm), channels), dtype=np.int16)
+        wide[:, :pcm.shape[1]] = pcm
+        pcm = wide
+    return np.ascontiguousarray(pcm)
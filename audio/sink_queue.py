@@ -0,0 +1,87 @@
+import numpy as np
+
+from . import SINK_OVERFLOW_POLICY
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class SinkQueue:
+    """A bounded ring of output bytes between the mixer and one sink.
+
+    Every mixed block is pushed to each sink's own queue, and drain()
+    writes as much of the queue as that sink accepts right now. Bytes a
+    sink didn't take stay queued for the next tick instead of being lost,
+    and a sink that falls behind only fills its own queue, so it never
+    costs the other sinks a sample.
+
+    When a block doesn't fit, the policy decides what goes:
+    'drop_oldest' discards the oldest queued audio, so the sink catches up
+    with the live mix; 'drop_newest' discards the end of the new block, so
+    what is queued plays without a gap. Either way whole frames are
+    dropped, so a sink that took part of a frame stays frame-aligned.
+    """
+
+    def __init__(self, capacity_bytes, frame_bytes, policy=SINK_OVERFLOW_POLICY):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown sink overflow policy: {policy}")
+        self.frame_bytes = frame_bytes
+        self.capacity = max(capacity_bytes // frame_bytes, 1) * frame_bytes
+        self.policy = policy
+        self._ring = np.zeros(self.capacity, dtype=np.uint8)
+        self._view = memoryview(self._ring)
+        # Running byte counts; their difference is what is queued
+        self._read = 0
+        self._written = 0
+
+    @property
+    def queued(self):
+        return self._written - self._read
+
+    def clear(self):
+        self._read = self._written
+
+    def push(self, data):
+        """Queue one block (whole frames); returns how many bytes the overflow policy dropped."""
+        data = np.frombuffer(data, dtype=np.uint8)
+        dropped = 0
+        if len(data) > self.capacity:
+            # Only the newest ring-full of the block can ever be played
+            dropped = len(data) - self.capacity
+            data = data[dropped:] if self.policy == 'drop_oldest' else data[:self.capacity]
+
+        excess = len(data) - (self.capacity - self.queued)
+        if excess > 0 and self.policy == 'drop_oldest':
+            queued = self.queued
+            skip = min(-(-excess // self.frame_bytes) * self.frame_bytes, queued - queued % self.frame_bytes)
+            self._read += skip
+            dropped += skip
+            excess -= skip
+        if excess > 0:
+            # drop_newest, or a partly written frame left too little room to drop
+            cut = -(-excess // self.frame_bytes) * self.frame_bytes
+            data = data[:len(data) - cut] if self.policy == 'drop_newest' else data[cut:]
+            dropped += cut
+
+        count = len(data)
+        pos = self._written % self.capacity
+        first = min(count, self.capacity - pos)
+        self._ring[pos:pos + first] = data[:first]
+        self._ring[:count - first] = data[first:]
+        self._written += count
+        return dropped
+
+    def drain(self, stream):
+        """Write queued bytes to stream until it stops taking them; returns the bytes written, or -1 on an error."""
+        written = 0
+        while self._written > self._read:
+            pos = self._read % self.capacity
+            chunk = min(self._written - self._read, self.capacity - pos)
+            count = stream.write(self._view[pos:pos + chunk])
+            if count < 0:
+                # Nothing is lost: the bytes stay queued until the sink recovers or overflow drops them
+                return written if written else -1
+            self._read += count
+            written += count
+            if count < chunk:
+                break
+        return written
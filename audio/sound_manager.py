@@ -4,7 +4,6 @@
 # from audio.mic_mixer import MicMixer
 
 from audio.mic_mixer import MicMixer
-from pydub import AudioSegment
 
 
 class SoundManager:
@@ -20,11 +19,5 @@ class SoundManager:
 			return
 
 		print(f"Playing sound through mixer: {file_path}")
-		try:
-			audio = AudioSegment.from_file(file_path)
-			sound_data = audio.raw_data
-		except Exception as e:
-			print(f"Failed to load sound file: {e}")
-			return
-
-		self.mic_mixer.load_sound(sound_data)
\ No newline at end of file
+		# The mixer decodes the file straight to its own format in one pass
+		self.mic_mixer.load_sound(file_path)
\ No newline at end of file
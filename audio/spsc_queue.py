@@ -0,0 +1,38 @@
+class SpscQueue:
+    """Bounded single-producer/single-consumer ring buffer.
+
+    Used to pass commands from the GUI to the audio thread and stats back.
+    There is no lock: only the producer ever writes `_tail` and only the
+    consumer ever writes `_head`, and each of those stores is a single
+    atomic attribute assignment under the GIL. A full queue rejects the
+    push instead of blocking, so the audio thread can never stall on it.
+    """
+
+    def __init__(self, capacity):
+        self._size = capacity + 1  # one slot stays empty to tell full from empty
+        self._items = [None] * self._size
+        self._head = 0  # next slot to read, owned by the consumer
+        self._tail = 0  # next slot to write, owned by the producer
+
+    def push(self, item):
+        """Append item; returns False (dropping it) when the queue is full."""
+        tail = self._tail
+        next_tail = (tail + 1) % self._size
+        if next_tail == self._head:
+            return False
+        self._items[tail] = item
+        self._tail = next_tail
+        return True
+
+    def pop(self):
+        """Remove and return the oldest item, or None when the queue is empty."""
+        head = self._head
+        if head == self._tail:
+            return None
+        item = self._items[head]
+        self._items[head] = None
+        self._head = (head + 1) % self._size
+        return item
+
+    def __len__(self):
+        return (self._tail - self._head) % self._size
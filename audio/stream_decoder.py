@@ -0,0 +1,331 @@
+import mmap
+import os
+import subprocess
+import threading
+import time
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from audio.sample_formats import compact_clip
+from . import (FFMPEG_BINARY, STREAM_BLOCK_FRAMES, STREAM_RING_SECONDS, DECODE_READ_BYTES, INT16_SCALE,
+               MAPPED_RELEASE_SECONDS, RESAMPLE_ZERO_CROSSINGS, RESAMPLE_KAISER_BETA, RESAMPLE_ROLLOFF)
+
+# Sample format -> (ffmpeg output format, codec, numpy dtype)
+PCM_FORMATS = {
+    'float32': ('f32le', 'pcm_f32le', np.dtype(np.float32)),
+    'int16': ('s16le', 'pcm_s16le', np.dtype(np.int16)),
+}
+# ffmpeg's resampler set up like audio.resample's filter (filter_size counts zero crossings on both sides);
+# its defaults alias and fall short of that resampler's accuracy when converting down
+FFMPEG_RESAMPLER = (f"aresample=filter_size={2 * RESAMPLE_ZERO_CROSSINGS}:cutoff={RESAMPLE_ROLLOFF}"
+                    f":kaiser_beta={RESAMPLE_KAISER_BETA}")
+
+
+def open_ffmpeg_pcm(file_path, sample_rate, channels, start_sec=0.0, sample_format='float32'):
+    """Start ffmpeg decoding file_path (from start_sec on) to interleaved PCM ('float32' or 'int16') on its stdout."""
+    output_format, codec, _ = PCM_FORMATS[sample_format]
+    # -ss before -i seeks the input instead of decoding and discarding up to it
+    seek = ['-ss', f"{start_sec:.3f}"] if start_sec > 0 else []
+    command = [
+        FFMPEG_BINARY, '-nostdin', '-v', 'error',
+        *seek, '-i', file_path,
+        '-f', output_format, '-acodec', codec,
+        '-af', FFMPEG_RESAMPLER, '-ar', str(sample_rate), '-ac', str(channels),
+        '-',
+    ]
+    # Don't flash a console window per decode on Windows
+    flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, creationflags=flags)
+
+
+def decode_file(file_path, sample_rate, channels, sample_format='float32'):
+    """Decode a whole file to a (frames, channels) clip in the mixer's format, in one pass.
+
+    ffmpeg does the decode, resample (FFMPEG_RESAMPLER) and channel
+    mapping and writes interleaved samples in sample_format ('float32' or
+    'int16'), which
+    are appended straight into a single growing bytearray; the returned
+    array is a view of that buffer, so the clip exists once in memory
+    (plus one read chunk) rather than as a chain of intermediate copies.
+    Returns an empty array if decoding fails.
+    """
+    dtype = PCM_FORMATS[sample_format][2]
+    try:
+        process = open_ffmpeg_pcm(file_path, sample_rate, channels, sample_format=sample_format)
+    except OSError as e:
+        print(f"Error starting {FFMPEG_BINARY} for {file_path}: {e}")
+        return np.zeros((0, channels), dtype=dtype)
+
+    data = bytearray()
+    chunk = memoryview(bytearray(DECODE_READ_BYTES))
+    try:
+        while True:
+            count = process.stdout.readinto(chunk)
+            if not count:
+                break
+            data += chunk[:count]
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if process.returncode != 0:
+        print(f"Error decoding {file_path}: {FFMPEG_BINARY} exited with {process.returncode}")
+        return np.zeros((0, channels), dtype=dtype)
+
+    frames = len(data) // (channels * dtype.itemsize)
+    print(f"Decoded {file_path}: {frames} frames, {sample_rate}Hz, {channels} channels")
+    return np.frombuffer(data, dtype=dtype, count=frames * channels).reshape(frames, channels)
+
+
+def decode_clip(file_path, sample_rate, channels):
+    """Decode a whole file for the voice pool: int16, and mono when the source is (see compact_clip)."""
+    return compact_clip(decode_file(file_path, sample_rate, channels, sample_format='int16'), channels)
+
+
+def decode_to_npy(file_path, sample_rate, channels, out_path):
+    """Decode a whole file to an int16 (frames, channels) .npy at out_path without holding it in memory.
+
+    ffmpeg's output goes to disk one read chunk at a time. The header is
+    written for zero frames first and rewritten with the real count at
+    the end; numpy pads .npy headers so the first dimension can grow in
+    place. Returns the frame count, 0 if decoding failed.
+    """
+    try:
+        process = open_ffmpeg_pcm(file_path, sample_rate, channels, sample_format='int16')
+    except OSError as e:
+        print(f"Error starting {FFMPEG_BINARY} for {file_path}: {e}")
+        return 0
+
+    header = {'descr': npy_format.dtype_to_descr(np.dtype(np.int16)), 'fortran_order': False, 'shape': (0, channels)}
+    frame_bytes = channels * 2
+    written = 0
+    chunk = memoryview(bytearray(DECODE_READ_BYTES))
+    try:
+        with open(out_path, 'wb') as f:
+            npy_format.write_array_header_1_0(f, header)
+            data_start = f.tell()
+            while True:
+                count = process.stdout.readinto(chunk)
+                if not count:
+                    break
+                f.write(chunk[:count])
+                written += count
+
+            frames = written // frame_bytes
+            header['shape'] = (frames, channels)
+            f.seek(0)
+            npy_format.write_array_header_1_0(f, header)
+            if f.tell() != data_start:
+                raise ValueError(f"{out_path}: .npy header changed size")
+            f.truncate(data_start + frames * frame_bytes)
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if process.returncode != 0:
+        print(f"Error decoding {file_path}: {FFMPEG_BINARY} exited with {process.returncode}")
+        return 0
+    print(f"Decoded {file_path} to {out_path}: {frames} frames, {sample_rate}Hz, {channels} channels")
+    return frames
+
+
+def ffmpeg_blocks(file_path, sample_rate, channels, block_frames=STREAM_BLOCK_FRAMES, start_sec=0.0):
+    """Yield a file's audio as float32 (frames, channels) blocks straight from an ffmpeg pipe.
+
+    Only one block is in flight at a time, so memory does not depend on
+    the length of the file. The last block may be shorter. Closing the
+    generator early kills ffmpeg.
+    """
+    process = open_ffmpeg_pcm(file_path, sample_rate, channels, start_sec)
+    frame_bytes = channels * 4
+    try:
+        while True:
+            data = process.stdout.read(block_frames * frame_bytes)
+            frames = len(data) // frame_bytes
+            if frames == 0:
+                break
+            yield np.frombuffer(data, dtype=np.float32, count=frames * channels).reshape(frames, channels)
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+class StreamingClip:
+    """A clip played while it decodes, through a fixed-size ring of float32 frames.
+
+    A background thread pulls blocks from a generator (usually
+    ffmpeg_blocks) into the ring and waits whenever it is full; the audio
+    thread copies frames out with read_into(). Like SpscQueue there is no
+    lock: the decoder only advances `_written` after the frames are in
+    place and the audio thread only advances `_read`. Memory is the ring
+    plus one decoded block, however long the clip is.
+
+    Playback starts with the first decoded block. Running out of frames
+    after that (the decoder falling behind) plays silence and is counted
+    in `underruns`.
+    """
+
+    def __init__(self, blocks, channels, ring_frames):
+        self.channels = channels
+        self._blocks = blocks
+        self._ring = np.zeros((ring_frames, channels), dtype=np.float32)
+        self._size = ring_frames
+        self._written = 0  # total frames decoded, owned by the decoder thread
+        self._read = 0  # total frames played, owned by the audio thread
+        self.done = False
+        self.underruns = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._decode, daemon=True)
+
+    @classmethod
+    def from_file(cls, file_path, sample_rate, channels, ring_seconds=STREAM_RING_SECONDS, start_sec=0.0):
+        """Start decoding file_path (from start_sec on) with ffmpeg and return the clip."""
+        blocks = ffmpeg_blocks(file_path, sample_rate, channels, start_sec=start_sec)
+        clip = cls(blocks, channels, int(sample_rate * ring_seconds))
+        return clip.start()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def started(self):
+        return self._written > 0
+
+    @property
+    def finished(self):
+        return self.done and self._read == self._written
+
+    def close(self):
+        """Stop decoding; safe to call from any thread."""
+        self._stop.set()
+
+    def _decode(self):
+        try:
+            for block in self._blocks:
+                offset = 0
+                while offset < len(block):
+                    if self._stop.is_set():
+                        return
+                    space = self._size - (self._written - self._read)
+                    if space == 0:
+                        # The audio thread frees space at playback speed; the ring holds seconds
+                        time.sleep(0.01)
+                        continue
+                    count = min(space, len(block) - offset)
+                    self._write(block[offset:offset + count])
+                    offset += count
+        except Exception as e:
+            print(f"Error decoding stream: {e}")
+        finally:
+            self.done = True
+            close = getattr(self._blocks, 'close', None)
+            if close is not None:
+                close()  # kills ffmpeg when stopped early
+
+    def _write(self, frames):
+        count = len(frames)
+        pos = self._written % self._size
+        first = min(count, self._size - pos)
+        self._ring[pos:pos + first] = frames[:first]
+        self._ring[:count - first] = frames[first:]
+        self._written += count
+
+    def read_into(self, out):
+        """Copy the next frames into out (float32 (frames, channels)), padding with silence; returns frames copied."""
+        wanted = out.shape[0]
+        count = min(self._written - self._read, wanted)
+        if count < wanted:
+            if self.started and not self.done:
+                self.underruns += 1
+            out[count:].fill(0.0)
+        if count == 0:
+            return 0
+
+        pos = self._read % self._size
+        first = min(count, self._size - pos)
+        np.copyto(out[:first], self._ring[pos:pos + first])
+        if first < count:
+            np.copyto(out[first:count], self._ring[:count - first])
+        self._read += count
+        return count
+
+
+class MappedClip:
+    """A decoded clip played straight from a memory-mapped int16 .npy (usually a DiskClipCache entry).
+
+    Nothing is read up front: the OS pages samples in as read_into()
+    reaches them. Every MAPPED_RELEASE_SECONDS of playback the pages
+    already played are dropped from the mapping (MADV_DONTNEED) and the
+    next stretch is requested ahead of time (MADV_WILLNEED), so resident
+    memory stays at a few seconds of audio however long the clip is, and
+    the audio thread rarely waits on a page fault. Where madvise is missing
+    (Windows) the pages are clean and file-backed, so the OS can still
+    drop them under memory pressure.
+
+    Has StreamingClip's interface, so MixEngine mixes it as a stream.
+    """
+
+    started = True
+    done = True
+    underruns = 0
+
+    def __init__(self, clip, channels, sample_rate, offset=0, release_seconds=MAPPED_RELEASE_SECONDS):
+        if clip.dtype != np.int16 or clip.ndim != 2 or clip.shape[1] not in (1, channels):
+            raise ValueError(f"Expected an int16 (frames, 1 or {channels}) clip, got {clip.dtype} {clip.shape}")
+        self.channels = channels
+        self._clip = clip
+        self._frames = len(clip)
+        self._read = min(offset, self._frames)
+        self._to_float = np.float32(1.0 / INT16_SCALE)
+
+        # np.load(mmap_mode=...) maps from an allocation-granularity boundary below the data
+        self._map = clip.base if isinstance(clip, np.memmap) and isinstance(clip.base, mmap.mmap) else None
+        self._data_start = clip.offset % mmap.ALLOCATIONGRANULARITY if self._map is not None else 0
+        self._frame_bytes = clip.shape[1] * clip.itemsize
+        self._release_frames = max(1, int(sample_rate * release_seconds))
+        self._released = 0  # bytes of the mapping already dropped
+        self._next_release = self._read
+        self._release()
+
+    @property
+    def finished(self):
+        return self._read >= self._frames
+
+    def close(self):
+        """Stop playing; the mapping goes when the last reference to the clip does."""
+        self._read = self._frames
+
+    def read_into(self, out):
+        """Copy the next frames into out (float32 (frames, channels)), padding with silence; returns frames copied."""
+        wanted = out.shape[0]
+        count = min(self._frames - self._read, wanted)
+        if count < wanted:
+            out[count:].fill(0.0)
+        if count == 0:
+            return 0
+
+        # Cast in place, then scale: a mixed int16/float32 multiply would allocate a cast buffer.
+        # A mono clip broadcasts to every channel.
+        np.copyto(out[:count], self._clip[self._read:self._read + count], casting='unsafe')
+        np.multiply(out[:count], self._to_float, out=out[:count])
+        self._read += count
+        if self._read >= self._next_release:
+            self._release()
+        return count
+
+    def _release(self):
+        self._next_release = self._read + self._release_frames
+        if self._map is None or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        page = mmap.PAGESIZE
+        position = (self._data_start + self._read * self._frame_bytes) // page * page
+        if position > self._released:
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, position - self._released)
+            self._released = position
+        ahead = min(self._release_frames * self._frame_bytes * 2, len(self._map) - position)
+        if ahead > 0:
+            self._map.madvise(mmap.MADV_WILLNEED, position, ahead)
@@ -0,0 +1,222 @@
+import numpy as np
+
+from audio.sample_formats import compact_clip
+from . import MAX_POLYPHONY, VOICE_STEAL_POLICY, VOICE_RING_FRAMES, VOICE_REFILL_FRAMES, INT16_SCALE
+
+STEAL_POLICIES = ('oldest', 'quietest')
+IDLE_AHEAD = 2 ** 62  # what a free voice counts as having staged, so it is never picked for a refill
+
+
+class VoicePool:
+    """Fixed-size pool of voices that play clips on top of each other.
+
+    A voice plays from the clip it was given, in its compact form (see
+    compact_clip): int16 frames of either one channel or all of them. The
+    clip is never copied whole; play() only records it and stages its
+    first frames. Clips are normally compact already (MixEngine.prepare_clip
+    on the GUI thread); anything else is compacted by play(), which is a
+    copy the audio thread should not be made to do.
+
+    Each voice owns a ring of ring_frames frames, cast to float32 but not
+    yet scaled (the mix gains fold that in), in a preallocated
+    (voices, ring_frames, channels) array, or in a one-channel array like
+    it when its clip is mono, and every ring is read at the same position.
+    Mixing a block is then one gain-weighted sum over the voice axis of
+    each array (a gemv over the whole pool, silent voices carrying a zero
+    gain), the mono sum being added to every channel, so it costs the same
+    whether 1 or max_voices clips are playing. Rings are topped up from
+    their clips refill_frames at a time, a few voices per block: as many
+    as keep pace with what the playing voices use up, and always every
+    voice that would run dry this block. Past the end of a clip its ring
+    is filled with silence.
+
+    mix() allocates no numpy memory in steady state, whatever the block
+    size, as long as blocks stay under ring_frames - refill_frames frames;
+    a larger block grows the rings once.
+
+    Voice ids returned by play() are slot numbers and get reused once a
+    voice finishes or is stolen.
+    """
+
+    def __init__(self, channels, max_voices=MAX_POLYPHONY, steal_policy=VOICE_STEAL_POLICY,
+                 ring_frames=VOICE_RING_FRAMES, refill_frames=VOICE_REFILL_FRAMES):
+        if steal_policy not in STEAL_POLICIES:
+            raise ValueError(f"Unknown voice steal policy: {steal_policy}")
+
+        self.channels = channels
+        self.max_voices = max_voices
+        self.steal_policy = steal_policy
+        self.refill_frames = refill_frames
+
+        self.active = np.zeros(max_voices, dtype=bool)
+        self.length = np.zeros(max_voices, dtype=np.int64)
+        self.position = np.zeros(max_voices, dtype=np.int64)
+        self.gain = np.zeros(max_voices, dtype=np.float32)
+        self.started_at = np.zeros(max_voices, dtype=np.int64)
+        self.handles = np.full(max_voices, -1, dtype=np.int64)
+        self._voice_clip = [None] * max_voices
+        self._mono = np.zeros(max_voices, dtype=bool)  # plays from the one-channel ring
+        # Rings hold int16 sample values, so these also scale them to [-1, 1)
+        self._wide_gain = np.zeros(max_voices, dtype=np.float32)  # gain, or 0 for mono voices
+        self._mono_gain = np.zeros(max_voices, dtype=np.float32)  # gain, or 0 for the others
+        self._ahead = np.full(max_voices, IDLE_AHEAD, dtype=np.int64)  # frames staged past the read position
+        self._ended = np.zeros(max_voices, dtype=bool)
+        self._trigger_count = 0
+        self._refill_credit = 0.0
+        self._to_float = np.float32(1.0 / INT16_SCALE)
+
+        self._allocate_rings(max(ring_frames, 2 * refill_frames))
+
+    @property
+    def active_count(self):
+        return int(np.count_nonzero(self.active))
+
+    def play(self, clip, gain=1.0, handle=-1, offset=0):
+        """Start playing a clip and return its voice id.
+
+        handle is an optional caller-side id (see voice_for) for callers that
+        cannot hold on to voice ids, e.g. because they live on another thread.
+        offset starts the voice that many frames into the clip.
+        """
+        if clip is None or len(clip) == 0:
+            return None
+
+        if clip.dtype != np.int16 or clip.ndim != 2 or clip.shape[1] not in (1, self.channels):
+            clip = compact_clip(clip, self.channels)
+        voice = self._allocate_voice()
+
+        self.length[voice] = len(clip)
+        self.position[voice] = offset
+        self.active[voice] = True
+        self.started_at[voice] = self._trigger_count
+        self.handles[voice] = handle
+        self._trigger_count += 1
+        self._voice_clip[voice] = clip
+        self._mono[voice] = clip.shape[1] < self.channels
+        self._set_gain(voice, gain)
+        self._ahead[voice] = 0
+        self._fill(voice)
+        return voice
+
+    def stop(self, voice=None):
+        """Stop one voice, or every voice when voice is None."""
+        voices = np.flatnonzero(self.active) if voice is None else [voice]
+        for voice in voices:
+            if self.active[voice]:
+                self._release(voice)
+
+    def voice_for(self, handle):
+        """Return the voice currently playing handle, or None once it finished or was stolen."""
+        matches = np.flatnonzero(self.active & (self.handles == handle))
+        return int(matches[0]) if matches.size else None
+
+    def set_gain(self, voice, gain):
+        if self.active[voice]:
+            self._set_gain(voice, gain)
+
+    def mix(self, out):
+        """Overwrite out (C-contiguous float32 (frames, channels)) with the sum of all voices and advance them."""
+        frames = out.shape[0]
+        if frames > self.ring_frames - self.refill_frames:
+            self._allocate_rings(frames + self.refill_frames)
+        self._refill(frames)
+
+        self._sum(self._wide_ring, self._wide_gain, out.reshape(-1), frames)
+        if self._mono_ring is not None and self._mono_gain.any():
+            summed = self._mono_block[:frames]
+            self._sum(self._mono_ring, self._mono_gain, summed, frames)
+            for channel in range(self.channels):
+                # Column by column: an add with a broadcast operand would allocate
+                np.add(out[:, channel], summed, out=out[:, channel])
+
+        self._read = (self._read + frames) % self.ring_frames
+        np.add(self.position, frames, out=self.position)
+        np.subtract(self._ahead, frames, out=self._ahead)
+        np.greater_equal(self.position, self.length, out=self._ended)
+        np.logical_and(self._ended, self.active, out=self._ended)
+        if self._ended.any():
+            for voice in np.flatnonzero(self._ended):
+                self._release(voice)
+        return out
+
+    def _sum(self, rings, gain, out, frames):
+        """out (flat) = gain-weighted sum of the next frames of every ring, one gemv per contiguous run."""
+        first = min(frames, self.ring_frames - self._read)
+        run = rings[:, self._read:self._read + first].reshape(self.max_voices, -1)
+        # matmul reads the voices' strided rows much faster than dot does
+        np.matmul(gain, run, out=out[:run.shape[1]])
+        if first < frames:
+            run = rings[:, :frames - first].reshape(self.max_voices, -1)
+            np.matmul(gain, run, out=out[out.size - run.shape[1]:])
+
+    def _refill(self, frames):
+        """Top up the rings before a block: every voice that would run dry, plus enough others to keep pace."""
+        self._refill_credit += self.active_count * frames / self.refill_frames
+        full = self.ring_frames - self.refill_frames  # staged further than this, a ring has no room for a refill
+        while True:
+            voice = int(np.argmin(self._ahead))
+            staged = int(self._ahead[voice])
+            if staged > full or (self._refill_credit < 1 and staged >= frames):
+                break
+            self._fill(voice)
+            self._refill_credit -= 1
+        self._refill_credit = max(self._refill_credit, 0.0)
+
+    def _fill(self, voice):
+        """Stage the next refill_frames frames of a voice's clip at the end of its ring."""
+        clip = self._voice_clip[voice]
+        if self._mono[voice]:
+            ring, clip = self._mono_ring[voice], clip[:, 0]
+        else:
+            ring = self._wide_ring[voice]
+        ahead = int(self._ahead[voice])
+        source = int(self.position[voice]) + ahead
+        start = (self._read + ahead) % self.ring_frames
+        first = min(self.refill_frames, self.ring_frames - start)
+        self._stage(ring[start:start + first], clip, source)
+        if first < self.refill_frames:
+            self._stage(ring[:self.refill_frames - first], clip, source + first)
+        self._ahead[voice] = ahead + self.refill_frames
+
+    def _stage(self, dest, clip, source):
+        count = max(0, min(len(dest), len(clip) - source))
+        if count:
+            np.copyto(dest[:count], clip[source:source + count], casting='unsafe')
+        if count < len(dest):
+            dest[count:] = 0.0
+
+    def _set_gain(self, voice, gain):
+        self.gain[voice] = gain
+        scaled = gain * self._to_float
+        self._wide_gain[voice] = 0.0 if self._mono[voice] else scaled
+        self._mono_gain[voice] = scaled if self._mono[voice] else 0.0
+
+    def _release(self, voice):
+        self.active[voice] = False
+        self._set_gain(voice, 0.0)
+        self._voice_clip[voice] = None
+        self._ahead[voice] = IDLE_AHEAD
+
+    def _allocate_rings(self, ring_frames):
+        self.ring_frames = ring_frames
+        self._wide_ring = np.zeros((self.max_voices, ring_frames, self.channels), dtype=np.float32)
+        # A one-channel pool plays mono clips from its wide rings
+        self._mono_ring = np.zeros((self.max_voices, ring_frames), dtype=np.float32) if self.channels > 1 else None
+        self._mono_block = np.zeros(ring_frames, dtype=np.float32)
+        self._read = 0
+        for voice in np.flatnonzero(self.active):
+            # Restage what the voice had not played yet
+            self._ahead[voice] = 0
+            self._fill(voice)
+
+    def _allocate_voice(self):
+        free = np.flatnonzero(~self.active)
+        if free.size:
+            return int(free[0])
+
+        if self.steal_policy == 'quietest':
+            voice = int(np.argmin(self.gain))
+        else:
+            voice = int(np.argmin(self.started_at))
+        print(f"All {self.max_voices} voices busy, stealing voice {voice} ({self.steal_policy})")
+        return voice
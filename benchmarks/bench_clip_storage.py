@@ -0,0 +1,95 @@
+"""Memory saved by compact int16 clip storage, against what it costs per block.
+
+Memory: a board of BOARD_CLIPS three-second clips, half of them mono, as
+the float32 stereo arrays clips used to be kept as and as compact int16
+clips (see compact_clip). The clip cache and the disk cache each hold
+one copy in that form; voices stage their samples from the clip cache's
+copy a few thousand frames at a time, never copying a clip whole.
+
+Cost: VoicePool.mix per 528-frame stereo block with mono and with stereo
+int16 clips, next to a gather-and-gemv over a float32 stereo bank (an
+earlier layout), at a few polyphony levels.
+
+Run with: python -m benchmarks.bench_clip_storage
+"""
+import numpy as np
+
+from audio import DEFAULT_SAMPLE_RATE, AUDIO_PROCESS_INTERVAL_SEC
+from audio.sample_formats import compact_clip
+from audio.voice_pool import VoicePool
+from benchmarks.timing import median_seconds
+
+CHANNELS = 2
+BOARD_CLIPS = 200
+CLIP_SECONDS = 3
+VOICES = (1, 4, 16)
+MAX_VOICES = 16
+CALLS = 2000
+
+
+def board_memory():
+    """(float32 stereo bytes, compact int16 bytes) for the board."""
+    frames = DEFAULT_SAMPLE_RATE * CLIP_SECONDS
+    float_bytes = BOARD_CLIPS * frames * CHANNELS * 4
+    compact_bytes = 0
+    rng = np.random.default_rng(0)
+    for i in range(BOARD_CLIPS):
+        mono = rng.integers(-20000, 20000, (frames, 1)).astype(np.int16)
+        pcm = np.repeat(mono, CHANNELS, axis=1) if i % 2 else rng.integers(-20000, 20000, (frames, CHANNELS)).astype(np.int16)
+        compact_bytes += compact_clip(pcm, CHANNELS).nbytes
+    return float_bytes, compact_bytes
+
+
+class Float32Bank:
+    """An earlier voice bank layout: float32 (channels, frames), gathered and summed as VoicePool used to."""
+
+    def __init__(self, clip, voices, frames):
+        self.bank = np.ascontiguousarray(clip.T)
+        self.gain = np.zeros(MAX_VOICES, dtype=np.float32)
+        self.gain[:voices] = 0.5
+        self.frame_pos = np.tile(np.arange(frames, dtype=np.int64)[:, None], (1, MAX_VOICES))
+        self.length_cols = np.full((frames, MAX_VOICES), len(clip), dtype=np.int64)
+        self.start_cols = np.zeros((frames, MAX_VOICES), dtype=np.int64)
+        self.idx = np.empty((frames, MAX_VOICES), dtype=np.int64)
+        self.gather = np.empty((CHANNELS, frames, MAX_VOICES), dtype=np.float32)
+        self.summed = np.empty((CHANNELS, frames), dtype=np.float32)
+
+    def mix(self, out):
+        np.minimum(self.frame_pos, self.length_cols, out=self.idx)
+        np.add(self.idx, self.start_cols, out=self.idx)
+        np.take(self.bank, self.idx, axis=1, out=self.gather, mode='clip')
+        np.dot(self.gather.reshape(-1, MAX_VOICES), self.gain, out=self.summed.reshape(-1))
+        np.copyto(out, self.summed.T)
+
+
+def run(quick=False):
+    calls = CALLS // 5 if quick else CALLS
+    frames = int(DEFAULT_SAMPLE_RATE * AUDIO_PROCESS_INTERVAL_SEC)
+    clip_frames = frames * (calls + 20)  # no voice finishes mid-run
+    rng = np.random.default_rng(1)
+    stereo = rng.integers(-20000, 20000, (clip_frames, CHANNELS)).astype(np.int16)
+    clips = {'mono': np.ascontiguousarray(stereo[:, :1]), 'stereo': stereo}
+    out = np.empty((frames, CHANNELS), dtype=np.float32)
+    results = {}
+    for voices in VOICES:
+        for layout, clip in clips.items():
+            pool = VoicePool(CHANNELS, max_voices=MAX_VOICES)
+            for _ in range(voices):
+                pool.play(clip, gain=0.5)
+            results[f"storage.mix.int16_{layout}.voices{voices}"] = median_seconds(lambda: pool.mix(out), calls, warmup=10)
+        old = Float32Bank(stereo.astype(np.float32) / 32768, voices, frames)
+        results[f"storage.mix.float32_stereo.voices{voices}"] = median_seconds(lambda: old.mix(out), calls, warmup=10)
+    return results
+
+
+def main():
+    float_bytes, compact_bytes = board_memory()
+    print(f"{BOARD_CLIPS} clips of {CLIP_SECONDS}s, half mono: {float_bytes / 1e6:.0f} MB as float32 stereo, "
+          f"{compact_bytes / 1e6:.0f} MB compact ({compact_bytes / float_bytes:.0%}) per copy "
+          f"(the clip cache and disk cache each hold one)")
+    for name, seconds in run().items():
+        print(f"{name:<40} {seconds * 1e6:>8.2f} us per block")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Clip decode throughput for wav, mp3 and ogg files.
+
+Times decode_file (the one-pass ffmpeg loader the app uses) and, where
+pydub and QtMultimedia import, the older decode_to_pcm for comparison.
+The compressed fixtures are encoded from a generated WAV with ffmpeg,
+which must be on PATH as it is for the app itself. Also times the
+in-process work around a decode on the same length of stereo noise:
+audio.resample from 44.1 kHz to the mix rate, and ClipAnalyzer.
+
+Run with: python -m benchmarks.bench_decode
+"""
+import os
+import subprocess
+import tempfile
+import wave
+
+import numpy as np
+
+from audio import DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, FFMPEG_BINARY
+from audio.clip_analysis import ClipAnalyzer
+from audio.resample import resample
+from audio.stream_decoder import decode_file
+from benchmarks.timing import median_seconds
+
+FIXTURE_SECONDS = 10
+FIXTURE_RATE = 44100  # not the mix rate, so decoding includes a resample
+FORMATS = ('wav', 'mp3', 'ogg')
+ANALYSIS_BLOCK_FRAMES = 4096
+ENCODE_ARGS = {'mp3': ['-b:a', '192k'], 'ogg': ['-c:a', 'libvorbis']}
+
+
+def write_fixture_wav(path, seconds=FIXTURE_SECONDS, sample_rate=FIXTURE_RATE):
+    """Write a stereo 16-bit WAV of two detuned sines."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    left = np.sin(2 * np.pi * 440 * t)
+    right = np.sin(2 * np.pi * 443 * t)
+    samples = (np.column_stack([left, right]) * 0.5 * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+
+def make_fixtures(folder):
+    """Create one fixture per format in folder and return {format: path}."""
+    paths = {'wav': os.path.join(folder, 'fixture.wav')}
+    write_fixture_wav(paths['wav'])
+    for fmt, args in ENCODE_ARGS.items():
+        paths[fmt] = os.path.join(folder, f'fixture.{fmt}')
+        subprocess.run([FFMPEG_BINARY, '-v', 'error', '-y', '-i', paths['wav'], *args, paths[fmt]], check=True)
+    return paths
+
+
+def analyze(clip, sample_rate):
+    analyzer = ClipAnalyzer(sample_rate)
+    for start in range(0, len(clip), ANALYSIS_BLOCK_FRAMES):
+        analyzer.feed(clip[start:start + ANALYSIS_BLOCK_FRAMES])
+    return analyzer.result()
+
+
+def run(quick=False):
+    try:
+        from audio.audio_format_utils import decode_to_pcm
+    except ImportError as e:
+        print(f"  decode_to_pcm unavailable, timing decode_file only: {e}")
+        decode_to_pcm = None
+
+    repeat = 2 if quick else 5
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt, path in make_fixtures(folder).items():
+            results[f"decode.{fmt}.{FIXTURE_SECONDS}s"] = median_seconds(
+                lambda: decode_file(path, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS), repeat)
+            if decode_to_pcm is not None:
+                results[f"decode.pydub.{fmt}.{FIXTURE_SECONDS}s"] = median_seconds(lambda: decode_to_pcm(path), repeat)
+
+    noise = np.random.default_rng(0).uniform(-1, 1, (FIXTURE_SECONDS * FIXTURE_RATE, 2)).astype(np.float32)
+    results[f"resample.{FIXTURE_SECONDS}s"] = median_seconds(
+        lambda: resample(noise, FIXTURE_RATE, DEFAULT_SAMPLE_RATE), repeat)
+    mixed = resample(noise * 0.5, FIXTURE_RATE, DEFAULT_SAMPLE_RATE)
+    results[f"analysis.{FIXTURE_SECONDS}s"] = median_seconds(lambda: analyze(mixed, DEFAULT_SAMPLE_RATE), repeat)
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        print(f"{name:<24} {seconds * 1000:>8.1f} ms  ({FIXTURE_SECONDS / seconds:.0f}x realtime)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Per-node cost of the bus DSP chains, per block.
+
+Times each DspNode on one stereo tick and on a larger pull block, in the
+states that cost differently: a gain that holds and one that ramps, the
+limiter on quiet audio (one abs and max) and on audio it has to shape,
+and the noise gate open and closing. Also times the default chains
+(gain on the mic and clip buses, limiter on the master) as MixEngine
+runs them, with their per-node timing included.
+
+Run with: python -m benchmarks.bench_dsp
+"""
+import numpy as np
+
+from audio.dsp_chain import DspChain, Gain, NoiseGate, SoftLimiter
+from benchmarks.timing import median_seconds
+
+BLOCK_FRAMES = (528, 960)
+CHANNELS = 2
+SAMPLE_RATE = 48000
+CALLS = 2000
+
+
+def node_cases(rng, frames):
+    """(name, node, block) for each node state worth timing."""
+    quiet = rng.uniform(-0.3, 0.3, (frames, CHANNELS)).astype(np.float32)
+    loud = rng.uniform(-1.6, 1.6, (frames, CHANNELS)).astype(np.float32)
+    hiss = rng.uniform(-1e-4, 1e-4, (frames, CHANNELS)).astype(np.float32)
+    return [
+        ('gain.hold', Gain(0.5), quiet),
+        ('gain.ramp', Gain(0.5), quiet),
+        ('limiter.idle', SoftLimiter(), quiet),
+        ('limiter.shaping', SoftLimiter(), loud),
+        ('noise_gate.open', NoiseGate(), quiet),
+        ('noise_gate.closing', NoiseGate(release_ms=10 ** 9), hiss),
+    ]
+
+
+def run(quick=False):
+    calls = CALLS // 5 if quick else CALLS
+    rng = np.random.default_rng(0)
+    results = {}
+    for frames in BLOCK_FRAMES:
+        for name, node, source in node_cases(rng, frames):
+            node.prepare(SAMPLE_RATE, CHANNELS, frames)
+            block = np.empty_like(source)
+            ramping = name == 'gain.ramp'
+
+            def process():
+                np.copyto(block, source)  # nodes work in place
+                if ramping:
+                    node.set_gain(0.25 if node.gain == 0.5 else 0.5)
+                node.process(block)
+
+            if name == 'noise_gate.closing':
+                node.gain = 1.0  # a release too long to finish, so every block ramps
+            results[f"dsp.{name}.frames{frames}"] = median_seconds(process, calls, warmup=10)
+
+        mic = DspChain([Gain(1.0)], SAMPLE_RATE, CHANNELS, frames)
+        clips = DspChain([Gain(0.2)], SAMPLE_RATE, CHANNELS, frames)
+        master = DspChain([SoftLimiter()], SAMPLE_RATE, CHANNELS, frames)
+        source = rng.uniform(-0.9, 0.9, (frames, CHANNELS)).astype(np.float32)
+        block = np.empty_like(source)
+
+        def default_chains():
+            np.copyto(block, source)
+            mic.process(block)
+            clips.process(block)
+            master.process(block)
+
+        results[f"dsp.default_chains.frames{frames}"] = median_seconds(default_chains, calls, warmup=10)
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        frames = int(name.rsplit('frames', 1)[1])
+        budget = frames / SAMPLE_RATE
+        print(f"{name:<36} {seconds * 1e6:>8.2f} us  {seconds / budget * 100:>6.3f}% of the block's real time")
+
+
+if __name__ == "__main__":
+    main()
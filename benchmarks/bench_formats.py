@@ -0,0 +1,56 @@
+"""Per-kernel throughput of the capture and sink sample conversions.
+
+Times each decoder (raw samples to float32) and encoder (clipped float32
+to raw samples) on one stereo tick and on a larger block, plus the
+channel maps. The same kernels run on every tick of the mix, on the
+capture read and on the sink write.
+
+Run with: python -m benchmarks.bench_formats
+"""
+import numpy as np
+
+from audio.sample_formats import DECODERS, ENCODERS, SAMPLE_DTYPES, SAMPLE_FORMATS, channel_map
+from benchmarks.timing import median_seconds
+
+BLOCK_FRAMES = (528, 4096)
+CHANNELS = 2
+CHANNEL_MAPS = ((1, 2), (2, 1), (2, 2))
+CALLS = 2000
+
+
+def run(quick=False):
+    calls = CALLS // 5 if quick else CALLS
+    rng = np.random.default_rng(0)
+    results = {}
+    for frames in BLOCK_FRAMES:
+        clipped = rng.uniform(-1, 1, frames * CHANNELS).astype(np.float32)
+        scratch = np.empty_like(clipped)
+        floats = np.empty_like(clipped)
+        for name in SAMPLE_FORMATS:
+            samples = np.zeros(clipped.size, dtype=SAMPLE_DTYPES[name])
+            encode, decode = ENCODERS[name], DECODERS[name]
+            encode(clipped.copy(), samples)
+
+            def encode_block():
+                np.copyto(scratch, clipped)  # encoders scale their input in place
+                encode(scratch, samples)
+
+            results[f"formats.decode.{name}.frames{frames}"] = median_seconds(lambda: decode(samples, floats), calls, warmup=10)
+            results[f"formats.encode.{name}.frames{frames}"] = median_seconds(encode_block, calls, warmup=10)
+
+        for src, dst in CHANNEL_MAPS:
+            block = rng.uniform(-1, 1, (frames, src)).astype(np.float32)
+            out = np.zeros((frames, dst), dtype=np.float32)
+            kernel = channel_map(src, dst)
+            results[f"formats.channels.{src}to{dst}.frames{frames}"] = median_seconds(lambda: kernel(block, out), calls, warmup=10)
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        frames = int(name.rsplit('frames', 1)[1])
+        print(f"{name:<40} {seconds * 1e6:>8.2f} us {frames / seconds / 1e6:>8.1f} Mframes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Library indexing and grid population at 100 to 50,000 files.
+
+Times the first (cold) index of a folder, an incremental refresh with
+nothing changed, and re-opening the folder from the index, then building
+the grid from it and painting its first screen. Uses empty placeholder files spread over subfolders and
+skips probing, so no step reads file contents. Widgets are built on Qt's
+offscreen platform, so no display is needed.
+
+Run with: python -m benchmarks.bench_library
+"""
+import os
+import tempfile
+
+from benchmarks.timing import median_seconds
+
+FILE_COUNTS = (100, 1000, 10000, 20000, 50000)
+EXTENSIONS = ('.mp3', '.wav', '.ogg', '.txt')  # one in four is not a sound
+FILES_PER_SUBFOLDER = 500
+
+
+def make_folder(folder, count):
+    for i in range(count):
+        subfolder = os.path.join(folder, f"pack_{i // FILES_PER_SUBFOLDER:03d}")
+        os.makedirs(subfolder, exist_ok=True)
+        open(os.path.join(subfolder, f"sound_{i:05d}{EXTENSIONS[i % len(EXTENSIONS)]}"), 'wb').close()
+
+
+def time_index(folder, repeat):
+    from utils.library_index import LibraryIndex
+
+    results = {}
+    with tempfile.TemporaryDirectory() as db_folder:
+        db_path = os.path.join(db_folder, 'library.sqlite3')
+
+        def cold_scan():
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            index = LibraryIndex(db_path)
+            index.refresh(folder)
+            index.close()
+
+        results['scan'] = median_seconds(cold_scan, repeat)
+        index = LibraryIndex(db_path)
+        results['refresh'] = median_seconds(lambda: index.refresh(folder), repeat)
+        results['reopen'] = median_seconds(lambda: index.files(folder), repeat)
+        index.close()
+    return results
+
+
+class _GridHost:
+    """The parts of MainWindow that populate_sound_grid touches, with the grid on screen."""
+
+    def __init__(self, db_path):
+        from ui.grids import SoundGridView, SoundListModel
+        from ui.library_watcher import LibraryWatcher
+        from utils.library_index import LibraryIndex
+
+        self.sound_model = SoundListModel()
+        self.widget = SoundGridView()
+        self.widget.setModel(self.sound_model)
+        self.widget.resize(800, 400)
+        self.widget.show()
+        self.library = LibraryIndex(db_path)
+        self.library_watcher = LibraryWatcher(db_path, probe=False)
+
+    def close(self):
+        self.library_watcher.stop()
+        self.library.close()
+        self.widget.deleteLater()
+
+    def play_selected_sound(self, file_path):
+        pass
+
+
+def _application():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+def run(quick=False):
+    from ui.grids import populate_sound_grid
+
+    app = _application()
+    repeat = 3 if quick else 7
+    results = {}
+    for count in FILE_COUNTS:
+        with tempfile.TemporaryDirectory() as folder:
+            make_folder(folder, count)
+            for name, seconds in time_index(folder, repeat).items():
+                results[f"library.index.{name}.files{count}"] = seconds
+
+            db_folder = tempfile.TemporaryDirectory()
+            host = _GridHost(os.path.join(db_folder.name, 'library.sqlite3'))
+
+            def populate():
+                populate_sound_grid(host, folder)
+                app.processEvents()  # lay out and paint the first screen
+
+            results[f"library.populate.files{count}"] = median_seconds(populate, repeat)
+            host.close()
+            app.processEvents()
+            db_folder.cleanup()
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        print(f"{name:<32} {seconds * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
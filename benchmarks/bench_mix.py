@@ -0,0 +1,48 @@
+"""Per-tick MixEngine.process cost across polyphony, channel count and block size.
+
+This is the whole of what MicMixer.mix_audio does per tick apart from the
+stream read/write calls.
+
+Run with: python -m benchmarks.bench_mix
+"""
+import numpy as np
+
+from audio import DEFAULT_SAMPLE_RATE, MAX_POLYPHONY
+from audio.mix_engine import MixEngine
+from benchmarks.timing import median_seconds
+
+POLYPHONY_LEVELS = (0, 1, 4, 16, 64)
+CHANNEL_COUNTS = (1, 2)
+BLOCK_FRAMES = (128, 528, 1024)
+TICKS = 500
+
+
+def bench_tick(voices, channels, block_frames, ticks=TICKS):
+    """Return the median seconds per process() call with voices clips playing."""
+    engine = MixEngine(DEFAULT_SAMPLE_RATE, channels, block_frames, max_voices=max(voices, MAX_POLYPHONY))
+    rng = np.random.default_rng(0)
+    clip = rng.uniform(-1, 1, (block_frames * (ticks + 10), channels)).astype(np.float32)
+    for _ in range(voices):
+        engine.play(clip, gain=0.5)
+    mic_data = (rng.uniform(-1, 1, block_frames * channels) * 32767).astype(np.int16).tobytes()
+    return median_seconds(lambda: engine.process(mic_data, block_frames), ticks, warmup=10)
+
+
+def run(quick=False):
+    ticks = TICKS // 5 if quick else TICKS
+    results = {}
+    for channels in CHANNEL_COUNTS:
+        for block_frames in BLOCK_FRAMES:
+            for voices in POLYPHONY_LEVELS:
+                name = f"mix.tick.voices{voices}.ch{channels}.frames{block_frames}"
+                results[name] = bench_tick(voices, channels, block_frames, ticks)
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        print(f"{name:<40} {seconds * 1e6:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
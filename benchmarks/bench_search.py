@@ -0,0 +1,123 @@
+"""Search-bar latency over a 50,000 clip library.
+
+Times building the search index and then every keystroke of a few typed
+queries, both on the index alone and through the grid model with the
+view repainting. Through the grid it also times the first keystroke
+right after the folder is loaded (the index is still building on its
+thread; `first_results` is how long until the matches show), and a
+watcher change arriving while a query is shown. The library is a synthetic list of paths (the index
+never reads the files themselves), made of random words in subfolders.
+
+Run with: python -m benchmarks.bench_search
+"""
+import os
+import time
+
+import numpy as np
+
+from benchmarks.timing import median_seconds
+
+CLIP_COUNT = 50000
+FOLDER = os.path.abspath(os.sep + 'sounds')
+QUERIES = ('airhorn', 'kick drum', 'pack_042 boom', 'zzzz')
+
+
+def make_paths(count, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    words = [''.join(rng.choice(letters, rng.integers(3, 9))) for _ in range(3000)]
+    words[:3] = ['airhorn', 'kick', 'drum']
+    paths = []
+    for i in range(count):
+        name = ' '.join(words[j] for j in rng.integers(0, len(words), 3))
+        paths.append(os.path.join(FOLDER, f"pack_{i // 500:03d}", f"{name}_{i}.mp3"))
+    return sorted(paths)
+
+
+def keystrokes(query):
+    return [query[:i] for i in range(1, len(query) + 1)]
+
+
+def time_keystrokes(search, repeat):
+    """Median seconds per call of search(prefix) for each prefix of each query; returns (median, max)."""
+    timings = [median_seconds(lambda: search(prefix), repeat) for query in QUERIES for prefix in keystrokes(query)]
+    return float(np.median(timings)), float(np.max(timings))
+
+
+def run(quick=False):
+    from utils.sound_search import SoundSearchIndex
+
+    repeat = 3 if quick else 7
+    paths = make_paths(CLIP_COUNT)
+    results = {f"search.build.clips{CLIP_COUNT}": median_seconds(lambda: SoundSearchIndex(FOLDER, paths), repeat)}
+
+    index = SoundSearchIndex(FOLDER, paths)
+    median, worst = time_keystrokes(index.search, repeat)
+    results[f"search.keystroke.median.clips{CLIP_COUNT}"] = median
+    results[f"search.keystroke.max.clips{CLIP_COUNT}"] = worst
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from ui.grids import SoundGridView, SoundListModel
+
+    app = QApplication.instance() or QApplication([])
+    model = SoundListModel()
+    view = SoundGridView()
+    view.setModel(model)
+    view.resize(800, 400)
+    view.show()
+
+    def first_keystroke():
+        """(seconds for loading the folder and typing 'a', seconds until the matches show)."""
+        model.set_query('')
+        t0 = time.perf_counter()
+        model.set_paths(FOLDER, paths)
+        model.set_query('a')
+        app.processEvents()
+        typed = time.perf_counter() - t0
+        while not model.search_ready:
+            time.sleep(0.001)
+            app.processEvents()  # delivers the built index, which filters the rows
+        app.processEvents()
+        return typed, time.perf_counter() - t0
+
+    firsts = np.array([first_keystroke() for _ in range(repeat)])
+    results[f"search.grid_first_keystroke.clips{CLIP_COUNT}"] = float(np.median(firsts[:, 0]))
+    results[f"search.grid_first_results.clips{CLIP_COUNT}"] = float(np.median(firsts[:, 1]))
+
+    added = [os.path.join(FOLDER, 'pack_new', f"airhorn take {i}.mp3") for i in range(8)]
+    removed = paths[::6000]
+
+    def watcher_change():
+        t0 = time.perf_counter()
+        model.apply_changes(added, removed)
+        app.processEvents()
+        elapsed = time.perf_counter() - t0
+        model.apply_changes(removed, added)
+        return elapsed
+
+    model.set_query('airhorn')
+    results[f"search.grid_watcher_change.clips{CLIP_COUNT}"] = float(np.median([watcher_change() for _ in range(repeat)]))
+
+    def type_into_grid(prefix):
+        model.set_query('')
+        t0 = time.perf_counter()
+        model.set_query(prefix)
+        app.processEvents()  # lay out and repaint the filtered grid
+        return time.perf_counter() - t0
+
+    timings = [np.median([type_into_grid(prefix) for _ in range(repeat)])
+               for query in QUERIES for prefix in keystrokes(query)]
+    results[f"search.grid_keystroke.median.clips{CLIP_COUNT}"] = float(np.median(timings))
+    results[f"search.grid_keystroke.max.clips{CLIP_COUNT}"] = float(np.max(timings))
+    view.deleteLater()
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        print(f"{name:<44} {seconds * 1000:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Time from a fresh interpreter to the main window's first frame and first sound.
+
+Each run is a new process (so imports are cold) on Qt's offscreen
+platform. QApplication.exec is wrapped to report the elapsed time when
+the event loop starts and when the window first paints, so the
+measurement covers imports, MainWindow construction and show(). Once
+the mixer has warmed up (which happens after the first frame), a short
+generated clip is played and the mixer's own first-click-to-first-sample
+time is reported. That step is skipped, and its entry left out, where no
+audio device can be opened.
+
+Run with: python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+_CHILD = r"""
+import time
+started = time.perf_counter()
+import json, os, sys, tempfile, wave
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+_exec = QApplication.exec
+results = {}
+
+
+def report(app):
+    print("STARTUP " + json.dumps(results), flush=True)
+    app.quit()
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and 'first_frame' not in results:
+            results['first_frame'] = time.perf_counter() - started
+        return False
+
+
+def play_test_clip(app, window):
+    path = os.path.join(tempfile.mkdtemp(), 'click.wav')
+    with wave.open(path, 'wb') as clip:
+        clip.setnchannels(1)
+        clip.setsamplewidth(2)
+        clip.setframerate(48000)
+        clip.writeframes(b'\x10\x00' * 4800)
+    window.play_selected_sound(path)
+    deadline = time.perf_counter() + 5.0
+
+    def poll():
+        mixer = window.mic_mixer
+        if mixer is not None and mixer.first_sound_latency is not None:
+            results['first_sound'] = mixer.first_sound_latency
+        elif time.perf_counter() < deadline:
+            QTimer.singleShot(5, poll)
+            return
+        report(app)
+
+    poll()
+
+
+def wait_for_audio(app, deadline):
+    window = next((w for w in QApplication.topLevelWidgets() if hasattr(w, 'mic_mixer')), None)
+    mixer = window.mic_mixer if window is not None else None
+    if mixer is not None and mixer.startup_failed:
+        report(app)
+    elif mixer is not None and mixer.is_active:
+        play_test_clip(app, window)
+    elif time.perf_counter() < deadline:
+        QTimer.singleShot(10, lambda: wait_for_audio(app, deadline))
+    else:
+        report(app)  # no audio here; startup figures only
+
+
+def _timed_exec(app):
+    def loop_started():
+        results['event_loop'] = time.perf_counter() - started
+        wait_for_audio(app, time.perf_counter() + 5.0)
+    app.installEventFilter(first_paint)
+    QTimer.singleShot(0, loop_started)
+    return _exec()
+
+
+first_paint = FirstPaint()
+QApplication.exec = _timed_exec
+import main
+main.main()
+"""
+
+
+def measure_startup():
+    """Start the app once in a child process and return its timings in seconds."""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    proc = subprocess.run([sys.executable, '-c', _CHILD], cwd=REPO_ROOT, env=env,
+                          capture_output=True, text=True, timeout=120)
+    for line in proc.stdout.splitlines():
+        if line.startswith('STARTUP '):
+            return json.loads(line[len('STARTUP '):])
+    raise RuntimeError(f"app did not reach its event loop (exit {proc.returncode}): {proc.stderr.strip()[-500:]}")
+
+
+def run(quick=False):
+    runs = [measure_startup() for _ in range(2 if quick else RUNS)]
+    names = {'event_loop': 'startup.main_window', 'first_frame': 'startup.first_frame',
+             'first_sound': 'startup.first_click_to_sound'}
+    results = {}
+    for key, name in names.items():
+        values = [timings[key] for timings in runs if key in timings]
+        if values:
+            results[name] = float(np.median(values))
+    return results
+
+
+def main():
+    for name, seconds in run().items():
+        print(f"{name:<32} {seconds * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
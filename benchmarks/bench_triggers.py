@@ -0,0 +1,140 @@
+"""Click-to-first-sample latency of the trigger pipeline, as a percentile histogram.
+
+A stand-in audio thread ticks a MixEngine every AUDIO_PROCESS_INTERVAL_SEC,
+draining an SpscQueue of commands as MicMixer does and passing
+MixEngine.sounded to a TriggerStats. The main thread plays the GUI:
+each trigger takes its click time, posts ('trigger', handle, clicked_at)
+and then the clip, resolved as MainWindow._play_clip does. A clip in
+memory goes to a voice ('play') at once ('cached'); otherwise the disk
+cache is looked up, and a hit plays its memory-mapped entry on a voice
+('disk'). A clip that was not decoded yet goes as a StreamingClip of the
+file ('stream', after the disk cache missed), which starts with its first
+decoded block. Latency includes that lookup and waiting for the next
+tick, as on a device, but not the sink's buffer.
+
+Run with: python -m benchmarks.bench_triggers
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+from audio import AUDIO_PROCESS_INTERVAL_SEC, DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE
+from audio.disk_cache import DiskClipCache
+from audio.mix_engine import MixEngine
+from audio.mix_stats import TriggerStats
+from audio.spsc_queue import SpscQueue
+from audio.stream_decoder import StreamingClip
+
+TRIGGERS = 60
+CLIP_SECONDS = 0.3
+GAP_MS = (20, 60)  # time between clicks
+
+
+class TickThread(threading.Thread):
+    """Mixes a block every tick, applying queued commands first and timing the triggers that sound."""
+
+    def __init__(self, engine, commands, triggers):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.commands = commands
+        self.triggers = triggers
+        self.stopping = threading.Event()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self.stopping.is_set():
+            command = self.commands.pop()
+            while command is not None:
+                if command[0] == 'trigger':
+                    self.triggers.trigger(command[1], command[2])
+                else:
+                    self.engine.apply_command(command)
+                command = self.commands.pop()
+            self.engine.process(None)
+            if self.engine.sounded:
+                self.triggers.sounded(self.engine.sounded, time.perf_counter())
+            next_tick += AUDIO_PROCESS_INTERVAL_SEC
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+
+def write_clip(path):
+    frames = int(DEFAULT_SAMPLE_RATE * CLIP_SECONDS)
+    tone = (np.sin(np.arange(frames) * 0.05) * 8000).astype(np.int16)
+    clip = np.repeat(tone[:, None], DEFAULT_CHANNELS, axis=1)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(DEFAULT_CHANNELS)
+        f.setsampwidth(2)
+        f.setframerate(DEFAULT_SAMPLE_RATE)
+        f.writeframes(clip.tobytes())
+    return clip
+
+
+def measure(kind, path, clip, disk_cache, triggers):
+    """Fire `triggers` clicks of one kind ('cached', 'disk' or 'stream') and return their TriggerStats."""
+    engine = MixEngine(DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, int(DEFAULT_SAMPLE_RATE * AUDIO_PROCESS_INTERVAL_SEC))
+    engine.warm_up()
+    commands = SpscQueue(256)
+    stats = TriggerStats()
+    ticker = TickThread(engine, commands, stats)
+    ticker.start()
+    rng = random.Random(0)
+    try:
+        for handle in range(triggers):
+            clicked_at = time.perf_counter()
+            commands.push(('trigger', handle, clicked_at))
+            sound = clip if kind == 'cached' else disk_cache.load(path, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)
+            if sound is not None:
+                commands.push(('play', handle, sound, 1.0, 0))
+            else:
+                stream = StreamingClip.from_file(path, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)
+                commands.push(('stream', handle, stream, 1.0))
+            time.sleep(rng.uniform(*GAP_MS) / 1000)
+        time.sleep(0.5)  # let the last streams start
+    finally:
+        ticker.stopping.set()
+        ticker.join()
+        engine.stop()
+    return stats
+
+
+def measure_kinds(folder, triggers):
+    """Yield (kind, TriggerStats) for each kind of trigger."""
+    path = os.path.join(folder, 'clip.wav')
+    clip = write_clip(path)
+    warm = DiskClipCache(os.path.join(folder, 'warm'))
+    warm.store(path, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, clip)
+    cold = DiskClipCache(os.path.join(folder, 'cold'))
+    for kind, disk_cache in (('cached', None), ('disk', warm), ('stream', cold)):
+        yield kind, measure(kind, path, clip, disk_cache, triggers)
+
+
+def run(quick=False):
+    triggers = TRIGGERS // 3 if quick else TRIGGERS
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for kind, stats in measure_kinds(folder, triggers):
+            for p, value in stats.to_dict()['percentiles_ms'].items():
+                results[f"trigger.{kind}.{p}"] = value / 1000.0
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        for kind, stats in measure_kinds(folder, TRIGGERS):
+            report = stats.to_dict()
+            histogram = report['latency_ms']
+            percentiles = ", ".join(f"{p} {value:.0f}" for p, value in report['percentiles_ms'].items())
+            print(f"{kind}: {report['sounded']}/{report['triggers']} triggers sounded; ms: {percentiles}, "
+                  f"max {histogram['max']:.1f}")
+            for edge, count in zip(histogram['edges'] + ['inf'], histogram['counts']):
+                if count:
+                    print(f"  <= {edge:>5} ms {'#' * count} {count}")
+
+
+if __name__ == "__main__":
+    main()
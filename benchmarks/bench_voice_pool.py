@@ -0,0 +1,54 @@
+"""Per-block cost of VoicePool.mix at increasing polyphony.
+
+The "sum" column is the gain-weighted sum over the whole pool alone, which
+should stay flat from 1 to max_voices; the rest of a tick is staging the
+playing voices' samples into their rings, which grows with how much audio
+is actually being played.
+
+Run with: python -m benchmarks.bench_voice_pool
+"""
+import time
+
+import numpy as np
+
+from audio import DEFAULT_SAMPLE_RATE, AUDIO_PROCESS_INTERVAL_SEC
+from audio.voice_pool import VoicePool
+
+POLYPHONY_LEVELS = (1, 2, 4, 8, 16, 32, 64)
+TICKS = 2000
+
+
+def bench_voice_pool(active_voices, max_voices=64, channels=2, ticks=TICKS):
+    """Return the median seconds per mix() call, and per sum over the pool, with active_voices clips playing."""
+    frames = int(DEFAULT_SAMPLE_RATE * AUDIO_PROCESS_INTERVAL_SEC)
+    clip_frames = frames * (ticks + 10)  # long enough that no voice finishes mid-run
+    pool = VoicePool(channels, max_voices=max_voices)
+
+    rng = np.random.default_rng(0)
+    clips = [rng.uniform(-1, 1, (clip_frames, channels)).astype(np.float32) for _ in range(2)]
+    for i in range(active_voices):
+        pool.play(clips[i % len(clips)], gain=0.5)
+
+    out = np.empty((frames, channels), dtype=np.float32)
+    timings = np.empty(ticks)
+    for i in range(ticks):
+        t0 = time.perf_counter()
+        pool.mix(out)
+        timings[i] = time.perf_counter() - t0
+    sums = np.empty(ticks)
+    for i in range(ticks):
+        t0 = time.perf_counter()
+        pool._sum(pool._wide_ring, pool._wide_gain, out.reshape(-1), frames)
+        sums[i] = time.perf_counter() - t0
+    return float(np.median(timings)), float(np.median(sums))
+
+
+def main():
+    print(f"{'voices':>8} {'median us/tick':>16} {'sum us/tick':>14}")
+    for voices in POLYPHONY_LEVELS:
+        tick, summed = bench_voice_pool(voices)
+        print(f"{voices:>8} {tick * 1e6:>16.1f} {summed * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Run every benchmark, write the results as JSON and optionally compare against a baseline.
+
+All results are wall-clock seconds (median of several runs), so lower is
+better everywhere. A group whose dependencies are missing here (no
+ffmpeg for decode, no QtMultimedia for startup, ...) is recorded under
+"skipped" with the reason instead of failing the whole run.
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --output new.json --compare bench.json --threshold 0.2
+
+With --compare, any result slower than baseline * (1 + threshold) is
+reported as a regression and the exit status is 1.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import (bench_clip_storage, bench_decode, bench_dsp, bench_formats, bench_library, bench_mix,
+                        bench_search, bench_startup, bench_triggers)
+
+GROUPS = {
+    'mix': bench_mix,
+    'formats': bench_formats,
+    'dsp': bench_dsp,
+    'storage': bench_clip_storage,
+    'triggers': bench_triggers,
+    'decode': bench_decode,
+    'library': bench_library,
+    'search': bench_search,
+    'startup': bench_startup,
+}
+DEFAULT_THRESHOLD = 0.2
+
+
+def run_suite(groups=None, quick=False):
+    """Run the named benchmark groups (all by default) and return the report dict."""
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+        },
+        'results': {},
+        'skipped': {},
+    }
+    for group in groups or GROUPS:
+        print(f"Running {group} benchmarks...")
+        try:
+            results = GROUPS[group].run(quick=quick)
+        except Exception as e:
+            print(f"  skipped: {e}")
+            report['skipped'][group] = f"{type(e).__name__}: {e}"
+            continue
+        for name, seconds in results.items():
+            print(f"  {name:<44} {seconds * 1000:>10.3f} ms")
+        report['results'].update(results)
+    return report
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return [(name, baseline_s, current_s, ratio)] for results slower than the baseline allows."""
+    regressions = []
+    for name, current in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        ratio = current / previous
+        if ratio > 1.0 + threshold:
+            regressions.append((name, previous, current, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soundboard benchmark suite")
+    parser.add_argument('--output', default='bench_results.json', help="where to write the JSON results")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON results to check for regressions against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline (default 0.2)")
+    parser.add_argument('--only', help="comma-separated groups to run: " + ", ".join(GROUPS))
+    parser.add_argument('--quick', action='store_true', help="fewer repetitions, for a smoke run")
+    args = parser.parse_args(argv)
+
+    groups = args.only.split(',') if args.only else None
+    unknown = set(groups or ()) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown benchmark groups: {', '.join(sorted(unknown))}")
+
+    report = run_suite(groups, quick=args.quick)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, previous, current, ratio in regressions:
+            print(f"REGRESSION {name}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
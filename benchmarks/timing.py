@@ -0,0 +1,15 @@
+import time
+
+import numpy as np
+
+
+def median_seconds(fn, repeat, warmup=1):
+    """Call fn warmup + repeat times and return the median wall time of the timed calls."""
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - t0
+    return float(np.median(timings))
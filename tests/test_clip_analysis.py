@@ -0,0 +1,106 @@
+import math
+import shutil
+import sqlite3
+import wave
+
+import numpy as np
+import pytest
+
+from audio import CLIP_LOUDNESS_TARGET_DB, CLIP_MAX_BOOST_DB, CLIP_PEAK_CEILING_DB, CLIP_START_PREROLL_MS, FFMPEG_BINARY
+from audio.clip_analysis import ClipAnalyzer, normalization_gain
+from utils.library_index import LibraryIndex
+
+SAMPLE_RATE = 48000
+AMPLITUDE = 0.5
+SILENCE_SEC = 0.3
+EXPECTED_DB = 20 * math.log10(AMPLITUDE / math.sqrt(2))
+EXPECTED_START = SILENCE_SEC - CLIP_START_PREROLL_MS / 1000.0
+
+
+def make_clip(channels=2, gap_sec=0.0, seconds=2.4, seed=0):
+    """SILENCE_SEC of -80 dB noise, then a sine at AMPLITUDE (with an optional silent gap in the middle).
+
+    The tone halves are whole loudness windows long, so no window straddles an edge.
+    """
+    rng = np.random.default_rng(seed)
+    silence = rng.uniform(-1e-4, 1e-4, (int(SAMPLE_RATE * SILENCE_SEC), channels))
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    tone = np.repeat((AMPLITUDE * np.sin(2 * np.pi * 440 * t))[:, None], channels, axis=1)
+    half = len(tone) // 2
+    gap = np.zeros((int(SAMPLE_RATE * gap_sec), channels))
+    return np.concatenate((silence, tone[:half], gap, tone[half:])).astype(np.float32)
+
+
+def analyze(clip, block_frames):
+    analyzer = ClipAnalyzer(SAMPLE_RATE)
+    for start in range(0, len(clip), block_frames):
+        analyzer.feed(clip[start:start + block_frames])
+    return analyzer.result()
+
+
+def test_analyzer_is_independent_of_block_size():
+    clip = make_clip()
+    results = [analyze(clip, block) for block in (len(clip), 4096, 1000, 17)]
+    for loudness, peak, start in results:
+        assert abs(loudness - EXPECTED_DB) < 0.1
+        assert abs(peak - AMPLITUDE) < 1e-3
+        assert abs(start - EXPECTED_START) < 0.002
+    assert max(r[0] for r in results) - min(r[0] for r in results) < 0.02
+
+
+def test_gating_and_channel_count():
+    loudness, _, _ = analyze(make_clip(), 4096)
+    gapped, _, _ = analyze(make_clip(gap_sec=2.0), 4096)
+    assert abs(gapped - loudness) < 0.1
+    mono, _, _ = analyze(make_clip(channels=1), 4096)
+    assert abs(mono - loudness) < 0.01
+    silent = ClipAnalyzer(SAMPLE_RATE)
+    silent.feed(np.zeros((SAMPLE_RATE, 2), dtype=np.float32))
+    assert silent.result() == (None, 0.0, 0.0)
+
+
+def test_normalization_gain():
+    loud = normalization_gain(-9.0, 0.5)
+    assert abs(20 * math.log10(loud) - (CLIP_LOUDNESS_TARGET_DB + 9.0)) < 1e-6
+    quiet = normalization_gain(-60.0, 0.01)
+    assert abs(20 * math.log10(quiet) - CLIP_MAX_BOOST_DB) < 1e-6
+    peaky = normalization_gain(-30.0, 0.9)
+    assert abs(20 * math.log10(0.9 * peaky) - CLIP_PEAK_CEILING_DB) < 1e-6
+    assert normalization_gain(None, 0.0) == 1.0
+
+
+def test_library_index_adds_analysis_columns(tmp_path):
+    db_path = str(tmp_path / 'old.sqlite3')
+    old = sqlite3.connect(db_path)
+    old.execute("CREATE TABLE files (path TEXT PRIMARY KEY, dir TEXT NOT NULL, root TEXT NOT NULL, "
+                "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, probed INTEGER NOT NULL DEFAULT 0, "
+                "duration REAL, sample_rate INTEGER, channels INTEGER)")
+    old.close()
+    LibraryIndex(db_path).close()
+    connection = sqlite3.connect(db_path)
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(files)")}
+    connection.close()
+    assert {'analyzed', 'loudness_db', 'peak', 'start_offset'} <= columns
+
+
+@pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason=f"needs {FFMPEG_BINARY} on PATH")
+def test_library_index_analyzes_through_ffmpeg(tmp_path):
+    sounds = tmp_path / 'sounds'
+    sounds.mkdir()
+    path = str(sounds / 'tone.wav')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((make_clip() * 32767).astype(np.int16).tobytes())
+
+    index = LibraryIndex(str(tmp_path / 'library.sqlite3'))
+    try:
+        index.refresh(str(sounds))
+        index.probe_pending(str(sounds))
+        assert index.analyze_pending(str(sounds)) == 1
+        info = index.info(path)
+    finally:
+        index.close()
+    assert info['analyzed'] and abs(info['start_offset'] - EXPECTED_START) < 0.002
+    assert abs(info['loudness_db'] - EXPECTED_DB) < 0.5
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+
+from audio.clip_cache import ClipCache
+from audio.sample_formats import compact_clip
+
+CHANNELS = 2
+RATE = 48000
+FRAMES = 1000
+CLIP_BYTES = FRAMES * 2  # a mono compact clip
+
+
+def make_source(folder, name, content=b'not really audio'):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def clip(frames=FRAMES, seed=0):
+    return compact_clip(np.random.default_rng(seed).integers(-20000, 20000, frames).astype(np.int16), CHANNELS)
+
+
+def test_get_or_load_counts_hits_and_misses(tmp_path):
+    source = make_source(tmp_path, 'source.wav')
+    cache = ClipCache()
+    loads = []
+
+    def loader():
+        loads.append(source)
+        return clip()
+
+    first = cache.get_or_load(source, RATE, CHANNELS, loader)
+    assert cache.get_or_load(source, RATE, CHANNELS, loader) is first
+    assert len(loads) == 1
+    assert not first.flags.writeable  # shared with the mixer
+    assert cache.stats() == {'entries': 1, 'bytes': CLIP_BYTES, 'max_bytes': cache.max_bytes,
+                             'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_budget_evicts_least_recently_used(tmp_path):
+    keys = [ClipCache.make_key(make_source(tmp_path, f'{i}.wav'), RATE, CHANNELS) for i in range(4)]
+    cache = ClipCache(max_bytes=3 * CLIP_BYTES)
+    for key in keys[:3]:
+        cache.put(key, clip())
+    assert cache.get(keys[0]) is not None  # now the most recently used
+
+    cache.put(keys[3], clip())
+    assert keys[1] not in cache
+    assert all(key in cache for key in (keys[0], keys[2], keys[3]))
+    assert cache.current_bytes == 3 * CLIP_BYTES and cache.evictions == 1
+
+    cache.put(keys[1], clip())
+    assert keys[2] not in cache and cache.evictions == 2
+
+
+def test_clip_over_budget_is_not_cached(tmp_path):
+    key = ClipCache.make_key(make_source(tmp_path, 'long.wav'), RATE, CHANNELS)
+    cache = ClipCache(max_bytes=CLIP_BYTES)
+    cache.put(key, clip(FRAMES + 1))
+    assert key not in cache and cache.current_bytes == 0 and cache.evictions == 0
+
+
+def test_replacing_a_key_keeps_the_byte_count(tmp_path):
+    key = ClipCache.make_key(make_source(tmp_path, 'source.wav'), RATE, CHANNELS)
+    cache = ClipCache()
+    cache.put(key, clip())
+    cache.put(key, clip(2 * FRAMES))
+    assert len(cache) == 1 and cache.current_bytes == 2 * CLIP_BYTES
+
+
+def test_edited_file_drops_the_stale_decode(tmp_path):
+    source = make_source(tmp_path, 'source.wav')
+    old_key = ClipCache.make_key(source, RATE, CHANNELS)
+    other_format = ClipCache.make_key(source, 44100, CHANNELS)
+    cache = ClipCache()
+    cache.put(old_key, clip())
+    cache.put(other_format, clip())
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_key = ClipCache.make_key(source, RATE, CHANNELS)
+    assert new_key != old_key
+    assert cache.get(new_key) is None
+    cache.put(new_key, clip())
+
+    # The old decode can never be hit again; the one in another format still can
+    assert old_key not in cache
+    assert other_format in cache and new_key in cache
+    assert cache.current_bytes == 2 * CLIP_BYTES and cache.evictions == 0
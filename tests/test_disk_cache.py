@@ -0,0 +1,81 @@
+import json
+import os
+
+import numpy as np
+
+from audio.disk_cache import INDEX_FILE, DiskClipCache, save_clip, source_stamp, write_entry
+from audio.sample_formats import compact_clip
+
+CHANNELS = 2
+RATE = 48000
+
+
+def make_source(folder, name, content=b'not really audio'):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def clip(frames, seed=0):
+    return compact_clip(np.random.default_rng(seed).integers(-20000, 20000, frames).astype(np.int16), CHANNELS)
+
+
+def test_clips_load_back_compact(tmp_path):
+    source = make_source(tmp_path, 'source.wav')
+    mono = clip(4800)
+    cache = DiskClipCache(str(tmp_path / 'cache'))
+    cache.store(source, RATE, CHANNELS, mono)
+    loaded = cache.load(source, RATE, CHANNELS)
+    assert loaded is not None and loaded.dtype == np.int16 and loaded.shape == (4800, 1)
+    assert np.array_equal(loaded, mono)
+    del loaded  # release the memmap before the folder is removed
+
+
+def test_load_misses_unhashed_and_changed_files(tmp_path):
+    source = make_source(tmp_path, 'source.wav')
+    cache = DiskClipCache(str(tmp_path / 'cache'))
+    assert cache.load(source, RATE, CHANNELS) is None
+    assert cache.lookup_path(source, RATE, CHANNELS) is None  # load() did not hash it
+
+    cache.store(source, RATE, CHANNELS, clip(100))
+    make_source(tmp_path, 'source.wav', b'edited, and longer than before')
+    assert cache.load(source, RATE, CHANNELS) is None
+
+
+def test_worker_entries_are_found_after_flush(tmp_path):
+    source = make_source(tmp_path, 'source.wav')
+    cache_dir = str(tmp_path / 'cache')
+    cache = DiskClipCache(cache_dir)
+    # What a preload worker does, then what its owner does with the result
+    stamp = source_stamp(source)
+    entry = cache.entry_for(stamp[2], RATE, CHANNELS)
+    assert write_entry(entry, lambda path: save_clip(path, clip(100)), cache.max_bytes)
+    cache.record(source, *stamp)
+    cache.add_entry(entry)
+    assert cache.lookup(source, RATE, CHANNELS) == entry
+    assert not os.path.exists(os.path.join(cache_dir, INDEX_FILE))
+
+    cache.flush()
+    with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+        assert json.load(f)[os.path.abspath(source)]['hash'] == stamp[2]
+    reopened = DiskClipCache(cache_dir)
+    assert reopened.lookup(source, RATE, CHANNELS) == entry
+    assert reopened.total_bytes() == cache.total_bytes() == os.path.getsize(entry)
+
+
+def test_limit_evicts_least_recently_used(tmp_path):
+    sources = [make_source(tmp_path, f'{i}.wav', bytes([i]) * 10) for i in range(3)]
+    entry_bytes = None
+    cache = DiskClipCache(str(tmp_path / 'cache'))
+    for source in sources[:2]:
+        cache.store(source, RATE, CHANNELS, clip(1000))
+        entry_bytes = entry_bytes or cache.total_bytes()
+    cache.max_bytes = 2 * entry_bytes
+    assert cache.load(sources[0], RATE, CHANNELS) is not None  # now the most recently used
+
+    cache.store(sources[2], RATE, CHANNELS, clip(1000))
+    assert cache.lookup(sources[1], RATE, CHANNELS) is None
+    assert cache.lookup(sources[0], RATE, CHANNELS) is not None
+    assert cache.lookup(sources[2], RATE, CHANNELS) is not None
+    assert cache.total_bytes() == 2 * entry_bytes
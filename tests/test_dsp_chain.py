@@ -0,0 +1,107 @@
+import tracemalloc
+
+import numpy as np
+
+from audio import NOISE_GATE_HOLD_MS, NOISE_GATE_RELEASE_MS
+from audio.dsp_chain import DspChain, Gain, NoiseGate, SoftLimiter
+from audio.mix_engine import MixEngine
+
+SAMPLE_RATE = 48000
+FRAMES = 528
+CHANNELS = 2
+
+
+def test_gain_ramps_across_one_block():
+    chain = DspChain([Gain(1.0)], SAMPLE_RATE, CHANNELS, FRAMES)
+    block = np.ones((FRAMES, CHANNELS), dtype=np.float32)
+    chain.process(block)
+    assert np.all(block == 1.0)
+
+    chain.set_gain(0.5)
+    block.fill(1.0)
+    chain.process(block)
+    assert abs(block[-1, 0] - 0.5) < 1e-6 and block[0, 0] < 1.0
+    assert np.abs(np.diff(block[:, 0])).max() <= 0.5 / FRAMES + 1e-6
+    block.fill(1.0)
+    chain.process(block)
+    assert np.allclose(block, 0.5)
+
+
+def test_limiter_only_shapes_audio_over_its_threshold():
+    limiter = SoftLimiter()
+    chain = DspChain([limiter], SAMPLE_RATE, 1, 4096)
+    quiet = np.linspace(-limiter.threshold, limiter.threshold, 4096, dtype=np.float32).reshape(-1, 1)
+    block = quiet.copy()
+    chain.process(block)
+    assert np.array_equal(block, quiet)
+
+    loud = np.linspace(-4.0, 4.0, 4096, dtype=np.float32).reshape(-1, 1)
+    block = loud.copy()
+    chain.process(block)
+    assert np.abs(block).max() <= 1.0
+    assert np.all(np.diff(block[:, 0]) >= 0)
+    assert np.all(np.sign(block) == np.sign(loud))
+    under = np.abs(loud[:, 0]) <= limiter.threshold
+    assert np.array_equal(block[under], loud[under])
+
+
+def test_gate_closes_on_hiss_and_reopens_within_a_block():
+    gate = NoiseGate()
+    chain = DspChain([gate], SAMPLE_RATE, CHANNELS, FRAMES)
+    rng = np.random.default_rng(0)
+    tone = (0.1 * np.sin(np.arange(FRAMES) * 0.05)).astype(np.float32).reshape(-1, 1).repeat(CHANNELS, axis=1)
+    block = tone.copy()
+    chain.process(block)
+    assert gate.is_open and gate.gain == 1.0
+
+    closing_blocks = (NOISE_GATE_HOLD_MS + NOISE_GATE_RELEASE_MS) * SAMPLE_RATE // 1000 // FRAMES + 2
+    for _ in range(closing_blocks):
+        block = rng.uniform(-1e-4, 1e-4, (FRAMES, CHANNELS)).astype(np.float32)
+        chain.process(block)
+    assert not gate.is_open and gate.gain == 0.0 and not block.any()
+
+    block = tone.copy()
+    chain.process(block)
+    assert gate.is_open and abs(block[-1, 0] - tone[-1, 0]) < 1e-6
+
+
+def test_engine_runs_its_buses():
+    engine = MixEngine(SAMPLE_RATE, CHANNELS, FRAMES, output_format='float32')
+    engine.apply_command(('bus_gain', 'clips', 1.0))
+    clip = np.full((FRAMES * 8, CHANNELS), 0.6, dtype=np.float32)
+    for _ in range(4):
+        engine.play(clip)
+    engine.process(None, FRAMES)  # the clip bus ramps to 1.0 over this block
+    out = np.frombuffer(bytes(engine.process(None, FRAMES)), dtype=np.float32)
+    # Four stacked clips come out limited, not clipped
+    assert 0.9 < out.max() < 1.0
+    costs = engine.dsp_cost()
+    assert set(costs) == {'mic', 'clips', 'master'}
+    for nodes in costs.values():
+        for cost in nodes:
+            assert cost['blocks'] >= 2 and cost['mean_us'] > 0, cost['node']
+
+
+def test_chain_allocates_no_numpy_buffers():
+    rng = np.random.default_rng(1)
+    chain = DspChain([NoiseGate(), Gain(0.5), SoftLimiter()], SAMPLE_RATE, CHANNELS, FRAMES)
+    loud = rng.uniform(-2.0, 2.0, (FRAMES, CHANNELS)).astype(np.float32)
+    hiss = rng.uniform(-1e-4, 1e-4, (FRAMES, CHANNELS)).astype(np.float32)
+    block = np.empty_like(loud)
+
+    def tick(i):
+        np.copyto(block, loud if i % 40 < 20 else hiss)  # gate opening, holding and releasing
+        chain.set_gain(0.5 if i % 2 else 0.8)  # a ramp every block
+        chain.process(block[:FRAMES - i % 7])
+
+    for i in range(50):
+        tick(i)
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for i in range(200):
+            tick(i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak - before < block.nbytes
@@ -0,0 +1,120 @@
+import os
+import shutil
+
+import pytest
+
+from utils.library_index import LibraryIndex
+
+
+def touch(*parts):
+    path = os.path.join(*parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'not really audio')
+    return path
+
+
+@pytest.fixture
+def sounds(tmp_path):
+    root = str(tmp_path / 'sounds')
+    return {'root': root, 'top': touch(root, 'top.wav'), 'kick': touch(root, 'pack', 'kick.wav'),
+            'snare': touch(root, 'pack', 'deep', 'snare.mp3'), 'ignored': touch(root, 'pack', 'notes.txt')}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LibraryIndex(str(tmp_path / 'library.sqlite3'))
+    yield index
+    index.close()
+
+
+def test_refresh_indexes_the_tree(index, sounds):
+    root = sounds['root']
+    assert not index.knows(root)
+    added, removed = index.refresh(root)
+    assert sorted(added) == index.files(root) == sorted([sounds['top'], sounds['kick'], sounds['snare']])
+    assert removed == []
+    assert index.knows(root)
+    assert sorted(index.directories(root)) == sorted(
+        [root, os.path.join(root, 'pack'), os.path.join(root, 'pack', 'deep')])
+    assert index.refresh(root) == ([], [])
+
+
+def test_folder_inside_an_indexed_one(index, sounds):
+    index.refresh(sounds['root'])
+    pack = os.path.join(sounds['root'], 'pack')
+    assert index.knows(pack)
+    assert index.files(pack) == sorted([sounds['kick'], sounds['snare']])
+    assert index.refresh(pack) == ([], [])
+    assert index.files(sounds['root']) == sorted([sounds['top'], sounds['kick'], sounds['snare']])
+
+
+def test_folder_around_an_indexed_one(index, sounds):
+    pack = os.path.join(sounds['root'], 'pack')
+    index.refresh(pack)
+    added, _ = index.refresh(sounds['root'])
+    assert added == [sounds['top']]
+    assert index.files(sounds['root']) == sorted([sounds['top'], sounds['kick'], sounds['snare']])
+
+    # Re-listing the outer folder alone still notices the inner one going away
+    shutil.rmtree(pack)
+    _, removed = index.sync_dir(sounds['root'], sounds['root'])
+    assert sorted(removed) == sorted([sounds['kick'], sounds['snare']])
+    assert index.files(sounds['root']) == [sounds['top']]
+    assert not index.knows(pack)
+
+
+def test_sync_dir_adds_and_removes(index, sounds):
+    root = sounds['root']
+    index.refresh(root)
+    pack = os.path.join(root, 'pack')
+    os.remove(sounds['kick'])
+    clap = touch(pack, 'clap.ogg')
+    fresh = touch(pack, 'new', 'fresh.wav')
+    added, removed = index.sync_dir(root, pack)
+    assert sorted(added) == sorted([clap, fresh])
+    assert removed == [sounds['kick']]
+    assert index.files(root) == sorted([sounds['top'], clap, fresh, sounds['snare']])
+
+
+def test_edited_file_is_probed_again(index, sounds):
+    root = sounds['root']
+    index.refresh(root)
+    assert index.probe_pending(root) == 3
+    assert index.probe_pending(root) == 0
+    with open(sounds['kick'], 'ab') as f:
+        f.write(b'more')
+    assert index.sync_dir(root, os.path.dirname(sounds['kick'])) == ([], [])
+    assert index.info(sounds['kick'])['size'] == len(b'not really audiomore')
+    assert index.probe_pending(root) == 1
+
+
+def test_removing_a_subfolder(index, sounds):
+    root = sounds['root']
+    index.refresh(root)
+    deep = os.path.dirname(sounds['snare'])
+    shutil.rmtree(deep)
+    # A watcher reports the folder itself, or only its parent
+    assert index.sync_dir(root, deep) == ([], [sounds['snare']])
+    assert index.files(root) == sorted([sounds['top'], sounds['kick']])
+    assert deep not in index.directories(root)
+
+    shutil.rmtree(os.path.join(root, 'pack'))
+    assert index.sync_dir(root, root) == ([], [sounds['kick']])
+    assert index.files(root) == [sounds['top']]
+
+
+def test_missing_root_forgets_everything(index, sounds):
+    root = sounds['root']
+    index.refresh(root)
+    shutil.rmtree(root)
+    added, removed = index.refresh(root)
+    assert added == [] and sorted(removed) == sorted([sounds['top'], sounds['kick'], sounds['snare']])
+    assert not index.knows(root) and index.files(root) == []
+
+
+def test_sibling_with_a_common_prefix_is_not_under_root(index, tmp_path, sounds):
+    other = touch(str(tmp_path), 'sounds2', 'other.wav')
+    index.refresh(os.path.dirname(sounds['root']))
+    assert other not in index.files(sounds['root'])
+    assert index.files(os.path.dirname(other)) == [other]
@@ -0,0 +1,59 @@
+import tracemalloc
+
+import numpy as np
+
+from audio import AUDIO_PROCESS_INTERVAL_SEC, DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE
+from audio.mix_engine import MixEngine
+
+WARMUP_TICKS = 20
+TICKS = 500
+VOICES = 4
+
+
+def test_steady_state_ticks_allocate_no_numpy_buffers():
+    """No tick leaves a numpy allocation behind, and none makes a transient one as large as a block."""
+    frames = int(DEFAULT_SAMPLE_RATE * AUDIO_PROCESS_INTERVAL_SEC)
+    engine = MixEngine(DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, frames)
+    rng = np.random.default_rng(0)
+    clip = rng.uniform(-1, 1, (frames * (TICKS + WARMUP_TICKS + 10), DEFAULT_CHANNELS)).astype(np.float32)
+    for _ in range(VOICES):
+        engine.play(clip, gain=0.5)
+    mic_data = (rng.uniform(-1, 1, frames * DEFAULT_CHANNELS) * 32767).astype(np.int16).tobytes()
+    # Block sizes vary from tick to tick, as they do under pull scheduling
+    block_sizes = [frames // 2 + (i * 37) % (frames // 2 + 1) for i in range(TICKS)]
+    for _ in range(WARMUP_TICKS):
+        engine.process(mic_data)
+
+    numpy_only = [tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)]
+    tracemalloc.start()
+    worst = 0
+    try:
+        for block in block_sizes:
+            snapshot = tracemalloc.take_snapshot().filter_traces(numpy_only)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            engine.process(mic_data, block)
+            _, peak = tracemalloc.get_traced_memory()
+            worst = max(worst, peak - before)
+            allocated = tracemalloc.take_snapshot().filter_traces(numpy_only).compare_to(snapshot, 'traceback')
+            assert [stat for stat in allocated if stat.count_diff > 0] == []
+    finally:
+        tracemalloc.stop()
+    # Transient buffers are freed by the time of the snapshot, so the peak catches those
+    assert worst < frames * DEFAULT_CHANNELS * 4
+
+
+def test_voice_starts_at_its_offset():
+    engine = MixEngine(48000, 2, 512, mic_gain=0.0, music_gain=1.0, output_format='float32')
+    clip = np.random.default_rng(1).uniform(-0.5, 0.5, (4096, 2)).astype(np.float32)
+    engine.play(clip, gain=1.0, offset=1000)
+    first = np.frombuffer(bytes(engine.process(None, 512)), dtype=np.float32).reshape(-1, 2)
+    assert np.allclose(first, clip[1000:1512], atol=2 / 32768)
+
+
+def test_prepared_clip_plays_without_a_copy():
+    engine = MixEngine(48000, 2, 512)
+    compact = engine.prepare_clip(np.random.default_rng(2).uniform(-0.5, 0.5, (4096, 2)).astype(np.float32))
+    voice = engine.play(compact, gain=1.0)
+    assert engine.voices._voice_clip[voice] is compact
+
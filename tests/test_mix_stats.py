@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from audio import TRIGGER_PERCENTILES, TRIGGER_TIMEOUT_SEC
+from audio.mix_engine import MixEngine
+from audio.mix_stats import Histogram, MixStats, TriggerStats
+
+EDGES = (1, 2, 5, 10)
+RATE = 48000
+
+
+def histogram(*values):
+    hist = Histogram(EDGES)
+    for value in values:
+        hist.add(value)
+    return hist
+
+
+def test_empty_histogram():
+    hist = histogram()
+    assert hist.percentile(50) == hist.percentile(99) == 0.0
+    assert hist.to_dict() == {'edges': list(EDGES), 'counts': [0] * (len(EDGES) + 1), 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+
+
+def test_values_on_an_edge_go_in_its_bucket():
+    hist = histogram(1, 2, 2.5, 10, 10.5)
+    assert hist.counts == [1, 1, 1, 1, 1]
+
+
+def test_single_bucket_is_capped_at_the_largest_value():
+    hist = histogram(3, 3.5, 4)
+    assert hist.percentile(1) == hist.percentile(50) == hist.percentile(100) == 4
+    assert histogram(7).percentile(50) == 7
+
+
+def test_percentiles_take_the_upper_edge_of_their_bucket():
+    hist = histogram(*[0.5] * 90, *[4] * 9, 8)
+    assert hist.percentile(50) == hist.percentile(90) == 1
+    assert hist.percentile(95) == hist.percentile(99) == 5
+    assert hist.percentile(99.5) == hist.percentile(100) == 8
+
+
+def test_overflow_bucket_reports_the_max():
+    hist = histogram(0.5, 40, 250)
+    assert hist.counts[-1] == 2
+    assert hist.percentile(33) == 1  # rank 0.99 of 3
+    assert hist.percentile(50) == hist.percentile(99) == 250
+    assert hist.to_dict()['max'] == 250
+
+
+def test_trigger_latency_is_click_to_first_sample():
+    triggers = TriggerStats()
+    triggers.trigger(1, 10.0)
+    triggers.trigger(2, 10.001)
+    assert triggers.sounded([], 10.005) is None
+    # Handles that were never triggered (untimed plays) are ignored
+    assert triggers.sounded([99, 2], 10.013) == pytest.approx(0.012)
+    assert triggers.last_ms == pytest.approx(12.0)
+    report = triggers.to_dict()
+    assert (report['triggers'], report['sounded'], report['pending'], report['lost']) == (2, 1, 1, 0)
+    assert set(report['percentiles_ms']) == {f"p{p}" for p in TRIGGER_PERCENTILES}
+    assert report['percentiles_ms']['p50'] == pytest.approx(12.0)  # capped at the only value seen
+
+    assert triggers.sounded([1], 10.020) == pytest.approx(0.020)
+    assert triggers.to_dict()['pending'] == 0 and triggers.latency.total == 2
+
+
+def test_engine_reports_played_handles_as_sounded():
+    engine = MixEngine(RATE, 2, 512)
+    triggers = TriggerStats()
+    triggers.trigger(7, 1.0)
+    engine.play(engine.prepare_clip(np.full((4096, 2), 0.25, dtype=np.float32)), handle=7)
+    engine.process(None, 512)
+    assert engine.sounded == [7]
+    assert triggers.sounded(engine.sounded, 1.004) == pytest.approx(0.004)
+    engine.process(None, 512)
+    assert engine.sounded == []  # only the first block counts
+
+
+def test_triggers_that_never_sound_are_lost():
+    triggers = TriggerStats()
+    triggers.trigger(1, 0.0)
+    triggers.trigger(2, TRIGGER_TIMEOUT_SEC / 2)
+    triggers.trigger(3, TRIGGER_TIMEOUT_SEC + 1.0)  # handle 1 has timed out by now, handle 2 has not
+    assert triggers.lost == 1
+    assert triggers.sounded([1], TRIGGER_TIMEOUT_SEC + 1.1) is None
+    assert triggers.sounded([2, 3], TRIGGER_TIMEOUT_SEC + 1.1) == pytest.approx(TRIGGER_TIMEOUT_SEC / 2 + 1.1)
+    report = triggers.to_dict()
+    assert (report['triggers'], report['sounded'], report['pending'], report['lost']) == (3, 2, 0, 1)
+
+
+def test_sink_counters_are_kept_per_sink():
+    stats = MixStats(10.0, RATE)
+    stats.set_sinks(['speakers', 'cable'])
+    stats.sink_write(0, 100, 100)
+    stats.sink_write(0, 100, 40)
+    stats.sink_write(1, 100, -1)
+    stats.sink_fill(0, 480)
+    stats.sink_fill(0, 96)
+    stats.sink_queue(0, 96, 0)
+    stats.sink_queue(0, 0, 64)
+
+    speakers, cable = stats.snapshot()['sinks']
+    assert speakers['name'] == 'speakers'
+    assert (speakers['writes'], speakers['partial_writes'], speakers['write_errors'], speakers['bytes_carried']) == (2, 1, 0, 60)
+    assert (speakers['fill_last_ms'], speakers['fill_min_ms'], speakers['fill_ms']['max']) == (2.0, 2.0, 10.0)
+    assert (speakers['queue_last_ms'], speakers['overflows'], speakers['bytes_dropped']) == (0.0, 1, 64)
+    assert (cable['writes'], cable['partial_writes'], cable['write_errors'], cable['overflows']) == (1, 0, 1, 0)
+    assert sum(cable['fill_ms']['counts']) == 0
+
+    # A reopened sink starts over; the others keep counting
+    stats.replace_sink(1, 'headset')
+    speakers, headset = stats.snapshot()['sinks']
+    assert headset['name'] == 'headset' and headset['write_errors'] == 0
+    assert speakers['writes'] == 2
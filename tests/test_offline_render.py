@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from audio.offline_render import parse_trigger, read_wav, render_offline, write_wav
+
+RATE = 48000
+CHANNELS = 2
+BLOCK = 480
+
+
+def impulse(frames=64, channels=1):
+    clip = np.zeros((frames, channels), dtype=np.int16)
+    clip[0] = 16000
+    return clip
+
+
+@pytest.mark.parametrize('seconds', [0.0, 0.0101, 0.25, 1 / 3])
+def test_trigger_lands_on_its_exact_sample(seconds):
+    """Triggers between block boundaries start on their own sample, not the next block."""
+    mic = np.zeros((RATE // 2, 1), dtype=np.int16)
+    out = render_offline(mic, [(seconds, impulse(), 0.5)], RATE, CHANNELS, block_frames=BLOCK)
+    assert out.shape == (RATE // 2, CHANNELS)
+    sounding = np.flatnonzero(out[:, 0])
+    assert sounding[0] == round(seconds * RATE)
+    assert np.array_equal(out[:, 0], out[:, 1])  # the mono clip plays on both channels
+
+
+def test_triggers_in_one_block_and_past_the_mic():
+    mic = np.zeros((1000, CHANNELS), dtype=np.int16)
+    starts = [100, 130, 1200]  # two in the first block, one after the mic has ended
+    out = render_offline(mic, [(start / RATE, impulse(), 0.5) for start in starts], RATE, CHANNELS,
+                         block_frames=BLOCK)
+    # Rendering runs on, in whole blocks, until the last clip finishes
+    assert 1200 + 64 <= len(out) < 1200 + 64 + BLOCK
+    assert list(np.flatnonzero(out[:, 0])) == starts
+
+
+def test_mic_passes_through_and_wav_round_trips(tmp_path):
+    mic = (np.sin(np.arange(2000) / 20) * 8000).astype(np.int16)[:, None]
+    path = str(tmp_path / 'mic.wav')
+    write_wav(path, mic, RATE)
+    loaded, rate = read_wav(path)
+    assert rate == RATE and np.array_equal(loaded, mic)
+    out = render_offline(loaded, [], RATE, CHANNELS, block_frames=BLOCK)
+    assert out.shape == (2000, CHANNELS)
+    assert np.array_equal(out[:, 0], out[:, 1]) and np.abs(out[:, 0]).max() > 0
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('1.5:boom.wav', (1.5, 'boom.wav', 1.0)),
+    ('1.5:boom.wav:0.25', (1.5, 'boom.wav', 0.25)),
+    ('0:sounds/a:b.wav', (0.0, 'sounds/a:b.wav', 1.0)),
+    (r'2:C:\sounds\boom.wav', (2.0, r'C:\sounds\boom.wav', 1.0)),
+    (r'2:C:\sounds\boom.wav:0.8', (2.0, r'C:\sounds\boom.wav', 0.8)),
+    (r'0.5:D:\fx\1.wav:2', (0.5, r'D:\fx\1.wav', 2.0)),
+])
+def test_parse_trigger(spec, expected):
+    assert parse_trigger(spec) == expected
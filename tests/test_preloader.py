@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from audio.clip_cache import ClipCache
+from audio.disk_cache import DiskClipCache
+from audio.preloader import ClipPreloader
+from audio.sample_formats import compact_clip
+from utils.play_counts import PlayCounts
+
+CHANNELS = 2
+RATE = 48000
+FRAMES = 1000
+CLIP_BYTES = FRAMES * 2  # the stub decoder's mono compact clips
+
+
+class ManualPool:
+    """Stands in for the process pool: jobs run in the test's process, when the test says so."""
+
+    def __init__(self):
+        self.jobs = []
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.jobs.append((future, fn, args))
+        self.submitted.append(os.path.basename(args[0]))
+        return future
+
+    def run(self):
+        jobs, self.jobs = self.jobs, []
+        for future, fn, args in jobs:
+            if future.set_running_or_notify_cancel():
+                future.set_result(fn(*args))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.jobs = []
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Replace ffmpeg with a stub decoder; returns the files it was asked for."""
+    calls = []
+
+    def decode_clip(file_path, sample_rate, channels):
+        calls.append(os.path.basename(file_path))
+        return compact_clip(np.full(FRAMES, len(calls), dtype=np.int16), channels)
+
+    monkeypatch.setattr('audio.preloader.decode_clip', decode_clip)
+    return calls
+
+
+def make_sounds(folder, *names):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for name in names:
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as f:
+            f.write(path.encode())  # distinct contents, so distinct cache entries
+        paths.append(path)
+    return paths
+
+
+def make_preloader(tmp_path, max_bytes=10 * 1024 * 1024):
+    preloader = ClipPreloader(ClipCache(), DiskClipCache(str(tmp_path / 'cache')), workers=1, max_bytes=max_bytes)
+    preloader._executor = ManualPool()
+    return preloader
+
+
+def run_to_end(preloader):
+    while preloader.active:
+        preloader._executor.run()
+        preloader.poll()
+
+
+def cached(preloader, path):
+    return ClipCache.make_key(path, RATE, CHANNELS) in preloader.clip_cache
+
+
+def test_by_priority_orders_by_decayed_play_count(tmp_path):
+    counts_path = str(tmp_path / 'play_counts.json')
+    now = time.time()
+    paths = ['a.wav', 'b.wav', 'c.wav', 'd.wav', 'e.wav']
+    with open(counts_path, 'w') as f:
+        json.dump({os.path.abspath('b.wav'): {'count': 2, 'last_played': now},
+                   os.path.abspath('c.wav'): {'count': 1, 'last_played': now},
+                   # Played more, but long ago: 4 plays halved every 14 days for 70 days
+                   os.path.abspath('e.wav'): {'count': 4, 'last_played': now - 70 * 86400}}, f)
+    counts = PlayCounts(counts_path)
+    assert counts.score('e.wav', now) == pytest.approx(4 / 32)
+    # Unplayed clips keep their listing order at the end
+    assert counts.by_priority(paths) == ['b.wav', 'c.wav', 'e.wav', 'a.wav', 'd.wav']
+
+    counts.record('d.wav')
+    counts.record('d.wav')
+    counts.record('d.wav')
+    assert counts.by_priority(paths)[0] == 'd.wav'
+    assert PlayCounts(counts_path).count('d.wav') == 3
+
+
+def test_preloads_in_priority_order(tmp_path, decoded):
+    paths = make_sounds(str(tmp_path / 'sounds'), 'a.wav', 'b.wav', 'c.wav', 'd.wav', 'e.wav')
+    preloader = make_preloader(tmp_path)
+    progress = []
+    preloader.progress = lambda *report: progress.append(report)
+    order = [paths[i] for i in (3, 0, 4, 1, 2)]
+    preloader.start(order, RATE, CHANNELS)
+    assert preloader._executor.submitted == ['d.wav', 'a.wav']  # only IN_FLIGHT_PER_WORKER at a time
+
+    run_to_end(preloader)
+    assert decoded == preloader._executor.submitted == [os.path.basename(path) for path in order]
+    assert all(cached(preloader, path) for path in paths)
+    assert progress[-1] == (5, 5, 5 * CLIP_BYTES)
+
+    # Everything is on disk now: a fresh memory cache is filled without decoding again
+    again = make_preloader(tmp_path)
+    again.start(order, RATE, CHANNELS)
+    assert not again.active and again._executor.submitted == []
+    assert all(cached(again, path) for path in paths) and len(decoded) == 5
+
+
+def test_stops_at_the_byte_budget(tmp_path, decoded):
+    paths = make_sounds(str(tmp_path / 'sounds'), *(f'{i}.wav' for i in range(8)))
+    preloader = make_preloader(tmp_path, max_bytes=5 * CLIP_BYTES)
+    preloader.start(paths, RATE, CHANNELS)
+    run_to_end(preloader)
+    # The budget is checked before each submission, so the last pair in flight may overshoot it
+    assert decoded == ['0.wav', '1.wav', '2.wav', '3.wav', '4.wav', '5.wav']
+    assert [cached(preloader, path) for path in paths] == [True] * 6 + [False] * 2
+    assert preloader.done == preloader.total == 8
+
+
+def test_folder_switch_cancels_the_old_folder(tmp_path, decoded):
+    old = make_sounds(str(tmp_path / 'old'), 'a.wav', 'b.wav', 'c.wav')
+    new = make_sounds(str(tmp_path / 'new'), 'x.wav', 'y.wav')
+    preloader = make_preloader(tmp_path)
+    preloader.start(old, RATE, CHANNELS)
+    preloader.start(new, RATE, CHANNELS)
+    run_to_end(preloader)
+    # The old folder's decodes in flight were cancelled before they ran; the rest never started
+    assert decoded == ['x.wav', 'y.wav']
+    assert not any(cached(preloader, path) for path in old)
+    assert all(cached(preloader, path) for path in new)
+    assert (preloader.done, preloader.total) == (2, 2)
+
+
+def test_request_jumps_the_queue(tmp_path, decoded):
+    paths = make_sounds(str(tmp_path / 'sounds'), *(f'{i}.wav' for i in range(6)))
+    preloader = make_preloader(tmp_path)
+    preloader.start(paths, RATE, CHANNELS)
+    preloader.request(paths[5], RATE, CHANNELS)
+    preloader.request(paths[5], RATE, CHANNELS)  # asked twice, decoded once
+    assert preloader._executor.submitted == ['0.wav', '1.wav']  # both workers' slots are taken
+
+    preloader._executor.run()
+    preloader.poll()
+    assert preloader._executor.submitted == ['0.wav', '1.wav', '5.wav', '2.wav']
+    run_to_end(preloader)
+    assert decoded == ['0.wav', '1.wav', '5.wav', '2.wav', '3.wav', '4.wav']
+    # The requested clip was preloaded already by the time the queue reached it
+    assert (preloader.done, preloader.total) == (6, 6)
+
+
+def test_request_in_another_format_cancels_the_run(tmp_path, decoded):
+    paths = make_sounds(str(tmp_path / 'sounds'), 'a.wav', 'b.wav', 'c.wav')
+    preloader = make_preloader(tmp_path)
+    preloader.start(paths, RATE, CHANNELS)
+    preloader.request(paths[2], 44100, CHANNELS)
+    run_to_end(preloader)
+    assert decoded == ['c.wav']
+    assert ClipCache.make_key(paths[2], 44100, CHANNELS) in preloader.clip_cache
@@ -0,0 +1,73 @@
+import pytest
+
+from audio.pull_scheduler import PullScheduler
+
+RATE = 48000
+TARGET = 384  # 8 ms
+MAX_BLOCK = 960  # 20 ms
+MAX_BACKLOG = 1440  # 30 ms
+POLL_SEC = 0.002
+
+
+def scheduler():
+    return PullScheduler(RATE, TARGET, MAX_BLOCK, MAX_BACKLOG)
+
+
+def test_renders_up_to_the_target_fill():
+    pull = scheduler()
+    assert pull.plan(0, 0, now=0.0)[0] == TARGET
+    assert pull.plan(300, 84, now=0.002) == (84, 0)
+    assert pull.plan(TARGET, 0, now=0.004)[0] == 0
+    assert pull.plan(TARGET + 500, 0, now=0.006)[0] == 0  # an over-full sink renders nothing
+
+    big = PullScheduler(RATE, 4000, MAX_BLOCK, MAX_BACKLOG)
+    assert big.plan(0, MAX_BLOCK, now=0.0) == (MAX_BLOCK, 0)  # one block at most per poll
+    assert pull.frames_rendered == TARGET + 84
+    assert (pull.sink_fill_min, pull.sink_fill_max, pull.sink_fill_frames) == (0, TARGET + 500, TARGET + 500)
+
+
+def test_input_backlog_is_skipped_down_to_half_the_limit():
+    pull = scheduler()
+    frames, skip = pull.plan(0, TARGET + MAX_BACKLOG, now=0.0)
+    assert (frames, skip) == (TARGET, 0)  # at the limit is still fine
+    assert pull.input_backlog_frames == MAX_BACKLOG
+
+    frames, skip = pull.plan(0, TARGET + MAX_BACKLOG + 1, now=0.002)
+    assert skip == MAX_BACKLOG + 1 - MAX_BACKLOG // 2
+    assert pull.input_backlog_frames == MAX_BACKLOG // 2
+    assert pull.frames_skipped == skip and pull.frames_padded == 0
+
+
+def test_missing_input_is_counted_as_padded():
+    pull = scheduler()
+    assert pull.plan(0, 100, now=0.0) == (TARGET, 0)
+    assert pull.frames_padded == TARGET - 100 and pull.input_backlog_frames == 0
+    pull.plan(TARGET - 50, 0, now=0.002)
+    assert pull.frames_padded == TARGET - 100 + 50
+    assert pull.stats()['input_frames_padded'] == pull.frames_padded
+
+
+@pytest.mark.parametrize('device_ppm', [0.0, 150.0, -300.0])
+def test_drift_tracks_the_sink_clock(device_ppm):
+    """A sink draining slightly fast or slow shows up as that many ppm once the prefill is discounted."""
+    pull = scheduler()
+    device_rate = RATE * (1 + device_ppm * 1e-6)
+    queued = 0.0
+    now = 0.0
+    assert pull.drift_ppm(now=now) == 0.0  # no polls yet
+    for poll in range(int(10 / POLL_SEC)):
+        if poll:
+            now += POLL_SEC
+            queued -= device_rate * POLL_SEC
+        frames, _ = pull.plan(queued, 10 ** 6, now=now)
+        queued += frames
+    assert pull.drift_ppm(now=now) == pytest.approx(device_ppm, abs=1.0)
+
+
+def test_drift_needs_a_second_of_history():
+    pull = scheduler()
+    pull.plan(0, 0, now=100.0)
+    pull.plan(0, 0, now=100.5)
+    assert pull.drift_ppm(now=100.9) == 0.0
+    pull.reset()
+    assert pull.polls == 0 and pull.drift_ppm(now=200.0) == 0.0
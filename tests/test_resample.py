@@ -0,0 +1,72 @@
+import os
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+from audio import FFMPEG_BINARY, INT16_SCALE
+from audio.resample import resample
+from audio.stream_decoder import decode_file
+
+RATE_PAIRS = ((44100, 48000), (22050, 48000), (96000, 48000), (48000, 44100), (32000, 48000), (8000, 48000))
+MAX_ERROR_DB = -90.0  # sine error relative to full scale
+MAX_ALIAS_DB = -80.0  # energy left from a tone the target rate can't hold
+EDGE_FRAMES = 200
+AMPLITUDE = 0.9  # sources are int16 files: loud enough for their rounding to stay near -100 dB
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason=f"needs {FFMPEG_BINARY} on PATH")
+
+
+def sine(freq, rate, frames):
+    return np.sin(2 * np.pi * freq * np.arange(frames) / rate)
+
+
+def rms_db(x):
+    return 20 * np.log10(np.sqrt(np.mean(np.square(x))) / np.sqrt(0.5) + 1e-12)
+
+
+def write_wav(path, samples, rate):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.round(samples * INT16_SCALE).astype('<i2').tobytes())
+
+
+def ffmpeg_resample(folder, samples, src_rate, dst_rate):
+    path = os.path.join(folder, f"source_{src_rate}.wav")
+    write_wav(path, samples * AMPLITUDE, src_rate)
+    return decode_file(path, dst_rate, 1)[:, 0] / AMPLITUDE
+
+
+@pytest.mark.parametrize('src_rate, dst_rate', RATE_PAIRS)
+def test_resample_accuracy(src_rate, dst_rate):
+    for freq in (1000.0, 0.4 * min(src_rate, dst_rate)):
+        y = resample(sine(freq, src_rate, 2 * src_rate).astype(np.float32), src_rate, dst_rate)
+        assert len(y) == 2 * dst_rate
+        error = y - sine(freq, dst_rate, len(y))
+        assert rms_db(error[EDGE_FRAMES:-EDGE_FRAMES]) <= MAX_ERROR_DB, freq
+
+    if src_rate > dst_rate:
+        # Halfway between the two Nyquist frequencies
+        tone = (src_rate + dst_rate) / 4
+        alias = resample(sine(tone, src_rate, 2 * src_rate).astype(np.float32), src_rate, dst_rate)
+        assert rms_db(alias[EDGE_FRAMES:-EDGE_FRAMES]) <= MAX_ALIAS_DB
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize('src_rate, dst_rate', RATE_PAIRS)
+def test_ffmpeg_resample_accuracy(tmp_path, src_rate, dst_rate):
+    """Clips decoded through ffmpeg are resampled as accurately as audio.resample does it."""
+    for freq in (1000.0, 0.4 * min(src_rate, dst_rate)):
+        y = ffmpeg_resample(str(tmp_path), sine(freq, src_rate, 2 * src_rate), src_rate, dst_rate)
+        assert len(y) == 2 * dst_rate
+        error = y - sine(freq, dst_rate, len(y))
+        assert rms_db(error[EDGE_FRAMES:-EDGE_FRAMES]) <= MAX_ERROR_DB, freq
+
+    if src_rate > dst_rate:
+        # Halfway between the two Nyquist frequencies
+        tone = (src_rate + dst_rate) / 4
+        alias = ffmpeg_resample(str(tmp_path), sine(tone, src_rate, 2 * src_rate), src_rate, dst_rate)
+        assert rms_db(alias[EDGE_FRAMES:-EDGE_FRAMES]) <= MAX_ALIAS_DB
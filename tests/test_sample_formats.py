@@ -0,0 +1,129 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from audio import INT16_SCALE
+from audio.sample_formats import (DECODERS, ENCODERS, SAMPLE_DTYPES, SAMPLE_FORMATS, InputConverter,
+                                  OutputConverter, compact_clip)
+
+FRAMES = 528
+CHANNELS = 2
+
+# raw samples -> expected float32
+DECODED = {
+    'uint8': ([0, 128, 255], [-1.0, 0.0, 127 / 128]),
+    'int16': ([-32768, 0, 32767], [-1.0, 0.0, 32767 / 32768]),
+    'int32': ([-2 ** 31, 0, 2 ** 31 - 1], [-1.0, 0.0, 1.0]),
+    'float32': ([-1.0, 0.0, 0.25], [-1.0, 0.0, 0.25]),
+}
+# float32 in [-1, 1] -> expected raw samples
+ENCODED = {
+    'uint8': [1, 128, 255, 191],
+    'int16': [-32767, 0, 32767, 16383],
+    'int32': [-2147483520, 0, 2147483520, 1073741760],
+    'float32': [-1.0, 0.0, 1.0, 0.5],
+}
+# worst round-trip error in float terms
+TOLERANCE = {'uint8': 2 / 128, 'int16': 2 / 32768, 'int32': 2.0 ** -22, 'float32': 0.0}
+
+
+@pytest.mark.parametrize('name', SAMPLE_FORMATS)
+def test_kernels_match_known_values(name):
+    dtype = SAMPLE_DTYPES[name]
+    raw, expected = DECODED[name]
+    out = np.zeros(len(raw), dtype=np.float32)
+    DECODERS[name](np.array(raw, dtype=dtype), out)
+    assert np.allclose(out, expected, rtol=0, atol=1e-7)
+
+    encoded = np.zeros(4, dtype=dtype)
+    ENCODERS[name](np.array([-1.0, 0.0, 1.0, 0.5], dtype=np.float32), encoded)
+    assert np.array_equal(encoded, np.array(ENCODED[name], dtype=dtype))
+
+
+@pytest.mark.parametrize('name', SAMPLE_FORMATS)
+def test_round_trip_is_within_a_step(name):
+    block = np.random.default_rng(0).uniform(-1, 1, FRAMES * 2).astype(np.float32)
+    samples = np.zeros(block.size, dtype=SAMPLE_DTYPES[name])
+    ENCODERS[name](block.copy(), samples)
+    back = np.zeros(block.size, dtype=np.float32)
+    DECODERS[name](samples, back)
+    assert np.max(np.abs(back - block)) <= TOLERANCE[name]
+
+
+@pytest.mark.parametrize('src_channels,mix_channels', [(1, 2), (2, 1), (4, 2), (2, 4), (2, 2)])
+def test_channel_maps(src_channels, mix_channels):
+    block = np.random.default_rng(1).uniform(-0.5, 0.5, (FRAMES, src_channels)).astype(np.float32)
+    if mix_channels == src_channels:
+        expected = block
+    elif src_channels == 1:
+        expected = np.repeat(block, mix_channels, axis=1)
+    elif mix_channels == 1:
+        expected = block.mean(axis=1, keepdims=True)
+    else:
+        expected = np.zeros((FRAMES, mix_channels), dtype=np.float32)
+        shared = min(src_channels, mix_channels)
+        expected[:, :shared] = block[:, :shared]
+
+    converter = InputConverter('float32', src_channels, mix_channels, FRAMES)
+    out = np.zeros((FRAMES, mix_channels), dtype=np.float32)
+    assert converter.convert(block.tobytes(), out) == FRAMES
+    assert np.allclose(out, expected, atol=1e-6)
+
+    converter = OutputConverter('float32', src_channels, mix_channels, FRAMES)
+    data = converter.convert(block.copy())
+    out = np.frombuffer(bytes(data), dtype=np.float32).reshape(-1, mix_channels)
+    assert np.allclose(out, expected, atol=1e-6)
+
+
+def test_partial_frames_are_left_for_the_next_read():
+    converter = InputConverter('int16', 2, 2, FRAMES)
+    out = np.zeros((FRAMES, 2), dtype=np.float32)
+    assert converter.convert(np.arange(11, dtype=np.int16).tobytes()[:21], out) == 5  # 5 frames and a byte
+    assert np.array_equal(out[:5].reshape(-1) * 32768, np.arange(10))
+
+
+@pytest.mark.parametrize('name', SAMPLE_FORMATS)
+@pytest.mark.parametrize('channels', [1, 2])
+def test_conversions_allocate_no_numpy_buffers(name, channels):
+    capture = InputConverter(name, channels, 2, FRAMES)
+    sink = OutputConverter(name, 2, channels, FRAMES)
+    mix = np.zeros((FRAMES, 2), dtype=np.float32)
+    raw = np.zeros(FRAMES * channels, dtype=SAMPLE_DTYPES[name]).tobytes()
+    clipped = np.random.default_rng(2).uniform(-1, 1, (FRAMES, 2)).astype(np.float32)
+    scratch = clipped.copy()
+    for _ in range(3):
+        capture.convert(raw, mix)
+        np.copyto(scratch, clipped)
+        sink.convert(scratch)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(50):
+            capture.convert(raw, mix)
+            np.copyto(scratch, clipped)
+            sink.convert(scratch)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak - before < FRAMES * 2 * 4
+
+
+def test_compact_clip():
+    rng = np.random.default_rng(0)
+    mono = rng.integers(-30000, 30000, 1000).astype(np.int16)
+    stereo = rng.integers(-30000, 30000, (1000, 2)).astype(np.int16)
+
+    assert compact_clip(mono, CHANNELS).shape == (1000, 1)
+    doubled = compact_clip(np.repeat(mono[:, None], 2, axis=1), CHANNELS)
+    assert doubled.shape == (1000, 1) and np.array_equal(doubled[:, 0], mono)
+    assert compact_clip(stereo, CHANNELS) is stereo
+    assert np.array_equal(compact_clip(np.hstack([stereo, stereo]), CHANNELS), stereo)
+    padded = compact_clip(stereo, 4)
+    assert padded.shape == (1000, 4) and not padded[:, 2:].any()
+
+    floats = rng.uniform(-1.2, 1.2, (1000, 2)).astype(np.float32)
+    quantized = compact_clip(floats, CHANNELS)
+    assert quantized.dtype == np.int16
+    assert np.abs(quantized / INT16_SCALE - np.clip(floats, -1, 1)).max() <= 2 / INT16_SCALE
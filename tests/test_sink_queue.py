@@ -0,0 +1,76 @@
+import numpy as np
+
+from audio.sink_queue import SinkQueue
+
+CHANNELS = 2
+FRAME_BYTES = CHANNELS * 2
+BLOCK_FRAMES = 528  # one 11ms tick at 48kHz
+BLOCK_BYTES = BLOCK_FRAMES * FRAME_BYTES
+TICKS = 400
+QUEUE_BLOCKS = 4
+EXPECTED = np.arange(TICKS * BLOCK_FRAMES) % 32768
+
+
+class FakeSink:
+    """A QIODevice-like sink that accepts at most `accepts(tick)` bytes per tick."""
+
+    def __init__(self, accepts):
+        self.accepts = accepts
+        self.tick = 0
+        self.budget = 0
+        self.received = bytearray()
+
+    def start_tick(self):
+        self.budget = self.accepts(self.tick)
+        self.tick += 1
+
+    def write(self, data):
+        if self.budget < 0:
+            return -1
+        count = min(len(data), self.budget)
+        self.received += bytes(data[:count])
+        self.budget -= count
+        return count
+
+
+def block(tick):
+    """BLOCK_FRAMES frames whose samples are their running frame number (mod 2**15), in both channels."""
+    numbers = (np.arange(BLOCK_FRAMES) + tick * BLOCK_FRAMES) % 32768
+    return np.repeat(numbers, CHANNELS).astype(np.int16).tobytes()
+
+
+def received_frames(sink):
+    usable = len(sink.received) - len(sink.received) % FRAME_BYTES
+    frames = np.frombuffer(bytes(sink.received[:usable]), dtype=np.int16).reshape(-1, CHANNELS)
+    assert np.all(frames[:, 0] == frames[:, 1]), "a sink received a torn frame"
+    return frames[:, 0].astype(np.int64)
+
+
+def run_sinks(sinks):
+    """Feed the same blocks to every sink through its own SinkQueue, as mix_audio does; returns bytes dropped per sink."""
+    queues = [SinkQueue(BLOCK_BYTES * QUEUE_BLOCKS, FRAME_BYTES, policy) for _, policy in sinks]
+    dropped = [0] * len(sinks)
+    for tick in range(TICKS):
+        mixed = block(tick)
+        for index, ((sink, _), queue) in enumerate(zip(sinks, queues)):
+            sink.start_tick()
+            dropped[index] += queue.push(mixed)
+            queue.drain(sink)
+    return dropped
+
+
+def test_fast_and_uneven_sinks_lose_nothing_beside_slow_ones():
+    fast = FakeSink(lambda tick: BLOCK_BYTES * 2)
+    uneven = FakeSink(lambda tick: BLOCK_BYTES + (7 if tick % 2 else -7))
+    slow = FakeSink(lambda tick: BLOCK_BYTES // 2)
+    stalled = FakeSink(lambda tick: BLOCK_BYTES * 2 if tick < 50 or tick > 300 else (-1 if tick % 3 else 0))
+    dropped = run_sinks([(fast, 'drop_oldest'), (uneven, 'drop_oldest'), (slow, 'drop_oldest'),
+                         (stalled, 'drop_newest')])
+
+    assert np.array_equal(received_frames(fast), EXPECTED)
+    uneven_frames = received_frames(uneven)
+    assert dropped[1] == 0 and np.array_equal(uneven_frames, EXPECTED[:len(uneven_frames)])
+    for sink, lost in ((slow, dropped[2]), (stalled, dropped[3])):
+        # Overflow drops whole frames and keeps the rest in order
+        assert lost and lost % FRAME_BYTES == 0
+        assert not np.any(np.diff(received_frames(sink)) % 32768 == 0)
@@ -0,0 +1,42 @@
+import os
+
+from utils.sound_search import SoundSearchIndex
+
+FOLDER = os.path.abspath(os.sep + 'sounds')
+NAMES = ['airhorn.mp3', 'big airhorn.wav', 'kick drum.wav', 'drums/kick 2.wav', 'pack_042/boom.ogg',
+         'pack_042/airhorn boom.mp3', 'snare.wav', 'Ünïcode airhorn.flac']
+QUERIES = ['a', 'air', 'airhorn', 'kick', 'drum', 'pack_042 boom', 'boom', 'k d', 'unicode', 'zzzz']
+
+
+def paths_of(names):
+    return sorted(os.path.join(FOLDER, name) for name in names)
+
+
+def ranked(index, query):
+    return [index.paths[i] for i in index.search(query)]
+
+
+def test_search_ranks_name_starts_first():
+    index = SoundSearchIndex(FOLDER, paths_of(NAMES))
+    assert ranked(index, 'airhorn') == paths_of(['airhorn.mp3', 'pack_042/airhorn boom.mp3']) + paths_of(
+        ['big airhorn.wav', 'Ünïcode airhorn.flac'])
+    assert ranked(index, 'zzzz') == []
+    assert len(index.search('')) == len(NAMES)
+
+
+def test_added_and_removed_files_match_a_rebuilt_index():
+    index = SoundSearchIndex(FOLDER, paths_of(NAMES[:5]))
+    index.add(paths_of(NAMES[5:]))
+    index.remove(paths_of(['kick drum.wav', 'snare.wav']))
+    index.add(paths_of(['kick drum.wav']))
+    expected = SoundSearchIndex(FOLDER, paths_of(NAMES[:2] + NAMES[3:6] + NAMES[7:] + ['kick drum.wav']))
+
+    assert index.pending_changes == 5
+    assert len(index) == len(expected)
+    for query in QUERIES:
+        got = ranked(index, query)
+        want = ranked(expected, query)
+        assert sorted(got) == sorted(want), query
+        # Added files come after the indexed ones of the same tier, so compare tiers by name start
+        starts = [os.path.basename(path).lower().startswith(query.split()[0]) for path in got]
+        assert starts == sorted(starts, reverse=True), query
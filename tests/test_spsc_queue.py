@@ -0,0 +1,63 @@
+import threading
+import time
+
+from audio.spsc_queue import SpscQueue
+
+CAPACITY = 4
+
+
+def test_empty_queue_pops_none():
+    queue = SpscQueue(CAPACITY)
+    assert queue.pop() is None and len(queue) == 0
+    queue.push('a')
+    assert queue.pop() == 'a'
+    assert queue.pop() is None and len(queue) == 0
+
+
+def test_full_queue_rejects_pushes():
+    queue = SpscQueue(CAPACITY)
+    assert all(queue.push(i) for i in range(CAPACITY))
+    assert len(queue) == CAPACITY
+    assert not queue.push('dropped')
+    assert [queue.pop() for _ in range(CAPACITY)] == list(range(CAPACITY))
+    assert queue.pop() is None
+
+
+def test_wraps_around_in_order():
+    queue = SpscQueue(CAPACITY)
+    expected = []
+    popped = []
+    for i in range(5 * CAPACITY + 3):
+        assert queue.push(i)
+        expected.append(i)
+        if i % 3 != 0:  # pop a little less often than pushing, so the fill level moves around the ring
+            popped.append(queue.pop())
+        if len(queue) == CAPACITY:
+            popped.extend(queue.pop() for _ in range(CAPACITY))
+        assert len(queue) == len(expected) - len(popped)
+    while len(queue):
+        popped.append(queue.pop())
+    assert popped == expected
+    assert queue._items == [None] * (CAPACITY + 1)  # popped items are not kept alive
+
+
+def test_producer_and_consumer_threads():
+    queue = SpscQueue(CAPACITY)
+    count = 5000
+    received = []
+
+    def produce():
+        for i in range(count):
+            while not queue.push(i):
+                time.sleep(0)  # let the consumer run
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while len(received) < count:
+        item = queue.pop()
+        if item is None:
+            time.sleep(0)
+        else:
+            received.append(item)
+    producer.join()
+    assert received == list(range(count))
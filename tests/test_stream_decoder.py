@@ -0,0 +1,148 @@
+import os
+import shutil
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+from numpy.lib import format as npy_format
+
+from audio import AUDIO_PROCESS_INTERVAL_SEC, DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, FFMPEG_BINARY, INT16_SCALE
+from audio.disk_cache import DiskClipCache
+from audio.mix_engine import MixEngine
+from audio.stream_decoder import MappedClip, StreamingClip, decode_clip, decode_file, decode_to_npy
+
+MAX_COPIES = 1.3  # the decode and the compact clip, plus bytearray over-allocation and one read chunk
+STREAM_SECONDS = 120
+LONG_CLIP_MB = 256  # mapped playback must stay well under this resident
+RSS_BOUND_BYTES = 64 * 1024 * 1024
+READ_FRAMES = DEFAULT_SAMPLE_RATE // 4  # large blocks, so the whole clip plays in well under a second
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason=f"needs {FFMPEG_BINARY} on PATH")
+
+
+def resident_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def write_long_clip(path):
+    """Write about LONG_CLIP_MB of int16 stereo noise as a .npy, a second at a time."""
+    second = np.random.default_rng(1).integers(-20000, 20000, (DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)).astype(np.int16)
+    seconds = LONG_CLIP_MB * 1024 ** 2 // second.nbytes
+    header = {'descr': npy_format.dtype_to_descr(second.dtype), 'fortran_order': False,
+              'shape': (seconds * DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)}
+    with open(path, 'wb') as f:
+        npy_format.write_array_header_1_0(f, header)
+        for _ in range(seconds):
+            f.write(second.data)
+
+
+def make_tone(path, seconds, *args):
+    subprocess.run([FFMPEG_BINARY, '-v', 'error', '-y', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+                    '-ac', '2', *args, path], check=True)
+
+
+@needs_ffmpeg
+def test_clip_loading_peaks_at_about_one_copy(tmp_path):
+    """The int16 decode plus the compact clip kept from it (mono here), not a chain of float32 copies."""
+    path = str(tmp_path / 'clip.mp3')
+    make_tone(path, 60, '-ar', '44100', '-b:a', '192k')
+    engine = MixEngine(DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, 1024)
+    tracemalloc.start()
+    try:
+        clip = engine.prepare_clip(decode_clip(path, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak / (len(clip) * DEFAULT_CHANNELS * 2 + clip.nbytes) <= MAX_COPIES
+
+
+@needs_ffmpeg
+def test_streaming_memory_is_bounded(tmp_path):
+    path = str(tmp_path / 'long.mp3')
+    make_tone(path, STREAM_SECONDS, '-b:a', '128k')
+    block = np.zeros((int(DEFAULT_SAMPLE_RATE * AUDIO_PROCESS_INTERVAL_SEC), DEFAULT_CHANNELS), dtype=np.float32)
+    tracemalloc.start()
+    try:
+        clip = StreamingClip.from_file(path, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)
+        played = 0
+        while not clip.finished:
+            got = clip.read_into(block)
+            if got == 0:
+                time.sleep(0.001)
+            played += got
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert played >= (STREAM_SECONDS - 1) * DEFAULT_SAMPLE_RATE
+    assert peak < played * DEFAULT_CHANNELS * 4 / 10
+
+
+@needs_ffmpeg
+def test_decode_to_npy_entry_matches_decode_file(tmp_path):
+    source = str(tmp_path / 'tone.mp3')
+    make_tone(source, 5)
+    cache = DiskClipCache(str(tmp_path / 'cache'))
+    entry = cache.entry_path(source, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)
+    assert cache.store_file(entry, lambda path: decode_to_npy(source, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, path))
+
+    mapped = cache.load(source, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS)
+    whole = decode_file(source, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, sample_format='int16')
+    assert isinstance(mapped, np.memmap)
+    assert mapped.shape == whole.shape and np.array_equal(mapped, whole)
+    del mapped
+
+
+def test_failed_write_is_not_stored(tmp_path):
+    cache = DiskClipCache(str(tmp_path))
+    entry = str(tmp_path / 'broken.npy')
+    assert not cache.store_file(entry, lambda path: 0)
+    assert os.listdir(tmp_path) == []
+    assert cache.total_bytes() == 0
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+def test_mapped_clip_plays_from_an_offset(channels):
+    clip = np.random.default_rng(0).integers(-30000, 30000, (10000, channels)).astype(np.int16)
+    block = np.empty((528, DEFAULT_CHANNELS), dtype=np.float32)
+    mapped = MappedClip(clip, DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, offset=1234, release_seconds=0.01)
+    played = []
+    while not mapped.finished:
+        got = mapped.read_into(block)
+        played.append(block[:got].copy())
+    expected = np.broadcast_to(clip[1234:] / np.float32(INT16_SCALE), (len(clip) - 1234, DEFAULT_CHANNELS))
+    assert np.array_equal(np.concatenate(played), expected)
+    # A finished clip pads with silence
+    assert mapped.read_into(block) == 0 and not block.any()
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="needs /proc/self/statm")
+def test_mapped_playback_keeps_resident_memory_bounded(tmp_path):
+    """Playing a long mapped clip to the end drops the pages it played; a plain memmap keeps them all."""
+    path = str(tmp_path / 'long.npy')
+    write_long_clip(path)
+    block = np.empty((READ_FRAMES, DEFAULT_CHANNELS), dtype=np.float32)
+
+    clip = np.load(path, mmap_mode='r')
+    baseline = resident_bytes()
+    mapped = MappedClip(clip, DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE)
+    growth = 0
+    reads = 0
+    while mapped.read_into(block):
+        reads += 1
+        if reads % 16 == 0:
+            growth = max(growth, resident_bytes() - baseline)
+    del mapped, clip
+    assert reads * READ_FRAMES * DEFAULT_CHANNELS * 2 >= LONG_CLIP_MB * 1024 ** 2 * 0.99
+    assert growth < RSS_BOUND_BYTES
+
+    # The same reads through a plain memmap, to show the bound means something here
+    clip = np.load(path, mmap_mode='r')
+    baseline = resident_bytes()
+    for start in range(0, len(clip), READ_FRAMES):
+        np.copyto(block[:len(clip) - start], clip[start:start + READ_FRAMES], casting='unsafe')
+    naive = resident_bytes() - baseline
+    del clip
+    assert naive > 2 * RSS_BOUND_BYTES
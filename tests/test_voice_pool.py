@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from audio import INT16_SCALE
+from audio.sample_formats import compact_clip
+from audio.voice_pool import VoicePool
+
+CHANNELS = 2
+FRAMES = 528
+TOLERANCE = 1e-6  # the pool and the reference both read the same int16 samples
+
+
+def reference_mix(plays, total_frames):
+    """Float32 mix of (clip, gain, offset, start_frame) with mono clips spread to every channel."""
+    out = np.zeros((total_frames, CHANNELS), dtype=np.float32)
+    for clip, gain, offset, start in plays:
+        audio = clip[offset:].astype(np.float32) / INT16_SCALE
+        if audio.shape[1] == 1:
+            audio = np.repeat(audio, CHANNELS, axis=1)
+        end = min(total_frames, start + len(audio))
+        out[start:end] += gain * audio[:end - start]
+    return out
+
+
+@pytest.mark.parametrize('ring_frames, refill_frames, block_frames', [
+    (24000, 8000, (FRAMES,)),
+    (1500, 400, (FRAMES,)),  # rings wrap and refill many times per clip
+    (1500, 400, (FRAMES, 97, 1300, 2500, FRAMES)),  # odd blocks, some too large for the rings
+])
+def test_pool_matches_a_float32_reference_mix(ring_frames, refill_frames, block_frames):
+    rng = np.random.default_rng(1)
+
+    def clip(frames, channels):
+        return compact_clip(rng.integers(-20000, 20000, (frames, channels)).astype(np.int16), CHANNELS)
+
+    clips = [clip(5000, 1), clip(3000, 2), clip(9000, 1), clip(700, 2), clip(12000, 2)]
+    pool = VoicePool(CHANNELS, max_voices=8, ring_frames=ring_frames, refill_frames=refill_frames)
+    schedule = {0: [(0, 0.5, 0), (1, 0.8, 100)], 4: [(2, 0.3, 0)], 9: [(3, 1.0, 50), (0, 0.25, 4000)],
+                15: [(4, 0.4, 0)], 22: [(1, 0.6, 0), (2, 0.7, 8000)], 30: [(4, 0.2, 1000), (3, 0.9, 0)]}
+    blocks = 60
+    sizes = [block_frames[block % len(block_frames)] for block in range(blocks)]
+    starts = np.cumsum([0] + sizes)
+    plays = []
+    mixed = np.zeros((starts[-1], CHANNELS), dtype=np.float32)
+    for block in range(blocks):
+        for index, gain, offset in schedule.get(block, ()):
+            pool.play(clips[index], gain, offset=offset)
+            plays.append((clips[index], gain, offset, starts[block]))
+        pool.mix(mixed[starts[block]:starts[block + 1]])
+
+    assert np.abs(mixed - reference_mix(plays, starts[-1])).max() < TOLERANCE
+    # Finished voices let go of their clips
+    assert pool.active_count == 0 and not any(pool._voice_clip)
@@ -1,30 +1,285 @@
 import os
-from PyQt6.QtWidgets import QPushButton
-
-def populate_sound_buttons(self, folder):
-        # Clear existing buttons in the grid
-        for i in reversed(range(self.grid_layout.count())):
-            self.grid_layout.itemAt(i).widget().setParent(None)
-        
-        # Get a list of sound files in the folder
-        sound_files = [f for f in os.listdir(folder) if f.endswith(('.mp3', '.wav', '.ogg'))]
-        
-        row, col = 0, 0
-        for sound in sound_files:
-            file_path = os.path.join(folder, sound)  # Full path to the sound file
-            btn = QPushButton(sound)
-            btn.clicked.connect(lambda checked, path=file_path: self.play_selected_sound(path))  # Connect button to playback
-            self.grid_layout.addWidget(btn, row, col)
-            col += 1
-            if col > 3:
-                col = 0
-                row += 1
-          
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, pyqtSignal
+from PyQt6.QtGui import QPainter
+from PyQt6.QtWidgets import QApplication, QListView, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+from utils.sound_search import SoundSearchIndex
+
+GRID_COLUMNS = 4
+TILE_PADDING = 16  # vertical space around the label, about what a QPushButton has
+TILE_MARGIN = 2
+BULK_CHANGE_ROWS = 256  # past this many changed rows one model reset beats row-by-row signals
+SEARCH_REBUILD_CHANGES = 2048  # files added or removed since the search index was built before it is rebuilt
+
+
+class SoundListModel(QAbstractListModel):
+    """The current folder's sound files, sorted by path, one row each.
+
+    Holds nothing but the path list: labels are derived when a row is
+    painted, so memory does not grow with anything but the paths. With a
+    search query set, the rows are the matches in rank order instead. The
+    search index behind them is built on a worker thread whenever the
+    paths are replaced; a query typed before it is ready is applied when
+    it arrives. Watcher changes update the index in place, and once
+    SEARCH_REBUILD_CHANGES have piled up it is rebuilt in the background
+    while the updated one keeps answering.
+    """
+
+    PathRole = Qt.ItemDataRole.UserRole
+    _index_built = pyqtSignal(int, object)  # emitted from the build thread, delivered on the GUI thread
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder = ''
+        self.paths = []
+        self.query = ''
+        self._rows = None  # indexes into _search.paths while a query is set
+        self._search = None
+        self._generation = 0  # bumped per build; an index of older paths is dropped
+        self._building = False
+        self._changes = []  # (added, removed) applied since the running build took its paths
+        self._builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search-index')
+        self._index_built.connect(self._index_ready)
+
+    @property
+    def search_ready(self):
+        return self._search is not None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.paths) if self._rows is None else len(self._rows)
+
+    def path_at(self, row):
+        return self.paths[row] if self._rows is None else self._search.paths[self._rows[row]]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.path_at(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.relpath(path, self.folder)
+        if role in (Qt.ItemDataRole.ToolTipRole, self.PathRole):
+            return path
+        return None
+
+    def set_paths(self, folder, paths):
+        """Replace the contents; paths must be sorted (LibraryIndex.files() returns them that way)."""
+        self.beginResetModel()
+        self.folder = os.path.abspath(folder)
+        self.paths = list(paths)
+        self._search = None
+        self._rows = None
+        self.endResetModel()
+        self._build()
+
+    def set_query(self, query):
+        """Show only the files matching query, best match first; an empty query shows everything."""
+        query = query.strip()
+        if query == self.query:
+            return
+        self.query = query
+        if self._search is None:
+            return  # filtered when the index arrives
+        self.beginResetModel()
+        self._rows = self._filter()
+        self.endResetModel()
+
+    def _filter(self):
+        if not self.query or self._search is None:
+            return None
+        return self._search.search(self.query)
+
+    def _build(self):
+        self._generation += 1
+        self._building = True
+        self._changes = []
+        try:
+            self._builder.submit(self._build_index, self._generation, self.folder, list(self.paths))
+        except RuntimeError:
+            pass  # shut down while closing
+
+    def _build_index(self, generation, folder, paths):
+        try:
+            index = SoundSearchIndex(folder, paths)
+        except Exception as e:
+            print(f"Building the search index for {folder} failed: {e}")
+            return
+        self._index_built.emit(generation, index)
+
+    def _index_ready(self, generation, index):
+        if generation != self._generation:
+            return
+        for added, removed in self._changes:
+            index.remove(removed)
+            index.add(added)
+        self._building = False
+        self._changes = []
+        self._search = index
+        if self.query:
+            self.beginResetModel()
+            self._rows = self._filter()
+            self.endResetModel()
+
+    def _update_search(self, added, removed):
+        if self._search is not None:
+            self._search.remove(removed)
+            self._search.add(added)
+        if self._building:
+            self._changes.append((added, removed))
+        elif self._search is not None and self._search.pending_changes > SEARCH_REBUILD_CHANGES:
+            self._build()
+
+    def apply_changes(self, added, removed):
+        """Insert and remove rows for files that appeared or disappeared, keeping the sort order."""
+        if len(added) + len(removed) > BULK_CHANGE_ROWS:
+            gone = set(removed)
+            self.beginResetModel()
+            self.paths = sorted({p for p in self.paths if p not in gone}.union(added))
+            self._update_search(added, removed)
+            self._rows = self._filter()
+            self.endResetModel()
+            return
+
+        # Filtered rows are ranked, not sorted, so while searching the matches are recomputed in one reset
+        signal_rows = self._rows is None
+        if not signal_rows:
+            self.beginResetModel()
+        for path in sorted(removed, reverse=True):
+            row = bisect_left(self.paths, path)
+            if row < len(self.paths) and self.paths[row] == path:
+                if signal_rows:
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                del self.paths[row]
+                if signal_rows:
+                    self.endRemoveRows()
+        for path in sorted(added):
+            row = bisect_left(self.paths, path)
+            if row == len(self.paths) or self.paths[row] != path:
+                if signal_rows:
+                    self.beginInsertRows(QModelIndex(), row, row)
+                self.paths.insert(row, path)
+                if signal_rows:
+                    self.endInsertRows()
+        self._update_search(added, removed)
+        if not signal_rows:
+            self._rows = self._filter()
+            self.endResetModel()
+
+
+class SoundTileDelegate(QStyledItemDelegate):
+    """Paints a row as a push button, so the grid looks as it did with real buttons."""
+
+    def paint(self, painter, option, index):
+        view = option.widget
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(TILE_MARGIN, TILE_MARGIN, -TILE_MARGIN, -TILE_MARGIN)
+        button.palette = option.palette
+        button.fontMetrics = option.fontMetrics
+        text = index.data(Qt.ItemDataRole.DisplayRole)
+        button.text = option.fontMetrics.elidedText(text, Qt.TextElideMode.ElideMiddle, button.rect.width() - 12)
+        button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            button.state |= QStyle.StateFlag.State_MouseOver
+        if view is not None and getattr(view, 'pressed_row', None) == index.row():
+            button.state |= QStyle.StateFlag.State_Sunken
+        style = view.style() if view is not None else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, view)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), option.fontMetrics.height() + TILE_PADDING)
+
+
+class SoundGridView(QListView):
+    """A GRID_COLUMNS-wide grid of sound tiles that only paints the rows in view.
+
+    Uniform item sizes and a fixed grid size let Qt lay out and scroll
+    tens of thousands of rows without a widget per sound. Emits
+    `clicked` like any item view; the play panel connects it to playback.
+    """
+
+    def __init__(self, placeholder='', parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+        self.pressed_row = None
+        self.setViewMode(QListView.ViewMode.ListMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(2000)
+        self.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        # Always shown, so the scrollbar appearing doesn't change the column width
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
+        self.setItemDelegate(SoundTileDelegate(self))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # One pixel short of an exact fit, or QListView wraps the last column
+        size = QSize(max((self.viewport().width() - 1) // GRID_COLUMNS, 1), self.fontMetrics().height() + TILE_PADDING)
+        if size != self.gridSize():
+            self.setGridSize(size)
+
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        self.pressed_row = index.row() if index.isValid() else None
+        self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        self.pressed_row = None
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.placeholder and (self.model() is None or self.model().rowCount() == 0):
+            painter = QPainter(self.viewport())
+            painter.drawText(self.viewport().rect(), Qt.AlignmentFlag.AlignCenter, self.placeholder)
+            painter.end()
+
+
+def populate_sound_grid(self, folder):
+    """Show every sound under folder (subfolders included); returns their paths."""
+    # After the first visit the list comes straight from the library index; the
+    # watcher then rescans in the background and applies whatever changed
+    first_visit = not self.library.knows(folder)
+    if first_visit:
+        self.library.refresh(folder)
+    self.sound_model.set_paths(folder, self.library.files(folder))
+    self.library_watcher.watch(folder, rescan=not first_visit)
+    return list(self.sound_model.paths)
+
+def apply_library_changes(self, added, removed):
+    """Add and remove tiles for files that appeared or disappeared, keeping the rest in place."""
+    self.sound_model.apply_changes(added, removed)
+    print(f"Sound grid updated: {len(added)} added, {len(removed)} removed")
+
+def play_grid_sound(self, index):
+    self.play_selected_sound(index.data(SoundListModel.PathRole))
+
+def play_top_hit(self):
+    """Play the best search match (Enter in the search bar)."""
+    if self.sound_model.rowCount() > 0:
+        self.play_selected_sound(self.sound_model.path_at(0))
+
 def refresh_grid(self):
-    """Reload the sound grid using the last selected folder from settings."""
+    """Rescan the current sound folder; the grid picks up only what changed."""
     folder = self.settings.get("last_sound_folder")
     if folder and os.path.exists(folder):
-        populate_sound_buttons(self, folder)
+        if os.path.abspath(folder) == self.sound_model.folder:
+            self.library_watcher.rescan()
+            self.preload_sounds(list(self.sound_model.paths))
+        else:
+            self.preload_sounds(populate_sound_grid(self, folder))
         print(f"Grid refreshed from folder: {folder}")
     else:
-        print("No valid folder found in settings.")
\ No newline at end of file
+        print("No valid folder found in settings.")
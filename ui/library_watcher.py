@@ -0,0 +1,140 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from utils.config import LIBRARY_DB_PATH
+from utils.library_index import LibraryIndex
+
+
+class LibraryWatcher(QObject):
+    """Keeps the library index of the current sound folder in sync, off the GUI thread.
+
+    watch(root) rescans the folder in the background (catching whatever
+    changed while the app was closed) and then watches every directory in
+    it with QFileSystemWatcher. A change re-lists only the directories Qt
+    reported, after a short debounce so a big copy arrives as one update.
+    Added and removed files come back on the GUI thread through `changed`,
+    which the grid applies without rebuilding. New or edited files are
+    probed for their metadata and then analyzed for loudness and leading
+    silence last, on a separate thread, so a long probe or decode never
+    holds up the grid.
+
+    Each job opens its own LibraryIndex; SQLite connections stay in the
+    thread that made them.
+    """
+
+    changed = pyqtSignal(list, list)  # added paths, removed paths
+    _job_done = pyqtSignal(int, object)  # emitted from worker threads, delivered on the GUI thread
+
+    DEBOUNCE_MS = 250
+
+    def __init__(self, db_path=LIBRARY_DB_PATH, probe=True, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.probe = probe
+        self.root = None
+        self._generation = 0  # bumped per watch(); results for an older folder are dropped
+        self._stop = threading.Event()
+        self._scanner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='library-scan')
+        self._prober = ThreadPoolExecutor(max_workers=1, thread_name_prefix='library-probe')
+        self._pending_dirs = set()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._directory_changed)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._sync_pending)
+        self._job_done.connect(self._apply_result)
+
+    def watch(self, root, rescan=True):
+        """Follow root instead of the previous folder; rescan=False when the index was just refreshed."""
+        self._stop.set()
+        self._stop = threading.Event()
+        self._generation += 1
+        self._pending_dirs.clear()
+        self._debounce.stop()
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self.root = os.path.abspath(root)
+        self._submit(self._scanner, self._refresh if rescan else self._list_directories)
+
+    def rescan(self):
+        if self.root is not None:
+            self._submit(self._scanner, self._refresh)
+
+    def stop(self):
+        self._stop.set()
+        self._scanner.shutdown(wait=False, cancel_futures=True)
+        self._prober.shutdown(wait=False, cancel_futures=True)
+
+    def _directory_changed(self, path):
+        self._pending_dirs.add(path)
+        self._debounce.start()
+
+    def _sync_pending(self):
+        directories, self._pending_dirs = sorted(self._pending_dirs), set()
+        self._submit(self._scanner, self._sync_directories, directories)
+
+    def _submit(self, executor, job, *args):
+        try:
+            executor.submit(self._run, self._generation, self._stop, self.root, job, *args)
+        except RuntimeError:
+            pass  # shut down while closing
+
+    def _run(self, generation, stop, root, job, *args):
+        if stop.is_set():
+            return
+        index = LibraryIndex(self.db_path)
+        try:
+            result = job(index, root, stop, *args)
+        except Exception as e:
+            print(f"Library update failed for {root}: {e}")
+            return
+        finally:
+            index.close()
+        if result is not None:
+            self._job_done.emit(generation, result)
+
+    # Jobs, run on the worker threads
+
+    def _refresh(self, index, root, stop):
+        added, removed = index.refresh(root)
+        return added, removed, index.directories(root)
+
+    def _list_directories(self, index, root, stop):
+        return [], [], index.directories(root)
+
+    def _sync_directories(self, index, root, stop, directories):
+        added, removed = [], []
+        for directory in directories:
+            more_added, more_removed = index.sync_dir(root, directory)
+            added += more_added
+            removed += more_removed
+        return added, removed, index.directories(root)
+
+    def _probe(self, index, root, stop):
+        probed = index.probe_pending(root, stop.is_set)
+        if probed:
+            print(f"Library: probed {probed} new or changed sounds in {root}")
+        analyzed = index.analyze_pending(root, stop.is_set)
+        if analyzed:
+            print(f"Library: analyzed loudness and leading silence of {analyzed} sounds in {root}")
+        return None
+
+    # Back on the GUI thread
+
+    def _apply_result(self, generation, result):
+        if generation != self._generation:
+            return
+        added, removed, directories = result
+        watched = set(self._watcher.directories())
+        new_dirs = [path for path in directories if path not in watched]
+        if new_dirs:
+            self._watcher.addPaths(new_dirs)
+        if added or removed:
+            self.changed.emit(added, removed)
+        if self.probe:
+            self._submit(self._prober, self._probe)
@@ -1,18 +1,31 @@
 import sys
 import os
+import threading
+import time
 # Add the root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from PyQt6.QtWidgets import QApplication, QMainWindow, QStackedWidget
+from PyQt6.QtCore import QTimer, pyqtSignal
 # from audio.sound_manager import SoundManager
-from audio.mic_mixer import MicMixer  # Import the MicMixer class
-from utils.config import load_settings, save_settings  # Import the config functions
-from audio.audio_format_utils import decode_to_pcm  # Import the decode function
+from utils.config import load_settings, save_settings, CLIP_CACHE_DIR  # Import the config functions
+from utils.library_index import LibraryIndex
+from audio.clip_analysis import normalization_gain
+from audio.clip_cache import ClipCache
+from audio.disk_cache import DiskClipCache, source_stamp, write_entry
+from audio.preloader import ClipPreloader
+from audio.stream_decoder import decode_to_npy
+from audio import STREAM_MIN_FILE_BYTES, PRELOAD_POLL_INTERVAL_MS, MIC_GAIN, MUSIC_GAIN
+from utils.play_counts import PlayCounts
 from utils.adjust_settings import apply_settings
+import ui.grids
 import ui.settings_panel
+from ui.library_watcher import LibraryWatcher
 from ui.play_panel import create_play_panel
 
 class MainWindow(QMainWindow):
+    _decoded_to_disk = pyqtSignal(str, object, object)  # file path, source stamp, entry path; from decode threads
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Soundboard")
@@ -32,11 +45,65 @@ class MainWindow(QMainWindow):
         self.central_widget.addWidget(self.scene1)
 
         # self.sound_manager = SoundManager()
-        self.mic_mixer = None  # Initialize the mic mixer as None
+        # Built and warmed up right after the first frame (see showEvent), not on the first click
+        self.mic_mixer = None
+        self.devices = None  # the audio device registry, once the devices have been listed
+        self._audio_warm_up_started = False
+        self._pending_preload = None
+        self._decoding_to_disk = set()  # long files being hashed and decoded into the disk cache
+        self._decoded_to_disk.connect(self._record_disk_decode)
+
+        # Decoded clips are kept in memory so repeated triggers skip ffmpeg
+        cache_mb = self.settings.get("clip_cache_mb", 256)
+        self.clip_cache = ClipCache(max_bytes=int(cache_mb * 1024 * 1024))
+        # ...and on disk, so a restart doesn't pay the decode cost again
+        disk_cache_mb = self.settings.get("disk_cache_mb", 2048)
+        self.disk_cache = DiskClipCache(CLIP_CACHE_DIR, max_bytes=int(disk_cache_mb * 1024 * 1024))
+
+        # Folder clips are decoded in the background, most played first, so first presses are fast too
+        self.play_counts = PlayCounts()
+        preload_mb = self.settings.get("preload_mb", 192)
+        self.preloader = ClipPreloader(self.clip_cache, self.disk_cache,
+                                       workers=self.settings.get("preload_workers", 0) or None,
+                                       max_bytes=int(preload_mb * 1024 * 1024),
+                                       progress=self._show_preload_progress)
+        self.preload_timer = QTimer(self)
+        self.preload_timer.timeout.connect(self._poll_preloader)
+
+        # The sound folder's contents are indexed on disk and kept current by a file watcher
+        self.library = LibraryIndex()
+        self.library_watcher = LibraryWatcher(parent=self)
+        self.library_watcher.changed.connect(lambda added, removed: ui.grids.apply_library_changes(self, added, removed))
 
         # Apply loaded settings
         apply_settings(self)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._audio_warm_up_started:
+            self._audio_warm_up_started = True
+            # Let the first frame paint, then list devices and start the mixer in separate event loop turns
+            QTimer.singleShot(0, self._warm_up_audio)
+
+    def _warm_up_audio(self):
+        try:
+            ui.settings_panel.populate_input_devices(self)
+        except Exception as e:
+            print(f"Audio warm-up failed, retrying on first play: {e}")
+            return
+        QTimer.singleShot(0, self._start_mixer)
+
+    def _start_mixer(self):
+        try:
+            # The audio thread opens the devices while the GUI keeps running
+            self._ensure_mic_mixer(wait_for_streams=False)
+        except Exception as e:
+            print(f"Audio warm-up failed, retrying on first play: {e}")
+
+    def show_settings(self):
+        ui.settings_panel.populate_input_devices(self)
+        self.central_widget.setCurrentWidget(self.scene1)
+
     def test_mic(self):
         """Run the testMik script."""
         script_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "audio", "testMik.py")
@@ -49,45 +116,191 @@ class MainWindow(QMainWindow):
         self.settings["speaker_volume"] = self.dial_sb.value() / 100
         self.settings["last_selected_mic"] = self.input_device.currentText()
         save_settings(self.settings)
+        if self.mic_mixer is not None and self.input_device.currentData() is not None:
+            # Only the capture stream is reopened; sounds that are playing carry on
+            self.mic_mixer.set_input_device(self.input_device.currentData())
 
         print("Settings saved:", self.settings)  # Debugging
 
         # Switch back to Scene 0
         self.central_widget.setCurrentWidget(self.scene0)
 
-    def play_selected_sound(self, file_path):
-        if not self._file_exists(file_path):
+    def discard_and_return_to_scene0(self):
+        """Return to Scene 0, putting the volume dials (and the live volumes) back to the saved settings."""
+        self.dial_mc.setValue(int(self.settings.get("mic_volume", 1.00) * 100))
+        self.dial_sb.setValue(int(self.settings.get("speaker_volume", 1.00) * 100))
+        self.central_widget.setCurrentWidget(self.scene0)
+
+    def volume_dial_changed(self):
+        """Follow the volume dials live; the mixer ramps to the new bus gains so turning them doesn't click."""
+        if self.mic_mixer is None:
             return
+        self.mic_mixer.set_bus_gain('mic', self.dial_mc.value() / 100 * MIC_GAIN)
+        self.mic_mixer.set_bus_gain('clips', self.dial_sb.value() / 100 * MUSIC_GAIN)
 
-        self._ensure_mic_mixer()
-        self._decode_and_load_sound(file_path)
+    def play_selected_sound(self, file_path):
+        """Trigger a clip: post its play command right away and leave everything slow to the background.
 
-    def _file_exists(self, file_path):
-        if not os.path.exists(file_path):
+        A clip in the clip or disk cache plays on a voice at once; the disk
+        cache is looked up by path, size and mtime, so the click never reads
+        the file itself. Anything else streams, starting with its first
+        decoded block, while the preloader hashes and decodes it into the
+        caches in a worker process for the next click. Every
+        trigger is timed from here to its first mixed sample (see
+        MicMixer.trigger).
+        """
+        clicked_at = time.perf_counter()
+        try:
+            long_file = os.path.getsize(file_path) >= STREAM_MIN_FILE_BYTES
+        except OSError:
             print(f"File does not exist: {file_path}")
-            return False
-        return True
+            return
+
+        # Commands queue up while the audio thread is still opening the devices
+        self._ensure_mic_mixer(wait_for_streams=False)
+        handle = self.mic_mixer.trigger(clicked_at)
+        gain, start_sec = self._playback_levels(file_path)
+        # Long files are never decoded whole into memory
+        if long_file:
+            self._play_long_sound(file_path, gain, start_sec, handle)
+        else:
+            self._play_clip(file_path, gain, start_sec, handle)
+        # Saving the play count writes a file; do it after the click has been handled
+        QTimer.singleShot(0, lambda: self.play_counts.record(file_path))
 
+    def _playback_levels(self, file_path):
+        """The clip's normalization gain and leading silence from the library index (1.0 and 0 until analyzed)."""
+        info = self.library.info(file_path)
+        if not info or not info['analyzed']:
+            return 1.0, 0.0
+        gain = normalization_gain(info['loudness_db'], info['peak']) if self.settings.get("clip_normalize", True) else 1.0
+        start_sec = (info['start_offset'] or 0.0) if self.settings.get("clip_trim_silence", True) else 0.0
+        return gain, start_sec
 
-    def _ensure_mic_mixer(self):
+    def _ensure_mic_mixer(self, wait_for_streams=True):
+        if self.mic_mixer is not None and self.mic_mixer.startup_failed:
+            print(f"Audio startup failed ({self.mic_mixer.audio_thread.startup_error}), retrying")
+            self.mic_mixer = None
         if not self.mic_mixer:
+            # QtMultimedia and the mix stack load here, after the window is up
+            from audio.mic_mixer import MicMixer
+            ui.settings_panel.populate_input_devices(self)
             selected_device = self.input_device.currentData()
             # Allow settings to request routing playback only to VB-Cable
             route_vb = self.settings.get("route_to_vbcable_only", False)
-            self.mic_mixer = MicMixer(audio_device=selected_device, route_to_vbcable_only=route_vb)
+            scheduling = self.settings.get("audio_scheduling", "timer")
+            # Optional JSON-lines file of latency/underrun stats for diagnosing crackles
+            stats_log = self.settings.get("audio_stats_log")
+            native_format = self.settings.get("audio_native_format", True)
+            # The dials' current positions, so unsaved turns on the settings page apply too
+            self.mic_mixer = MicMixer(audio_device=selected_device, route_to_vbcable_only=route_vb,
+                                      scheduling=scheduling, stats_log=stats_log, native_format=native_format,
+                                      wait_for_streams=wait_for_streams,
+                                      mic_gain=self.dial_mc.value() / 100 * MIC_GAIN,
+                                      music_gain=self.dial_sb.value() / 100 * MUSIC_GAIN,
+                                      mic_noise_gate=self.settings.get("mic_noise_gate", False))
             desc = selected_device.description() if selected_device else "(default)"
             print(f"MicMixer initialized with device: {desc}; route_to_vbcable_only={route_vb}")
+            if self._pending_preload:
+                file_paths, self._pending_preload = self._pending_preload, None
+                self.preload_sounds(file_paths)
 
 
-    def _decode_and_load_sound(self, file_path):
-        pcm_bytes = decode_to_pcm(file_path)
-        if pcm_bytes is not None and len(pcm_bytes) > 0:
-            print(f"Loading PCM data of size {len(pcm_bytes)} bytes into MicMixer.")
-            self.mic_mixer.load_sound(pcm_bytes)
+    def _play_clip(self, file_path, gain=1.0, start_sec=0.0, handle=None):
+        """Play a clip from the clip or disk cache (lookups only, no hashing); on a miss stream it and have the preloader decode it."""
+        fmt = self.mic_mixer.format
+        sample_rate, channels = fmt.sampleRate(), fmt.channelCount()
+        key = self.clip_cache.make_key(file_path, sample_rate, channels)
+        sound = self.clip_cache.get(key)
+        if sound is None:
+            sound = self.disk_cache.load(file_path, sample_rate, channels)
+            self.clip_cache.put(key, sound)
+        if sound is not None and len(sound) > 0:
+            print(f"Loading clip of shape {sound.shape} into MicMixer (cache: {self.clip_cache.stats()})")
+            self.mic_mixer.load_sound(sound, gain, start_sec, handle)
+            return
+
+        self.mic_mixer.stream_sound(file_path, gain, start_sec, handle)
+        self.preloader.request(file_path, sample_rate, channels)
+        self.preload_timer.start(PRELOAD_POLL_INTERVAL_MS)
+
+    def _play_long_sound(self, file_path, gain=1.0, start_sec=0.0, handle=None):
+        """Play a long file memory-mapped from the disk cache; on a miss stream it while a thread decodes it there."""
+        fmt = self.mic_mixer.format
+        sample_rate, channels = fmt.sampleRate(), fmt.channelCount()
+        mapped = self.disk_cache.load(file_path, sample_rate, channels)
+        if mapped is not None:
+            self.mic_mixer.play_mapped(mapped, gain, start_sec, handle)
+            return
+
+        self.mic_mixer.stream_sound(file_path, gain, start_sec, handle)
+        if file_path not in self._decoding_to_disk:
+            self._decoding_to_disk.add(file_path)
+            threading.Thread(target=self._decode_to_disk, args=(file_path, sample_rate, channels),
+                             daemon=True).start()
+
+    def _decode_to_disk(self, file_path, sample_rate, channels):
+        # Hashing a multi-GB file and copying ffmpeg's output to disk both happen here, off the GUI thread;
+        # only the result is handed back to record it with the disk cache
+        stamp = entry = None
+        try:
+            stamp = source_stamp(file_path)
+            entry = self.disk_cache.entry_for(stamp[2], sample_rate, channels)
+            if not os.path.exists(entry) and not write_entry(
+                    entry, lambda path: decode_to_npy(file_path, sample_rate, channels, path), self.disk_cache.max_bytes):
+                entry = None
+        except OSError as e:
+            print(f"Could not decode {file_path} into the disk cache: {e}")
+        self._decoded_to_disk.emit(file_path, stamp, entry)
+
+    def _record_disk_decode(self, file_path, stamp, entry):
+        self._decoding_to_disk.discard(file_path)
+        if stamp is None:
+            return
+        self.disk_cache.record(file_path, *stamp)
+        if entry is not None:
+            self.disk_cache.add_entry(entry)
+        self.disk_cache.flush()
+
+    def preload_sounds(self, file_paths):
+        """Decode a folder's clips in the background (replacing any preload already running)."""
+        file_paths = [path for path in file_paths if self._preloadable(path)]
+        if not file_paths:
+            self.preloader.cancel()
+            return
+        if self.mic_mixer is None:
+            # Clips are decoded for the mixer's format; this runs again once the mixer is up
+            self._pending_preload = file_paths
+            return
+        fmt = self.mic_mixer.format
+        self.preloader.start(self.play_counts.by_priority(file_paths), fmt.sampleRate(), fmt.channelCount())
+        self.preload_timer.start(PRELOAD_POLL_INTERVAL_MS)
+
+    def _preloadable(self, file_path):
+        try:
+            return os.path.getsize(file_path) < STREAM_MIN_FILE_BYTES
+        except OSError:
+            return False  # removed since the library index last saw it
+
+    def _poll_preloader(self):
+        if not self.preloader.poll():
+            self.preload_timer.stop()
+
+    def _show_preload_progress(self, done, total, loaded_bytes):
+        if done < total:
+            self.statusBar().showMessage(f"Preloading sounds {done}/{total} ({loaded_bytes // (1024 * 1024)}MB)")
         else:
-            print("Failed to decode sound file to PCM.")
+            self.statusBar().showMessage(f"Preloaded {total} sounds", 3000)
+
+    def closeEvent(self, event):
+        self.preloader.shutdown()
+        self.library_watcher.stop()
+        self.library.close()
+        super().closeEvent(event)
 
-app = QApplication(sys.argv)
-window = MainWindow()
-window.show()
-sys.exit(app.exec())
\ No newline at end of file
+# Guarded so preloader worker processes (which re-import the main module) don't start the app
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec())
\ No newline at end of file
@@ -1,7 +1,6 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLineEdit, QGridLayout, QLabel, QPushButton
+    QWidget, QVBoxLayout, QLineEdit, QPushButton
 )
-from PyQt6.QtCore import Qt
 import ui.grids
 
 def create_play_panel(main_window):
@@ -12,14 +11,16 @@ def create_play_panel(main_window):
     main_window.search_bar.setPlaceholderText("Search")
     layout.addWidget(main_window.search_bar)
     
-    # Add a grid layout for the file grid
-    main_window.grid_layout = QGridLayout()
-    layout.addLayout(main_window.grid_layout)
-    
-    # Placeholder label for the grid
-    placeholder_label = QLabel("No files loaded. Connect a folder to populate.")
-    placeholder_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-    main_window.grid_layout.addWidget(placeholder_label, 0, 0, 1, 4)  # Spanning 4 columns
+    # The file grid: a model of the folder's sounds and a view that only paints the visible tiles
+    main_window.sound_model = ui.grids.SoundListModel()
+    main_window.sound_grid = ui.grids.SoundGridView("No files loaded. Connect a folder to populate.")
+    main_window.sound_grid.setModel(main_window.sound_model)
+    main_window.sound_grid.clicked.connect(lambda index: ui.grids.play_grid_sound(main_window, index))
+    layout.addWidget(main_window.sound_grid)
+
+    # Filter the grid as you type; Enter plays the best match
+    main_window.search_bar.textChanged.connect(main_window.sound_model.set_query)
+    main_window.search_bar.returnPressed.connect(lambda: ui.grids.play_top_hit(main_window))
     
     # Add a Refresh button
     main_window.refresh_button = QPushButton("Refresh")
@@ -27,7 +28,7 @@ def create_play_panel(main_window):
     layout.addWidget(main_window.refresh_button)
     
     main_window.settings_button = QPushButton("Settings")
-    main_window.settings_button.clicked.connect(lambda: main_window.central_widget.setCurrentWidget(main_window.scene1))
+    main_window.settings_button.clicked.connect(main_window.show_settings)
     layout.addWidget(main_window.settings_button)
     
     scene.setLayout(layout)
@@ -5,19 +5,15 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from PyQt6.QtWidgets import ( QWidget, QVBoxLayout, QPushButton, QLabel, QDial, QComboBox, QMessageBox )
-from PyQt6.QtMultimedia import QMediaDevices
-from utils.adjust_settings import load_sounds
+from utils.adjust_settings import load_sounds, select_saved_mic
 
 # Scene 1: Settings Panel
 def create_scene1(self):
         scene = QWidget()
         layout = QVBoxLayout()
 
-        # Populate the microphone input device list
+        # The microphone list is filled in by populate_input_devices, after the window is up
         self.input_device = QComboBox()
-        audio_devices = QMediaDevices.audioInputs()
-        for device in audio_devices:
-            self.input_device.addItem(device.description(), device)
         layout.addWidget(QLabel("Microphone Input:"))
         layout.addWidget(self.input_device)
 
@@ -28,11 +24,13 @@ def create_scene1(self):
 
         self.dial_mc = QDial()
         self.dial_mc.setValue(65)
+        self.dial_mc.valueChanged.connect(self.volume_dial_changed)
         layout.addWidget(QLabel("Microphone Volume"))
         layout.addWidget(self.dial_mc)
 
         self.dial_sb = QDial()
         self.dial_sb.setValue(65)
+        self.dial_sb.valueChanged.connect(self.volume_dial_changed)
         layout.addWidget(QLabel("Speaker Volume"))
         layout.addWidget(self.dial_sb)
 
@@ -56,7 +54,7 @@ def create_scene1(self):
 
         # Discard button: Return to Scene 0 without saving
         self.discard_button = QPushButton("Discard")
-        self.discard_button.clicked.connect(lambda: self.central_widget.setCurrentWidget(self.scene0))
+        self.discard_button.clicked.connect(self.discard_and_return_to_scene0)
         layout.addWidget(self.discard_button)
 
 
@@ -68,6 +66,32 @@ def create_scene1(self):
         scene.setLayout(layout)
         return scene
 
+def populate_input_devices(self):
+        """List the microphones (once) and select the saved one.
+
+        Enumerating devices loads QtMultimedia and its backend, so it is kept
+        out of window construction and done right after the first frame.
+        After that the list follows the device registry as devices come and go.
+        """
+        if self.devices is not None:
+            return
+        from audio.device_utils import get_device_registry
+        self.devices = get_device_registry()
+        self.devices.changed.connect(lambda: refresh_input_devices(self))
+        for device in self.devices.inputs:
+            self.input_device.addItem(device.description(), device)
+        select_saved_mic(self)
+
+def refresh_input_devices(self):
+        """Re-list the microphones after one was plugged in or removed, keeping the selection if it is still there."""
+        current = self.input_device.currentText()
+        self.input_device.clear()
+        for device in self.devices.inputs:
+            self.input_device.addItem(device.description(), device)
+        index = self.input_device.findText(current)
+        if index >= 0:
+            self.input_device.setCurrentIndex(index)
+
 def show_legal_info(self):
         """Display legal information about VB-Cable and ffmpeg."""
 
@@ -1,28 +1,33 @@
 import os
 from PyQt6.QtWidgets import QFileDialog
 from utils.config import save_settings
-from ui.grids import populate_sound_buttons
+from ui.grids import populate_sound_grid
 
 def apply_settings(self):
     """Apply settings to the UI components."""
     print("Applying settings...")  # Debugging
     self.dial_mc.setValue(int(self.settings.get("mic_volume", 1.00) * 100))
     self.dial_sb.setValue(int(self.settings.get("speaker_volume", 1.00) * 100))
-    last_selected_mic = self.settings.get("last_selected_mic")
-    if last_selected_mic:
-        index = self.input_device.findText(last_selected_mic)
-        if index != -1:
-            self.input_device.setCurrentIndex(index)
+    # The saved microphone is selected once the device list is filled in (see populate_input_devices)
 
     # Load the last selected folder and populate the grid
     last_folder = self.settings.get("last_sound_folder")
     if last_folder and os.path.exists(last_folder):
         print(f"Loading sounds from last folder: {last_folder}")  # Debugging
-        populate_sound_buttons(self, last_folder)
+        self.preload_sounds(populate_sound_grid(self, last_folder))
     else:
         print("No valid folder found in settings.")  # Debugging
 
 
+def select_saved_mic(self):
+    """Select the microphone saved in settings, if it is in the device list."""
+    last_selected_mic = self.settings.get("last_selected_mic")
+    if last_selected_mic:
+        index = self.input_device.findText(last_selected_mic)
+        if index != -1:
+            self.input_device.setCurrentIndex(index)
+
+
 def load_sounds(self):
     """Open a folder dialog to select a sound folder and populate the grid."""
     folder = QFileDialog.getExistingDirectory(self, "Select Sound Folder")
@@ -30,7 +35,8 @@ def load_sounds(self):
         self.settings["last_sound_folder"] = folder  # Save the selected folder to settings
         save_settings(self.settings)  # Persist the updated settings
         print(f"Selected folder saved: {folder}")  # Debugging
-        populate_sound_buttons(self, folder)
+        # Starting a new preload cancels the one for the previous folder
+        self.preload_sounds(populate_sound_grid(self, folder))
 
 
 ###
@@ -2,13 +2,26 @@ import json
 import os
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "settings.json")
+CLIP_CACHE_DIR = os.path.join(os.path.dirname(__file__), "clip_cache")
+PLAY_COUNTS_PATH = os.path.join(os.path.dirname(__file__), "play_counts.json")
+LIBRARY_DB_PATH = os.path.join(os.path.dirname(__file__), "library.sqlite3")
 
 # Default settings fallback
 DEFAULT_SETTINGS = {
     "mic_volume": 1.00,
     "speaker_volume": 1.00,
     "last_selected_mic": None,
-    "last_sound_folder": None
+    "last_sound_folder": None,
+    "clip_cache_mb": 256,
+    "disk_cache_mb": 2048,
+    "audio_scheduling": "timer",
+    "audio_stats_log": None,
+    "audio_native_format": True,
+    "preload_mb": 192,
+    "preload_workers": 0,
+    "clip_normalize": True,
+    "clip_trim_silence": True,
+    "mic_noise_gate": False
 }
 
 def load_settings():
@@ -0,0 +1,248 @@
+import json
+import os
+import sqlite3
+import subprocess
+import wave
+
+from audio import FFPROBE_BINARY
+from audio.clip_analysis import analyze_file
+from utils.config import LIBRARY_DB_PATH
+
+SOUND_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.flac', '.aac')
+PROBE_BATCH = 50  # probed files committed per transaction
+ANALYSIS_BATCH = 10  # analyzed files committed per transaction; each one is a full decode
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    root TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    probed INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    sample_rate INTEGER,
+    channels INTEGER,
+    analyzed INTEGER NOT NULL DEFAULT 0,
+    loudness_db REAL,
+    peak REAL,
+    start_offset REAL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    root TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+"""
+# Columns added after the first release, for indexes created before them
+ADDED_COLUMNS = (
+    ('analyzed', 'INTEGER NOT NULL DEFAULT 0'),
+    ('loudness_db', 'REAL'),
+    ('peak', 'REAL'),
+    ('start_offset', 'REAL'),
+)
+# Rows are selected by path range, not by the root column (the folder that first scanned them),
+# so a folder opened inside or around an indexed one shares its rows
+UNDER_ROOT = "(path = ? OR (path > ? AND path < ?))"
+INFO_COLUMNS = ('size', 'mtime_ns', 'duration', 'sample_rate', 'channels', 'analyzed', 'loudness_db', 'peak',
+                'start_offset')
+
+
+def probe_file(file_path):
+    """Return (duration_sec, sample_rate, channels) for a sound file, or None if it can't be read."""
+    if file_path.lower().endswith('.wav'):
+        try:
+            with wave.open(file_path, 'rb') as wav:
+                return wav.getnframes() / wav.getframerate(), wav.getframerate(), wav.getnchannels()
+        except (wave.Error, EOFError, OSError):
+            pass  # not plain PCM; let ffprobe have a go
+    command = [FFPROBE_BINARY, '-v', 'error', '-select_streams', 'a:0',
+               '-show_entries', 'stream=sample_rate,channels:format=duration', '-of', 'json', file_path]
+    flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30, creationflags=flags)
+        info = json.loads(result.stdout or '{}')
+        stream = info['streams'][0]
+        return float(info['format']['duration']), int(stream['sample_rate']), int(stream['channels'])
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, IndexError):
+        return None
+
+
+def under_root(root):
+    """Parameters for UNDER_ROOT: root itself, then the bounds of the paths below it."""
+    below = root.rstrip(os.sep) + os.sep
+    return root, below, below[:-1] + chr(ord(os.sep) + 1)
+
+
+class LibraryIndex:
+    """Persistent SQLite index of the sound files under a folder (recursively).
+
+    Each file's size and mtime are stored with its probed duration, sample
+    rate and channel count, so re-opening a folder is one indexed query
+    instead of a rescan, and a refresh only re-probes files whose size or
+    mtime changed. After probing, each file is analyzed once (loudness,
+    peak and leading silence, see audio.clip_analysis) so playback can
+    level-match it and skip its silent start. Directories are tracked
+    too: sync_dir() re-lists just one directory (what a file watcher
+    reports) and only recurses into subdirectories it has not seen before.
+
+    One connection per thread; background work should open its own index
+    on the same db_path.
+    """
+
+    def __init__(self, db_path=LIBRARY_DB_PATH):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path)
+        # WAL lets the GUI read while a background refresh writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._add_missing_columns()
+
+    def close(self):
+        self._db.close()
+
+    def _add_missing_columns(self):
+        existing = {row[1] for row in self._db.execute("PRAGMA table_info(files)")}
+        with self._db:
+            for name, declaration in ADDED_COLUMNS:
+                if name not in existing:
+                    self._db.execute(f"ALTER TABLE files ADD COLUMN {name} {declaration}")
+
+    def knows(self, root):
+        """True once root has been scanned at least once, on its own or inside another folder."""
+        root = os.path.abspath(root)
+        return self._db.execute("SELECT 1 FROM dirs WHERE path = ?", (root,)).fetchone() is not None
+
+    def files(self, root):
+        """All indexed sound files under root, sorted by path."""
+        rows = self._db.execute(f"SELECT path FROM files WHERE {UNDER_ROOT} ORDER BY path",
+                                under_root(os.path.abspath(root)))
+        return [path for (path,) in rows]
+
+    def info(self, file_path):
+        """Return the indexed metadata for one file as a dict, or None."""
+        row = self._db.execute(
+            f"SELECT {', '.join(INFO_COLUMNS)} FROM files WHERE path = ?", (os.path.abspath(file_path),)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(INFO_COLUMNS, row))
+
+    def directories(self, root):
+        rows = self._db.execute(f"SELECT path FROM dirs WHERE {UNDER_ROOT}", under_root(os.path.abspath(root)))
+        return [path for (path,) in rows]
+
+    def refresh(self, root):
+        """Bring the whole tree under root up to date; returns (added, removed) file paths."""
+        root = os.path.abspath(root)
+        added, removed = [], []
+        with self._db:
+            if os.path.isdir(root):
+                self._sync(root, root, True, added, removed)
+            else:
+                removed.extend(self._forget_dir(root))
+        return added, removed
+
+    def sync_dir(self, root, directory):
+        """Re-list one directory that changed; returns (added, removed) file paths."""
+        root, directory = os.path.abspath(root), os.path.abspath(directory)
+        added, removed = [], []
+        with self._db:
+            if os.path.isdir(directory):
+                self._sync(root, directory, False, added, removed)
+            else:
+                removed.extend(self._forget_dir(directory))
+        return added, removed
+
+    def probe_pending(self, root, should_stop=None):
+        """Probe metadata for new or changed files under root; returns how many were probed."""
+        pending = [path for (path,) in self._db.execute(
+            f"SELECT path FROM files WHERE {UNDER_ROOT} AND probed = 0 ORDER BY path", under_root(os.path.abspath(root)))]
+        probed = 0
+        for start in range(0, len(pending), PROBE_BATCH):
+            if should_stop is not None and should_stop():
+                break
+            # Probe first and write after, so the write lock is never held across ffprobe runs.
+            # Failures are stored as probed with no metadata, so they aren't retried every refresh.
+            rows = [(*(probe_file(path) or (None, None, None)), path) for path in pending[start:start + PROBE_BATCH]]
+            with self._db:
+                self._db.executemany(
+                    "UPDATE files SET probed = 1, duration = ?, sample_rate = ?, channels = ? WHERE path = ?", rows)
+            probed += len(rows)
+        return probed
+
+    def analyze_pending(self, root, should_stop=None):
+        """Analyze loudness, peak and leading silence of probed files under root; returns how many were analyzed."""
+        pending = self._db.execute(
+            f"SELECT path, sample_rate, channels FROM files WHERE {UNDER_ROOT} AND probed = 1 AND analyzed = 0 "
+            "ORDER BY path", under_root(os.path.abspath(root))).fetchall()
+        analyzed = 0
+        for start in range(0, len(pending), ANALYSIS_BATCH):
+            if should_stop is not None and should_stop():
+                break
+            # As with probing, decode first and write after. Files ffprobe couldn't read are
+            # skipped, and they and failed decodes are stored as analyzed with no results.
+            rows = [(*((analyze_file(path, sample_rate, channels) if sample_rate else None) or (None, None, None)), path)
+                    for path, sample_rate, channels in pending[start:start + ANALYSIS_BATCH]]
+            with self._db:
+                self._db.executemany(
+                    "UPDATE files SET analyzed = 1, loudness_db = ?, peak = ?, start_offset = ? WHERE path = ?", rows)
+            analyzed += len(rows)
+        return analyzed
+
+    def _sync(self, root, directory, recursive, added, removed):
+        files_now = {}
+        subdirs_now = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs_now.append(entry.path)
+                    elif entry.name.lower().endswith(SOUND_EXTENSIONS) and entry.is_file():
+                        stat = entry.stat()
+                        files_now[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError as e:
+            print(f"Could not scan {directory}: {e}")
+            return
+
+        # parent is the real parent even for a root, so a folder scanned on its own is still
+        # found (and forgotten) when the folder around it is re-listed later
+        self._db.execute("INSERT INTO dirs (path, parent, root) VALUES (?, ?, ?) "
+                         "ON CONFLICT(path) DO UPDATE SET parent = excluded.parent",
+                         (directory, os.path.dirname(directory), root))
+
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in self._db.execute(
+            "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (directory,))}
+        for path, (size, mtime_ns) in files_now.items():
+            previous = known.get(path)
+            if previous is None:
+                self._db.execute(
+                    "INSERT INTO files (path, dir, root, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                    (path, directory, root, size, mtime_ns))
+                added.append(path)
+            elif previous != (size, mtime_ns):
+                # Edited in place: keep the entry, but its metadata has to be probed again
+                self._db.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ?, probed = 0, duration = NULL, sample_rate = NULL, "
+                    "channels = NULL, analyzed = 0, loudness_db = NULL, peak = NULL, start_offset = NULL "
+                    "WHERE path = ?", (size, mtime_ns, path))
+        gone = [path for path in known if path not in files_now]
+        self._db.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in gone])
+        removed.extend(gone)
+
+        known_dirs = {path for (path,) in self._db.execute("SELECT path FROM dirs WHERE parent = ?", (directory,))}
+        for subdir in known_dirs.difference(subdirs_now):
+            removed.extend(self._forget_dir(subdir))
+        for subdir in subdirs_now:
+            # A watcher event re-lists one directory; only brand-new subdirectories need walking
+            if recursive or subdir not in known_dirs:
+                self._sync(root, subdir, True, added, removed)
+
+    def _forget_dir(self, directory):
+        """Drop a directory and everything below it; returns the removed file paths."""
+        bounds = under_root(directory)
+        removed = [path for (path,) in self._db.execute(f"SELECT path FROM files WHERE {UNDER_ROOT}", bounds)]
+        self._db.execute(f"DELETE FROM files WHERE {UNDER_ROOT}", bounds)
+        self._db.execute(f"DELETE FROM dirs WHERE {UNDER_ROOT}", bounds)
+        return removed
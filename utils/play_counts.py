@@ -0,0 +1,62 @@
+import json
+import os
+import time
+
+from utils.config import PLAY_COUNTS_PATH
+
+# A play's weight halves every this many days, so recent favourites outrank old ones
+RECENCY_HALF_LIFE_DAYS = 14
+
+
+class PlayCounts:
+    """Per-clip play counts and last-played times, persisted as JSON next to settings.json."""
+
+    def __init__(self, path=PLAY_COUNTS_PATH):
+        self.path = path
+        self._counts = self._load()
+
+    def record(self, file_path):
+        """Count one play of file_path and save."""
+        entry = self._counts.setdefault(os.path.abspath(file_path), {"count": 0, "last_played": 0.0})
+        entry["count"] += 1
+        entry["last_played"] = time.time()
+        self._save()
+
+    def count(self, file_path):
+        entry = self._counts.get(os.path.abspath(file_path))
+        return entry["count"] if entry else 0
+
+    def score(self, file_path, now=None):
+        """Frecency: play count decayed by time since the last play (0 for never played)."""
+        entry = self._counts.get(os.path.abspath(file_path))
+        if not entry:
+            return 0.0
+        if now is None:
+            now = time.time()
+        age_days = max(0.0, now - entry["last_played"]) / 86400.0
+        return entry["count"] * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    def by_priority(self, file_paths):
+        """Return file_paths ordered most-played first; unplayed clips keep their order at the end."""
+        now = time.time()
+        scored = [(-self.score(path, now), index, path) for index, path in enumerate(file_paths)]
+        scored.sort()
+        return [path for _, _, path in scored]
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print("Warning: play counts file is corrupted. Starting from zero.")
+        return {}
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._counts, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save play counts: {e}")
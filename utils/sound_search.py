@@ -0,0 +1,229 @@
+import os
+import re
+
+import numpy as np
+
+SEPARATOR = 0  # byte between keys in the blob; never part of a query
+_WORD_START = re.compile(rb'(?<![a-z0-9\x80-\xff])[a-z0-9\x80-\xff]')
+
+
+def _normalize(text):
+    return text.replace(os.sep, '/').lower()
+
+
+def _gram_codes(blob, n):
+    """The n-gram starting at each blob position as an int, and whether it lies within one key."""
+    count = max(len(blob) - n + 1, 0)
+    codes = np.zeros(count, dtype=np.int64)
+    valid = np.ones(count, dtype=bool)
+    for k in range(n):
+        part = blob[k:k + count]
+        codes = (codes << 8) | part
+        valid &= part != SEPARATOR
+    return codes, valid
+
+
+def _sorted_by_code(codes, values, scale):
+    """Sort (code, value) pairs by code, then value; values must be below scale."""
+    pairs = np.sort(codes * scale + values)
+    return pairs // scale, pairs % scale
+
+
+class _KeyPostings:
+    """For every n-gram in the blob, the sorted unique keys that contain it."""
+
+    def __init__(self, blob, owners, n):
+        codes, valid = _gram_codes(blob, n)
+        keys = int(owners[-1]) + 1 if len(owners) else 1
+        codes, ids = _sorted_by_code(codes[valid], owners[:len(valid)][valid], keys)
+        first = np.concatenate((codes[:1] >= 0, (codes[1:] != codes[:-1]) | (ids[1:] != ids[:-1])))
+        self.codes = codes[first]
+        self.ids = ids[first].astype(np.int32)
+
+    def lookup(self, gram):
+        code = int.from_bytes(gram, 'big')
+        lo, hi = np.searchsorted(self.codes, [code, code + 1])
+        return self.ids[lo:hi]
+
+
+class _PositionPostings:
+    """For every trigram in the blob, the sorted positions it occurs at."""
+
+    def __init__(self, blob):
+        codes, valid = _gram_codes(blob, 3)
+        self.codes, self.positions = _sorted_by_code(codes[valid], np.flatnonzero(valid), max(len(blob), 1))
+
+    def lookup(self, gram):
+        code = int.from_bytes(gram, 'big')
+        lo, hi = np.searchsorted(self.codes, [code, code + 1])
+        return self.positions[lo:hi]
+
+
+class SoundSearchIndex:
+    """Ranked substring search over a folder's sound files, by name and subfolder.
+
+    Each file's relative path is lower-cased into one byte blob, and the
+    1-, 2- and 3-grams of the blob are indexed with numpy, so building the
+    index is a few sorts rather than a Python loop per file. One- and
+    two-byte terms are a single posting-list lookup of matching files.
+    Trigrams are indexed by position instead: a longer term starts from
+    the positions of its rarest trigram and checks the bytes around them,
+    so even a term found in every file costs a handful of array ops.
+    Every term has to match.
+
+    Results are ranked by where the first term matched: at the start of
+    the file name, at the start of a word in it, or anywhere else. Ties
+    stay in path order. search() returns indexes into `paths`.
+
+    add() and remove() keep the index current between rebuilds: removed
+    files are masked out, and added ones are appended to `paths` and
+    matched by a plain scan of their keys, coming after the indexed files
+    of the same tier. `pending_changes` says how much of that has built
+    up, so the owner can rebuild once it gets large.
+    """
+
+    def __init__(self, folder, paths):
+        self.folder = folder
+        self.paths = list(paths)
+        self._count = len(self.paths)  # files in the numpy index; later ones were add()ed
+        self._ids = {path: i for i, path in enumerate(self.paths)}
+        self._removed = np.zeros(self._count, dtype=bool)
+        self._removed_count = 0
+        self._added_keys = []  # key of paths[_count + i]
+        keys = [self._key(path) for path in self.paths]
+        lengths = np.fromiter((len(key) for key in keys), dtype=np.int64, count=len(keys))
+        self._starts = np.zeros(len(keys), dtype=np.int64)
+        np.cumsum(lengths[:-1] + 1, out=self._starts[1:])
+        self._blob = np.frombuffer(b''.join(key + bytes([SEPARATOR]) for key in keys), dtype=np.uint8)
+        owners = np.repeat(np.arange(len(keys), dtype=np.int64), lengths + 1)
+        self._owners = owners
+        self._postings = [_KeyPostings(self._blob, owners, n) for n in (1, 2)]
+        self._trigrams = _PositionPostings(self._blob)
+
+        # Word starts inside each file name, sorted by their first three bytes, so the words
+        # beginning with a term are one binary search away; the name's own start is one of them
+        name_offsets = np.fromiter((key.rfind(b'/') + 1 for key in keys), dtype=np.int64, count=len(keys))
+        name_starts = self._starts + name_offsets
+        alnum = np.zeros(256, dtype=bool)
+        for chars in (b'abcdefghijklmnopqrstuvwxyz', b'0123456789'):
+            alnum[np.frombuffer(chars, dtype=np.uint8)] = True
+        alnum[128:] = True  # any non-ASCII byte counts as part of a word
+        is_word = alnum[self._blob]
+        begins = np.flatnonzero(is_word & ~np.concatenate(([False], is_word[:-1])))
+        begins = np.union1d(begins[begins >= name_starts[owners[begins]]], name_starts)
+        padded = np.concatenate((self._blob, np.zeros(2, dtype=np.uint8))).astype(np.int64)
+        heads = (padded[begins] << 16) | (padded[begins + 1] << 8) | padded[begins + 2]
+        order = np.argsort(heads, kind='stable')
+        self._word_heads = heads[order]
+        self._word_starts = begins[order]
+        self._word_owners = owners[self._word_starts]
+        self._word_is_name = self._word_starts == name_starts[self._word_owners]
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def pending_changes(self):
+        """Files added or removed since the index was built."""
+        return len(self._added_keys) + self._removed_count
+
+    def add(self, paths):
+        """Make paths searchable (until the next rebuild they are matched by a scan)."""
+        for path in paths:
+            if path not in self._ids:
+                self._ids[path] = len(self.paths)
+                self.paths.append(path)
+                self._added_keys.append(self._key(path))
+
+    def remove(self, paths):
+        """Stop returning paths from search()."""
+        for path in paths:
+            i = self._ids.pop(path, None)
+            if i is None:
+                continue
+            if i < self._count:
+                self._removed[i] = True
+                self._removed_count += 1
+            else:
+                self._added_keys[i - self._count] = None
+
+    def search(self, query):
+        """Indexes into paths of the files matching every term of query, best first."""
+        terms = [term.encode('utf-8') for term in _normalize(query).split()]
+        if not terms:
+            return np.array(sorted(self._ids.values()), dtype=np.int64)
+        matched = None
+        for term in terms:
+            ids = self._match(term)
+            matched = ids if matched is None else self._intersect(matched, ids)
+            if len(matched) == 0:
+                break
+        if self._removed_count:
+            matched = matched[~self._removed[matched]]
+        tiers = self._tiers(matched, terms[0])
+        if self._added_keys:
+            added, added_tiers = self._scan_added(terms)
+            matched = np.concatenate((matched, added))
+            tiers = np.concatenate((tiers, added_tiers))
+        return matched[np.argsort(tiers, kind='stable')]
+
+    def _key(self, path):
+        prefix = os.path.join(os.path.abspath(self.folder), '')
+        relative = path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, self.folder)
+        return _normalize(relative).encode('utf-8')
+
+    def _scan_added(self, terms):
+        """(ids, tiers) of the add()ed files matching every term, ranked like _tiers."""
+        ids = []
+        tiers = []
+        for i, key in enumerate(self._added_keys):
+            if key is None or not all(term in key for term in terms):
+                continue
+            name = key[key.rfind(b'/') + 1:]
+            ids.append(self._count + i)
+            if name.startswith(terms[0]):
+                tiers.append(0)
+            elif any(name.startswith(terms[0], m.start()) for m in _WORD_START.finditer(name)):
+                tiers.append(1)
+            else:
+                tiers.append(2)
+        return np.array(ids, dtype=np.int64), np.array(tiers, dtype=np.int8)
+
+    def _intersect(self, a, b):
+        """Keys in both sorted id arrays; a mask over all keys is cheaper than sorting the two together."""
+        if len(a) > len(b):
+            a, b = b, a
+        present = np.zeros(self._count, dtype=bool)
+        present[a] = True
+        return b[present[b]]
+
+    def _match(self, term):
+        if len(term) < 3:
+            return self._postings[len(term) - 1].lookup(term)
+        occurrences = [self._trigrams.lookup(term[j:j + 3]) for j in range(len(term) - 2)]
+        rarest = min(range(len(occurrences)), key=lambda j: len(occurrences[j]))
+        starts = occurrences[rarest] - rarest
+        starts = starts[(starts >= 0) & (starts + len(term) <= len(self._blob))]
+        for k, byte in enumerate(term):
+            if rarest <= k < rarest + 3:
+                continue
+            starts = starts[self._blob[starts + k] == byte]
+        # Starts are in blob order, so their keys come out sorted; drop repeats within a key
+        ids = self._owners[starts]
+        return ids[np.concatenate((ids[:1] >= 0, ids[1:] != ids[:-1]))].astype(np.int32)
+
+    def _tiers(self, ids, term):
+        """0 where the file name starts with term, 1 where a word in it does, 2 otherwise."""
+        head = term[:3]
+        shift = 8 * (3 - len(head))
+        code = int.from_bytes(head, 'big') << shift
+        lo, hi = np.searchsorted(self._word_heads, [code, code + (1 << shift)])
+        words = np.arange(lo, hi)
+        last = len(self._blob) - 1
+        for k in range(3, len(term)):
+            words = words[self._blob[np.minimum(self._word_starts[words] + k, last)] == term[k]]
+
+        tier = np.full(self._count, 2, dtype=np.int8)
+        tier[self._word_owners[words]] = 1
+        tier[self._word_owners[words[self._word_is_name[words]]]] = 0
+        return tier[ids]